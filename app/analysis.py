@@ -19,89 +19,127 @@
 
 import math
 
+import numpy as np
+
+from app.counts import Counts
+
+
+def as_counts(counts):
+    """Returns the counts as Counts, converting dicts of bitstrings to counts"""
+    return counts if isinstance(counts, Counts) else Counts.from_dict(counts)
+
+
 def calc_expected_value(counts_dict):
-    """Returns the expected value of the histogram of the counts provided as a dict, if the results can be
+    """Returns the expected value of the histogram of the counts provided as a dict or Counts, if the results can be
     interpreted as binary numbers """
-    result = 0
-    for key in counts_dict.keys():
-        result += int(key, 2) * counts_dict[key]
-    return result
+    counts = as_counts(counts_dict)
+    return float(np.dot(counts.outcomes.astype(np.float64), counts.values))
 
 
 def calc_standard_deviation(counts_dict, expected_value):
-    """Returns the standard deviation of the histogram of the counts provided as a dict, if the results can be
-     interpreted as binary numbers"""
-    sum = 0
-    for key in counts_dict.keys():
-        sum += ((int(key, 2) - expected_value) ** 2) * counts_dict[key]
-    return math.sqrt(sum)
+    """Returns the standard deviation of the histogram of the counts provided as a dict or Counts, if the results can
+     be interpreted as binary numbers"""
+    counts = as_counts(counts_dict)
+    return math.sqrt(np.dot((counts.outcomes.astype(np.float64) - expected_value) ** 2, counts.values))
 
 
 def calc_percentage_error(counts_sim, counts_real):
-    """Returns the percentage errors for each count provided in the dict"""
-    result = {}
-    for key in counts_sim.keys():
-        if key in counts_real.keys():
-            error = (counts_sim[key] - counts_real[key]) / counts_sim[key]
-            result[key] = abs(error)
-    return result
+    """Returns the percentage errors for each count contained in both histograms"""
+    counts_sim = as_counts(counts_sim)
+    counts_real = as_counts(counts_real)
+    outcomes, sim_indices, real_indices = np.intersect1d(counts_sim.outcomes, counts_real.outcomes,
+                                                         return_indices=True)
+    values_sim = counts_sim.values[sim_indices].astype(np.float64)
+    errors = np.abs((values_sim - counts_real.values[real_indices]) / values_sim)
+    return {counts_sim.format(outcome): error for outcome, error in zip(outcomes, errors.tolist())}
 
 
 def calc_intersection(counts_sim, counts_real, shots):
     """Returns the histogram intersection value for the two histograms of simulator and quantum computer"""
-    intersection = 0
-    for key in counts_real.keys():
-        # add missing keys from quantum computer to simulator
-        if key not in counts_sim.keys():
-            counts_sim[key] = 0
-    for key in counts_sim.keys():
-        # add missing keys from simulator to quantum computer
-        if key not in counts_real.keys():
-            counts_real[key] = 0
-        # calculate histogram intersection
-        intersection = intersection + min(counts_sim[key], counts_real[key])
-    return intersection / shots
+    _, values_sim, values_real = as_counts(counts_sim).align(as_counts(counts_real))
+    return float(np.minimum(values_sim, values_real).sum() / shots)
 
 
 def calc_chi_square_distance(counts_sim, counts_real):
     """Returns the chi-square-distance for the two histograms of simulator and quantum computer"""
-    coefficient = 0
-    for key in counts_real.keys():
-        # add missing keys from quantum computer to simulator
-        if key not in counts_sim.keys():
-            counts_sim[key] = 0
-    for key in counts_sim.keys():
-        # add missing keys from simulator to quantum computer
-        if key not in counts_real.keys():
-            counts_real[key] = 0
-        # calculate chi square distance
-        coefficient = coefficient + ((counts_real[key] - counts_sim[key]) ** 2 / (counts_real[key] + counts_sim[key]))
-    return coefficient / 2
+    _, values_sim, values_real = as_counts(counts_sim).align(as_counts(counts_real))
+    return float(((values_real - values_sim) ** 2 / (values_real + values_sim)).sum() / 2)
 
 
 def calc_correlation(counts_sim, counts_real, shots):
     """Returns the correlation between the two histograms of the simulator and quantum computer"""
-    for key in counts_real.keys():
-        # add missing keys from quantum computer to simulator
-        if key not in counts_sim.keys():
-            counts_sim[key] = 0
-    for key in counts_sim.keys():
-        # add missing keys from simulator to quantum computer
-        if key not in counts_real.keys():
-            counts_real[key] = 0
-    # calculate correlation value for the two histogram
-    sum_combined = 0
-    sum_sim = 0
-    sum_real = 0
-    h_sim = shots / len(counts_sim)
-    h_real = shots / len(counts_real)
-    for key in counts_real.keys():
-        sum_real = sum_real + ((counts_real[key] - h_real) ** 2)
-    for key in counts_sim.keys():
-        sum_sim = sum_sim + ((counts_sim[key] - h_sim) ** 2)
-        sum_combined = sum_combined + ((counts_sim[key] - h_sim) * (counts_real[key] - h_real))
+    _, values_sim, values_real = as_counts(counts_sim).align(as_counts(counts_real))
+    # deviations from the uniform histogram over all outcomes of both histograms
+    deviations_sim = values_sim - shots / len(values_sim)
+    deviations_real = values_real - shots / len(values_real)
+    sum_sim = np.dot(deviations_sim, deviations_sim)
+    sum_real = np.dot(deviations_real, deviations_real)
     if sum_sim == 0 or sum_real == 0:
         return None
-    correlation = sum_combined / (math.sqrt(sum_sim * sum_real))
+    return float(np.dot(deviations_sim, deviations_real) / math.sqrt(sum_sim * sum_real))
+
+
+def compare_histograms(counts_sim, counts_real, shots):
+    """Returns the percentage error, chi-square-distance, correlation and histogram intersection for the two
+    histograms of simulator and quantum computer"""
+    return compare_histogram_pairs([(counts_sim, counts_real)], shots)[0]
+
+
+def compare_histogram_pairs(pairs, shots):
+    """Returns the percentage error, chi-square-distance, correlation and histogram intersection for each pair of
+    histograms of simulator and quantum computer. The shots are given for all pairs or as a list with the shots of each
+    pair. All pairs are aligned and compared at once."""
+    pairs = [(as_counts(counts_sim), as_counts(counts_real)) for counts_sim, counts_real in pairs]
+    if not pairs:
+        return []
+    shots = np.broadcast_to(np.asarray(shots, dtype=np.float64), len(pairs))
+
+    # concatenate the outcomes of all histograms, each with the pair it belongs to and its value in both histograms
+    outcome_parts, sim_parts, real_parts = [], [], []
+    for counts_sim, counts_real in pairs:
+        outcome_parts.extend((counts_sim.outcomes, counts_real.outcomes))
+        sim_parts.extend((counts_sim.values.astype(np.float64), np.zeros(len(counts_real))))
+        real_parts.extend((np.zeros(len(counts_sim)), counts_real.values.astype(np.float64)))
+    pair_ids = np.repeat(np.arange(len(pairs)),
+                         [len(counts_sim) + len(counts_real) for counts_sim, counts_real in pairs])
+    outcomes = np.concatenate(outcome_parts)
+
+    # sort by pair and outcome and sum the values of the same outcome of a pair
+    keys = np.unique(outcomes, return_inverse=True)[1] if outcomes.dtype == object else outcomes
+    order = np.lexsort((keys, pair_ids))
+    pair_ids, keys, outcomes = pair_ids[order], keys[order], outcomes[order]
+    if len(keys):
+        starts = np.flatnonzero(np.concatenate([[True], (pair_ids[1:] != pair_ids[:-1]) | (keys[1:] != keys[:-1])]))
+    else:
+        starts = np.zeros(0, dtype=int)
+    values_sim, values_real = (np.add.reduceat(np.concatenate(parts)[order], starts) if len(starts) else np.zeros(0)
+                               for parts in (sim_parts, real_parts))
+    # outcomes are unique within a histogram, so outcomes of both histograms of a pair are summed from two entries
+    in_both = np.diff(np.append(starts, len(keys))) == 2
+    pair_ids, outcomes = pair_ids[starts], outcomes[starts]
+
+    def sum_per_pair(values):
+        return np.bincount(pair_ids, weights=values, minlength=len(pairs))
+
+    intersections = sum_per_pair(np.minimum(values_sim, values_real)) / shots
+    chi_squares = sum_per_pair((values_real - values_sim) ** 2 / (values_real + values_sim)) / 2
+    # deviations from the uniform histogram over all outcomes of both histograms of the pair
+    uniform = shots / np.maximum(np.bincount(pair_ids, minlength=len(pairs)), 1)
+    deviations_sim = values_sim - uniform[pair_ids]
+    deviations_real = values_real - uniform[pair_ids]
+    sums_sim = sum_per_pair(deviations_sim ** 2)
+    sums_real = sum_per_pair(deviations_real ** 2)
+    sums_combined = sum_per_pair(deviations_sim * deviations_real)
+
+    percentage_errors = [{} for _ in pairs]
+    errors = np.abs((values_sim[in_both] - values_real[in_both]) / values_sim[in_both])
+    for pair_id, outcome, error in zip(pair_ids[in_both].tolist(), outcomes[in_both], errors.tolist()):
+        percentage_errors[pair_id][pairs[pair_id][0].format(outcome)] = error
 
-    return correlation
+    return [{'percentage-error': percentage_error,
+             'chi-square': chi_square,
+             'correlation': None if sum_sim == 0 or sum_real == 0 else sum_combined / math.sqrt(sum_sim * sum_real),
+             'histogram-intersection': intersection}
+            for percentage_error, chi_square, sum_sim, sum_real, sum_combined, intersection
+            in zip(percentage_errors, chi_squares.tolist(), sums_sim.tolist(), sums_real.tolist(),
+                   sums_combined.tolist(), intersections.tolist())]
@@ -19,33 +19,37 @@
 from qiskit_braket_provider import AWSBraketProvider
 from braket.aws.aws_session import AwsSession
 import boto3
-from qiskit.providers.jobstatus import JOB_FINAL_STATES
 from qiskit import QiskitError
 
+from app import job_poller, provider_sessions
+
 
 def get_qpu(access_key, secret_access_key, qpu_name, region='eu-west-2'):
+    session = provider_sessions.get_session(
+        'aws', lambda: create_session(access_key, secret_access_key, region),
+        access_key=access_key, secret_access_key=secret_access_key, region=region)
+    return session.get_backend(qpu_name)
+
+
+def create_session(access_key, secret_access_key, region):
     boto_session = boto3.Session(
         aws_access_key_id=access_key,
         aws_secret_access_key=secret_access_key,
         region_name=region,
     )
     session = AwsSession(boto_session)
-    provider = AWSBraketProvider()
-    backend = provider.get_backend(qpu_name, aws_session=session)
-    return backend
+    return provider_sessions.ProviderSession(AWSBraketProvider(), aws_session=session)
 
 
-def execute_job(transpiled_circuit, shots, backend):
-    """Generate qObject from transpiled circuit and execute it. Return result."""
+def submit_job(transpiled_circuit, shots, backend):
+    """Submit the transpiled circuit to the backend without waiting for it to finish. Return the provider job."""
+    return backend.run(transpiled_circuit, shots=shots)
 
-    try:
-        job = backend.run(transpiled_circuit, shots=shots)
 
-        job_status = job.status()
-        while job_status not in JOB_FINAL_STATES:
-            print("The job is still running")
-            job_status = job.status()
+def get_job_result(job):
+    """Get the result of a finished job. Return None if the job failed."""
 
+    try:
         job_result = job.result()
         print("\nJob result:")
         print(job_result)
@@ -76,3 +80,14 @@ def execute_job(transpiled_circuit, shots, backend):
         return {'job_result_raw': job_result_dict, 'statevector': statevector, 'counts': counts, 'unitary': unitary}
     except Exception:
         return None
+
+
+def execute_job(transpiled_circuit, shots, backend):
+    """Generate qObject from transpiled circuit and execute it. Return result."""
+
+    try:
+        job = submit_job(transpiled_circuit, shots, backend)
+        job_poller.wait_for_final_state(job)
+    except Exception:
+        return None
+    return get_job_result(job)
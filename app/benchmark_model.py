@@ -18,14 +18,15 @@
 # ******************************************************************************
 
 from app import db
+from app.db_types import CompressedText, CountsType
 
 
 class Benchmark(db.Model):
     id = db.Column(db.String(36), primary_key=True)
-    benchmark_id = db.Column(db.Integer)
-    backend = db.Column(db.String(1200), default="")
-    result = db.Column(db.String(1200), default="")
-    counts = db.Column(db.String(1200), default="")
+    benchmark_id = db.Column(db.Integer, index=True)
+    backend = db.Column(db.String(1200), default="", index=True)
+    result = db.deferred(db.Column(CompressedText, default=""))
+    counts = db.deferred(db.Column(CountsType))
     shots = db.Column(db.Integer)
     original_depth = db.Column(db.Integer)
     original_width = db.Column(db.Integer)
@@ -33,8 +34,8 @@ class Benchmark(db.Model):
     transpiled_depth = db.Column(db.Integer)
     transpiled_width = db.Column(db.Integer)
     transpiled_number_of_multi_qubit_gates = db.Column(db.Integer)
-    clifford = db.Column(db.Boolean)
-    complete = db.Column(db.Boolean, default=False)
+    clifford = db.Column(db.Boolean, index=True)
+    complete = db.Column(db.Boolean, default=False, index=True)
 
     def __repr__(self):
         return 'Benchmark {}'.format(self.result)
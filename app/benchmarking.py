@@ -17,7 +17,6 @@
 #  limitations under the License.
 # ******************************************************************************
 
-import json
 import random
 import numpy as np
 # import qiskit.ignis.verification.randomized_benchmarking as rb
@@ -27,10 +26,25 @@ from qiskit import transpile
 from qiskit.circuit.random import random_circuit
 from qiskit.converters import circuit_to_dag
 from qiskit.transpiler.passes import RemoveFinalMeasurements
+from sqlalchemy import and_, case, event, inspect, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session, aliased, undefer
 
-from app import app, db, ibmq_handler, analysis
+from app import app, db, ibmq_handler, analysis, counts
 from app.benchmark_model import Benchmark
 from app.result_model import Result
+from app.wd_class_model import WdClass
+
+SIMULATOR = 'ibmq_qasm_simulator'
+
+# adaptable value for the expected maximal depth which still gives decent results
+MAX_EXPECTED_DEPTH = 30
+# adaptable threshold values (values are work in progress)
+MIN_HISTOGRAM_INTERSECTION = 0.75  # min histogram intersection value for a benchmark being considered successful
+CLASS_SUCCESS_THRESHOLD = 2/3  # percentage of benchmarks that have to be successful for the wd-class to be successful
+
+# insert statements of the databases supporting upserts of wd-classes
+UPSERT_DIALECTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert}
 
 
 def run(circuit, backend, token, shots, benchmark_id, original_depth, original_width,
@@ -61,79 +75,80 @@ def run(circuit, backend, token, shots, benchmark_id, original_depth, original_w
     return content_location
 
 
-def calc_wd(qpu_name):
-    """calculates the wd-value of a Quantum Computer based on the clifford data in your database"""
-    # circuits with similar depth and same width are grouped together. Depth is grouped in steps of 5
-    benchmarks = Benchmark.query.all()
-    max_depth = 1
-    max_width = 1
-    # Searching for max width and depth of all clifford circuits in your database
-    for i in range(0, len(benchmarks)):
-        if benchmarks[i].complete and benchmarks[i].result != "" and benchmarks[i].backend == qpu_name\
-                and benchmarks[i].clifford:
-            if benchmarks[i].transpiled_depth > max_depth:
-                max_depth = benchmarks[i].transpiled_depth
-            if benchmarks[i].transpiled_width > max_width:
-                max_width = benchmarks[i].transpiled_width
+def get_wd_class(benchmark):
+    """Returns the depth class and width of the wd-class of the clifford benchmark and whether it was successful.
+    Circuits with similar depth and same width are grouped together. Depth is grouped in steps of 5."""
+    depth_class = min(int(np.floor(benchmark.transpiled_depth / 5)), int(np.floor(MAX_EXPECTED_DEPTH / 5)))
+    # the circuit is expected to measure the first outcome
+    intersection = counts.from_json(benchmark.counts).values[0].item() / benchmark.shots
+    return depth_class, benchmark.transpiled_width, intersection >= MIN_HISTOGRAM_INTERSECTION
 
-    # adaptable value for the expected maximal depth which still gives decent results
-    max_expected_depth = 30
-    # set max depth to expected max depth if it exceeds the expected max depth
-    if max_depth > max_expected_depth:
-        max_depth = max_expected_depth
-    wd = []
-    wd_count = np.zeros([max_depth, max_width])  # counts benchmarks for each wd-class
-    wd_success_count = np.zeros([max_depth, max_width])  # counts successes of benchmarks for each wd-class
 
-    # adaptable threshold values (values are work in progress)
-    min_histogram_intersection = 0.75  # min histogram intersection value for a benchmark being considered successful
-    class_success_threshold = 2/3   # percentage of benchmarks that have to be successful for the wd-class to be
-                                    # successful
+@event.listens_for(Session, 'before_flush')
+def _count_completed_clifford_benchmarks(session, flush_context, instances):
+    """Add clifford benchmarks to their wd-class when they are completed successfully"""
+    # number of all and of the successful benchmarks and max depth to add to each wd-class
+    additions = {}
+    for instance in [*session.new, *session.dirty]:
+        if isinstance(instance, Benchmark) and instance.complete and instance.clifford and \
+                instance.counts is not None and inspect(instance).attrs.complete.history.added:
+            depth_class, width, successful = get_wd_class(instance)
+            benchmarks, successful_benchmarks, max_depth = additions.get((instance.backend, depth_class, width),
+                                                                         (0, 0, 0))
+            additions[(instance.backend, depth_class, width)] = (benchmarks + 1, successful_benchmarks + successful,
+                                                                 max(max_depth, instance.transpiled_depth))
 
-    max_class_depth = int(np.floor(max_expected_depth / 5))
+    for key, (benchmarks, successful_benchmarks, max_depth) in additions.items():
+        insert = UPSERT_DIALECTS.get(session.get_bind().dialect.name)
+        if insert is not None:
+            # upsert in the database, as benchmarks of the same, also of a new, class may complete concurrently
+            table = WdClass.__table__
+            statement = insert(table).values(backend=key[0], depth_class=key[1], width=key[2], benchmarks=benchmarks,
+                                             successful_benchmarks=successful_benchmarks, max_depth=max_depth)
+            session.execute(statement.on_conflict_do_update(
+                index_elements=[table.c.backend, table.c.depth_class, table.c.width],
+                set_={'benchmarks': table.c.benchmarks + statement.excluded.benchmarks,
+                      'successful_benchmarks': table.c.successful_benchmarks
+                      + statement.excluded.successful_benchmarks,
+                      'max_depth': case((table.c.max_depth < statement.excluded.max_depth,
+                                         statement.excluded.max_depth), else_=table.c.max_depth)}))
+            continue
+        wd_class = session.get(WdClass, key)
+        if wd_class is None:
+            session.add(WdClass(backend=key[0], depth_class=key[1], width=key[2], benchmarks=benchmarks,
+                                successful_benchmarks=successful_benchmarks, max_depth=max_depth))
+        else:
+            # update in the database, as benchmarks of the same class may complete concurrently
+            wd_class.benchmarks = WdClass.benchmarks + benchmarks
+            wd_class.successful_benchmarks = WdClass.successful_benchmarks + successful_benchmarks
+            wd_class.max_depth = case((WdClass.max_depth < max_depth, max_depth), else_=WdClass.max_depth)
 
-    for i in range(0, len(benchmarks)):
-        if benchmarks[i].complete and benchmarks[i].result != "" and benchmarks[i].backend == qpu_name\
-                and benchmarks[i].clifford:
-            counts = json.loads(benchmarks[i].counts)
-            depth = benchmarks[i].transpiled_depth
-            # calculating the depth range of the benchmark
-            depth_range = int(np.floor(depth / 5))
-            if depth_range > max_class_depth:
-                depth_range = max_class_depth
-            width = benchmarks[i].transpiled_width - 1
-            wd_count[depth_range, width] += 1
-            first_value = list(counts.values())[0]
-            intersection = first_value/benchmarks[i].shots
-            # benchmark is successful if histogram intersection is at least min_histogram_intersection
-            if intersection >= min_histogram_intersection:
-                wd_success_count[depth_range, width] += 1
+
+def calc_wd(qpu_name):
+    """calculates the wd-value of a Quantum Computer based on the clifford data in your database"""
+    wd_classes = WdClass.query.filter_by(backend=qpu_name).all()
+    # the classes of the depths up to the max depth of all clifford circuits are checked, classes without benchmarks
+    # are considered as failed
+    max_depth = min(max([1] + [wd_class.max_depth for wd_class in wd_classes]), MAX_EXPECTED_DEPTH)
+    max_width = max([1] + [wd_class.width for wd_class in wd_classes])
+    wd_count = np.zeros([max_depth, max_width])  # counts benchmarks for each wd-class
+    wd_success_count = np.zeros([max_depth, max_width])  # counts successes of benchmarks for each wd-class
+    for wd_class in wd_classes:
+        wd_count[wd_class.depth_class, wd_class.width - 1] = wd_class.benchmarks
+        wd_success_count[wd_class.depth_class, wd_class.width - 1] = wd_class.successful_benchmarks
 
     width_array = np.array(range(max_width))+1
     depth_array = (np.array(range(max_depth))+1)*5
     wd_matrix = np.outer(depth_array, width_array)
 
-    # set every 0 in wd_count to 1 to avoid dividing by 0
-    wd_count[wd_count == 0] = 1
-    prob = wd_success_count/wd_count
-
     # wd class is successful if at least 2 out of 3 benchmarks are successful
-    successful = prob.copy()
-    successful[successful >= class_success_threshold] = 1
-    successful[successful < class_success_threshold] = 0
-
-    wd2 = wd_matrix.copy()
-    wd2[successful == 0] = 0
+    successful = wd_success_count / np.maximum(wd_count, 1) >= CLASS_SUCCESS_THRESHOLD
 
-    # setting all wd values to 0 if at least one class with the same or lower wd-value failed
-    for i in range(max_width):
-        for j in range(max_depth):
-            if wd_matrix[j, i] != wd2[j, i]:
-                wd2[wd2 >= wd_matrix[j, i]] = 0
+    # the wd-value is the highest one of a successful class, which is lower than the ones of all failed classes
+    min_failed = wd_matrix[~successful].min(initial=np.iinfo(wd_matrix.dtype).max)
+    wd = wd_matrix[successful & (wd_matrix < min_failed)].max(initial=0)
 
-    wd.append({'wd': str(wd2.max())})
-
-    return wd
+    return [{'wd': str(wd)}]
 
 # TODO: after Qiskit ignis is deprecated, the generation of Clifford gate circuits has to be adapted
 # def randomize(qpu_name, num_of_qubits, shots, min_depth_of_circuit, max_depth_of_circuit, num_of_circuits, clifford,
@@ -266,53 +281,59 @@ def calc_wd(qpu_name):
 #     return locations
 
 
-def analyse():
-    """Analyse all benchmarks available in the database by the four metrics correlation, chi-square-distance,
-    percentage error and histogram intersection. """
-    benchmarks = Benchmark.query.all()
-    list = []
-    for i in range(0, len(benchmarks), 2):
-        if (benchmarks[i].complete and benchmarks[i + 1].complete) and \
-                (benchmarks[i].benchmark_id == benchmarks[i + 1].benchmark_id) and \
-                (benchmarks[i].result != "" and benchmarks[i + 1].result != ""):
-            counts_sim = json.loads(benchmarks[i].counts)
-            counts_real = json.loads(benchmarks[i + 1].counts)
-            # prb_sim and prb_real will contain the probability distribution of the result
-            prb_sim = json.loads(benchmarks[i].counts)
-            prb_real = json.loads(benchmarks[i + 1].counts)
-            shots = benchmarks[i + 1].shots
-            for key in prb_sim.keys():
-                prb_sim[key] = prb_sim[key] / benchmarks[i].shots
-                if key not in prb_real.keys():
-                    prb_real[key] = 0
-            for key in prb_real:
-                prb_real[key] = prb_real[key] / benchmarks[i + 1].shots
-                if key not in prb_sim.keys():
-                    prb_sim[key] = 0
+def iter_benchmark_pairs(qpu_name=None, page_size=None):
+    """Yield pages of the pairs of the complete simulator and quantum computer benchmarks with the same benchmark id,
+    optionally only those of the given quantum computer, ordered by benchmark id"""
+    page_size = page_size or app.config['BENCHMARK_ANALYSIS_PAGE_SIZE']
+    sim = aliased(Benchmark)
+    real = aliased(Benchmark)
+    # the simulator can be benchmarked itself, then the second simulator benchmark is the one of the quantum computer
+    query = db.session.query(sim, real) \
+        .join(real, and_(real.benchmark_id == sim.benchmark_id, real.id != sim.id,
+                         or_(real.backend != SIMULATOR, real.id > sim.id))) \
+        .filter(sim.backend == SIMULATOR, sim.complete.is_(True), real.complete.is_(True),
+                sim.counts.isnot(None), real.counts.isnot(None)) \
+        .options(undefer(sim.counts), undefer(real.counts)) \
+        .order_by(sim.benchmark_id, sim.id, real.id)
+    if qpu_name is not None:
+        query = query.filter(real.backend == qpu_name)
+
+    last = None
+    while True:
+        page_query = query
+        if last is not None:
+            page_query = query.filter(or_(sim.benchmark_id > last[0],
+                                          and_(sim.benchmark_id == last[0], sim.id > last[1]),
+                                          and_(sim.benchmark_id == last[0], sim.id == last[1], real.id > last[2])))
+        pairs = page_query.limit(page_size).all()
+        if pairs:
+            yield pairs
+        if len(pairs) < page_size:
+            return
+        last = (pairs[-1][0].benchmark_id, pairs[-1][0].id, pairs[-1][1].id)
+
+
+def iter_analysis(qpu_name=None):
+    """Yield pages of the analysis of the benchmarks by the four metrics correlation, chi-square-distance, percentage
+    error and histogram intersection"""
+    for pairs in iter_benchmark_pairs(qpu_name):
+        # expected value and standard deviation are currently not used
+        # prb_sim = Counts(counts_sim.outcomes, counts_sim.values / benchmark_sim.shots, counts_sim.register_sizes)
+        # exp_value_sim = analysis.calc_expected_value(prb_sim)
+        # sd_sim = analysis.calc_standard_deviation(prb_sim, exp_value_sim)
 
-            # create a list of the analysis of all benchmarks as response
-            # expected value and standard deviation are currently not used
+        # compare the histograms of all pairs of the page at once
+        comparisons = analysis.compare_histogram_pairs(
+            [(benchmark_sim.counts, benchmark_real.counts) for benchmark_sim, benchmark_real in pairs],
+            [benchmark_real.shots for _, benchmark_real in pairs])
+        yield [{'benchmark-' + str(benchmark_sim.benchmark_id): {
+            'benchmark-location': '/qiskit-service/api/v1.0/benchmarks/' + str(benchmark_sim.benchmark_id),
+            'counts-sim': benchmark_sim.counts.to_dict(),
+            'counts-real': benchmark_real.counts.to_dict(),
+            **comparison}} for (benchmark_sim, benchmark_real), comparison in zip(pairs, comparisons)]
 
-            # exp_value_sim = analysis.calc_expected_value(prb_sim)
-            # exp_value_real = analysis.calc_expected_value(prb_real)
-            # sd_sim = analysis.calc_standard_deviation(prb_sim, exp_value_sim)
-            # sd_real = analysis.calc_standard_deviation(prb_real, exp_value_real)
 
-            perc_error = analysis.calc_percentage_error(counts_sim, counts_real)
-            correlation = analysis.calc_correlation(counts_sim.copy(), counts_real.copy(), shots)
-            chi_square = analysis.calc_chi_square_distance(counts_sim.copy(), counts_real.copy())
-            intersection = analysis.calc_intersection(counts_sim.copy(), counts_real.copy(), shots)
-            list.append({'benchmark-' + str(benchmarks[i].benchmark_id): {
-                'benchmark-location': '/qiskit-service/api/v1.0/benchmarks/' + str(benchmarks[i].benchmark_id),
-                'counts-sim': counts_sim,
-                # "Expected Value Sim": exp_value_sim,
-                # "Standard Deviation Sim": sd_sim,
-                'counts-real': counts_real,
-                # "Expected Value Real": exp_value_real,
-                # "Standard Deviation Real": sd_real,
-                'percentage-error': perc_error,
-                'chi-square': chi_square,
-                'correlation': correlation,
-                'histogram-intersection': intersection}
-            })
-    return list
+def analyse(qpu_name=None):
+    """Analyse all benchmarks available in the database, or only those of the given quantum computer, by the four
+    metrics correlation, chi-square-distance, percentage error and histogram intersection. """
+    return [benchmark_analysis for page in iter_analysis(qpu_name) for benchmark_analysis in page]
@@ -0,0 +1,134 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import threading
+import time
+from collections import OrderedDict
+
+from redis.exceptions import RedisError
+
+from app import app
+
+# seconds the Redis tier is skipped after a connection problem, so an unavailable Redis does not slow down requests
+REDIS_RETRY_INTERVAL = 30
+
+
+class LRUCache:
+    """Thread-safe in-process cache with size-bounded LRU eviction and an optional time to live"""
+
+    def __init__(self, maxsize=128, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return default if entry is None else entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredCache:
+    """Bytes cache with an in-process LRU tier in front of a Redis tier shared by all gunicorn and rq workers.
+
+    Redis errors are logged and only disable the shared tier for a short time, the local tier keeps working."""
+
+    def __init__(self, namespace, maxsize=128, ttl=None, redis=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.local = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.hits = 0
+        self.misses = 0
+        self._redis = redis
+        self._redis_disabled_until = 0
+
+    @property
+    def redis(self):
+        return self._redis if self._redis is not None else app.redis
+
+    def _redis_key(self, key):
+        return f"qiskit-service:{self.namespace}:{key}"
+
+    def _redis_available(self):
+        return time.monotonic() >= self._redis_disabled_until
+
+    def _redis_failed(self, e):
+        app.logger.warning(f"Redis tier of the {self.namespace} cache unavailable: {str(e)}")
+        self._redis_disabled_until = time.monotonic() + REDIS_RETRY_INTERVAL
+
+    def get(self, key):
+        value = self.local.get(key)
+        if value is None and self._redis_available():
+            try:
+                value = self.redis.get(self._redis_key(key))
+            except RedisError as e:
+                self._redis_failed(e)
+            if value is not None:
+                self.local.set(key, value)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value):
+        self.local.set(key, value)
+        if self._redis_available():
+            try:
+                self.redis.set(self._redis_key(key), value, ex=self.ttl)
+            except RedisError as e:
+                self._redis_failed(e)
+
+    def delete(self, key):
+        self.local.pop(key)
+        if self._redis_available():
+            try:
+                self.redis.delete(self._redis_key(key))
+            except RedisError as e:
+                self._redis_failed(e)
@@ -0,0 +1,138 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import numpy as np
+
+from app import app, calibration_history
+from app.cache import LRUCache
+
+# snapshots of the current calibrations of the backends, keyed by backend name and calibration date
+snapshots = LRUCache(maxsize=app.config['CALIBRATION_SNAPSHOT_CACHE_SIZE'])
+
+# columns of the qubit and gate properties in the arrays of the snapshots
+QUBIT_COLUMNS = {'T1': 0, 'T2': 1, 'readout_error': 2}
+GATE_COLUMNS = {'gate_error': 0, 'gate_length': 1}
+
+
+def get_columns(nduv_lists, columns):
+    """Return an array with a row for each list of Nduv properties and the values of the given columns, NaN if
+    missing"""
+    rows = [[np.nan] * len(columns) for _ in nduv_lists]
+    for row, nduvs in zip(rows, nduv_lists):
+        for nduv in nduvs:
+            column = columns.get(nduv.name)
+            if column is not None:
+                row[column] = nduv.value
+    return np.array(rows, dtype=np.float64).reshape(-1, len(columns))
+
+
+class CalibrationSnapshot:
+    """Calibration data of a backend as columnar arrays. The qubit arrays hold T1, T2 and readout error of each qubit,
+    the gate arrays name, qubits, error, length and arity of each gate. Missing values are NaN."""
+
+    def __init__(self, backend_name, last_update_date, t1, t2, readout_error, gate_names, gate_qubits, gate_error,
+                 gate_length):
+        self.backend_name = backend_name
+        self.last_update_date = last_update_date
+        self.t1 = t1
+        self.t2 = t2
+        self.readout_error = readout_error
+        self.gate_names = gate_names
+        self.gate_qubits = gate_qubits
+        self.gate_error = gate_error
+        self.gate_length = gate_length
+        self.gate_arity = np.array([len(qubits) for qubits in gate_qubits], dtype=np.int64)
+
+    @classmethod
+    def from_properties(cls, properties):
+        """Convert BackendProperties by a single pass over its qubits and gates"""
+        qubits = get_columns(properties.qubits, QUBIT_COLUMNS)
+        gates = get_columns([gate.parameters for gate in properties.gates], GATE_COLUMNS)
+        return cls(properties.backend_name, properties.last_update_date, qubits[:, 0], qubits[:, 1], qubits[:, 2],
+                   np.array([gate.gate for gate in properties.gates], dtype=object),
+                   [tuple(gate.qubits) for gate in properties.gates], gates[:, 0], gates[:, 1])
+
+    @classmethod
+    def from_backend(cls, backend):
+        """Get the snapshot of the current calibration of the backend, converted once per calibration"""
+        properties = backend.properties()
+        key = f"{properties.backend_name}:{properties.last_update_date.isoformat()}"
+        snapshot = snapshots.get(key)
+        if snapshot is None:
+            snapshot = cls.from_properties(properties)
+            snapshots.set(key, snapshot)
+            calibration_history.record(properties)
+        return snapshot
+
+    @property
+    def number_of_qubits(self):
+        return len(self.t1)
+
+    def _qubit_average(self, values):
+        # qubits without the property count as 0, like in the averages shown so far
+        return float(np.nansum(values) / len(values)) if len(values) else 0
+
+    @property
+    def avg_t1_time(self):
+        return self._qubit_average(self.t1)
+
+    @property
+    def avg_t2_time(self):
+        return self._qubit_average(self.t2)
+
+    @property
+    def avg_readout_error(self):
+        return self._qubit_average(self.readout_error)
+
+    def gate_mask(self, arity):
+        """Select the gates acting on the given number of qubits, ignoring reset gates as they have high gate lengths
+        and are not common at the moment"""
+        return (self.gate_arity == arity) & (self.gate_names != 'reset')
+
+    def _gate_average(self, values, arity):
+        mask = self.gate_mask(arity)
+        # gates without the parameter count as 0, like in the averages shown so far
+        return float(np.nansum(values[mask]) / np.count_nonzero(mask)) if mask.any() else 0
+
+    @property
+    def avg_single_qubit_gate_error(self):
+        return self._gate_average(self.gate_error, 1)
+
+    @property
+    def avg_single_qubit_gate_time(self):
+        return self._gate_average(self.gate_length, 1)
+
+    @property
+    def avg_multi_qubit_gate_error(self):
+        return self._gate_average(self.gate_error, 2)
+
+    @property
+    def avg_multi_qubit_gate_time(self):
+        return self._gate_average(self.gate_length, 2)
+
+    @property
+    def max_gate_time(self):
+        lengths = self.gate_length[self.gate_mask(1) | self.gate_mask(2)]
+        return float(np.nanmax(lengths, initial=0))
+
+    def gate_errors(self, name):
+        """Return a dict of the qubits of the gates with the given name to their errors, e.g., for noise-aware layouts
+        or fidelity estimates"""
+        indices = np.flatnonzero(self.gate_names == name)
+        return {self.gate_qubits[i]: error for i, error in zip(indices, self.gate_error[indices].tolist())}
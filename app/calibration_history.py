@@ -0,0 +1,114 @@
+# ******************************************************************************
+#  Copyright (c) 2020 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""History of the calibrations of the backends.
+
+The properties of a backend are stored whenever a new calibration is seen, e.g., when building the QPU catalog or
+getting the backend for an execution. Calibrations with identical properties are stored once, so the properties as of
+any time can be answered locally."""
+
+import datetime
+import json
+from hashlib import sha256
+
+from qiskit.providers.models import BackendProperties
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import app, db
+from app.cache import LRUCache
+from app.calibration_model import Calibration
+
+# calibrations this process has already stored or found in the history
+recorded = LRUCache(maxsize=app.config['CALIBRATION_HISTORY_RECORDED_SIZE'])
+
+
+def to_utc(date_time):
+    """Convert to naive UTC, like the dates stored in the database"""
+    if date_time.tzinfo:
+        date_time = date_time.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return date_time
+
+
+def serialize(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def record(properties):
+    """Store the properties unless their calibration or the preceding one with identical properties is stored.
+    Failures are only logged, as the history must not break the requests that see the properties."""
+    try:
+        store(properties)
+    except Exception as e:
+        app.logger.warning(f"Could not store the calibration of {properties.backend_name}: {str(e)}")
+
+
+def store(properties):
+    last_update_date = to_utc(properties.last_update_date)
+    key = f"{properties.backend_name}:{last_update_date.isoformat()}"
+    if recorded.get(key):
+        return
+
+    properties_dict = properties.to_dict()
+    properties_json = json.dumps(properties_dict, default=serialize)
+    properties_dict.pop('last_update_date', None)
+    properties_hash = sha256(json.dumps(properties_dict, default=serialize, sort_keys=True).encode()).hexdigest()
+
+    # use a session of its own, so the session of the request or task is neither committed nor rolled back
+    with Session(db.engine) as session:
+        backend_calibrations = session.query(Calibration).filter(Calibration.backend == properties.backend_name)
+        stored = backend_calibrations.filter(Calibration.last_update_date == last_update_date).first()
+        preceding = backend_calibrations.filter(Calibration.last_update_date < last_update_date) \
+            .order_by(Calibration.last_update_date.desc()).first()
+        if stored is None and (preceding is None or preceding.properties_hash != properties_hash):
+            session.add(Calibration(backend=properties.backend_name, last_update_date=last_update_date,
+                                    properties=properties_json, properties_hash=properties_hash))
+            try:
+                session.commit()
+            except IntegrityError:
+                # stored concurrently by another process
+                session.rollback()
+    recorded.set(key, True)
+
+
+def record_backend(backend):
+    """Store the current calibration of the backend, if it has properties"""
+    try:
+        properties = backend.properties() if hasattr(backend, 'properties') else None
+    except Exception as e:
+        app.logger.warning(f"Could not get the calibration of {backend}: {str(e)}")
+        return
+    if properties is not None and getattr(properties, 'last_update_date', None):
+        record(properties)
+
+
+def get_calibration(backend_name, at=None):
+    """Get the calibration of the backend that was current at the given naive UTC time, the latest if None"""
+    query = Calibration.query.filter(Calibration.backend == backend_name)
+    if at is not None:
+        query = query.filter(Calibration.last_update_date <= at)
+    return query.order_by(Calibration.last_update_date.desc()).first()
+
+
+def get_properties(backend_name, at=None):
+    """Get the BackendProperties of the backend as of the given naive UTC time, None if no calibration is stored"""
+    calibration = get_calibration(backend_name, at)
+    return BackendProperties.from_dict(json.loads(calibration.properties)) if calibration is not None else None
@@ -0,0 +1,35 @@
+# ******************************************************************************
+#  Copyright (c) 2020 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+from app import db
+from app.db_types import CompressedText
+
+
+class Calibration(db.Model):
+    """Properties of a backend as of the calibration at last_update_date (UTC)"""
+    __table_args__ = (db.UniqueConstraint('backend', 'last_update_date'),)
+
+    id = db.Column(db.Integer, primary_key=True)
+    backend = db.Column(db.String(1200), nullable=False)
+    last_update_date = db.Column(db.DateTime, nullable=False)
+    # BackendProperties.to_dict() as JSON and its hash without the last update date
+    properties = db.deferred(db.Column(CompressedText, nullable=False))
+    properties_hash = db.Column(db.String(64), nullable=False)
+
+    def __repr__(self):
+        return 'Calibration {} {}'.format(self.backend, self.last_update_date)
@@ -17,9 +17,16 @@
 #  limitations under the License.
 # ******************************************************************************
 
-from qiskit.converters import circuit_to_dag, dag_to_circuit
+from qiskit.circuit import CircuitInstruction, Gate, Instruction
+from qiskit.converters import circuit_to_dag
 from qiskit.transpiler.passes import RemoveFinalMeasurements
 
+from app.cache import LRUCache
+
+# expansions of standard library gates only depend on their name, parameters, and number of qubits and clbits, thus,
+# they can be shared between all circuits analyzed by a worker
+_standard_gate_expansions = LRUCache(maxsize=4096)
+
 
 def get_width_of_circuit(circuit):
     """Get number of qubits required by the circuit"""
@@ -31,37 +38,215 @@ def get_width_of_circuit(circuit):
     return len(active_qubits)
 
 
-def get_multi_qubit_gate_depth(transpiled_circuit):
-    """Get multi qubit gate depth by constructing a set of all occurring nonlocal gates
-    and iterating over all gates of the transpiled circuit checking if in set or not"""
+def get_multi_qubit_gate_depth(circuit):
+    """Get multi qubit gate depth, i.e., the depth of the circuit when only nonlocal gates are regarded. Barriers and
+    other directives do not add levels or synchronize the bits, as circuit.depth() ignores them. Keeps one depth
+    counter per bit, thus, runs in O(gates) without modifying or copying the circuit"""
+    bit_indices = {bit: i for i, bit in enumerate(circuit.qubits + circuit.clbits)}
+    levels = [0] * len(bit_indices)
+    for instruction in circuit.data:
+        operation = instruction.operation
+        if len(instruction.qubits) < 2 or getattr(operation, '_directive', False):
+            continue
+        bits = [bit_indices[bit] for bit in instruction.qubits + instruction.clbits]
+        bits.extend(_get_condition_bits(operation, bit_indices, bits))
+        level = max(levels[bit] for bit in bits) + 1
+        for bit in bits:
+            levels[bit] = level
+    return max(levels, default=0)
 
-    # construct set of names of occurring multi-qubit gates, i.e. nonlocal gates
-    transpiled_dag = circuit_to_dag(transpiled_circuit)
-    set_of_all_nonlocal_gates = set()
-    for gate in transpiled_dag.multi_qubit_ops():
-        set_of_all_nonlocal_gates.add(gate.name)
-    for gate in transpiled_dag.two_qubit_ops():
-        set_of_all_nonlocal_gates.add(gate.name)
-
-    # remove all single qubit gates
-    # get all gates and check if they are single qubit gates
-    circuit_for_getting_multi_qubit_gate_depth = transpiled_circuit
-    i = 0
-    for gate in list(circuit_for_getting_multi_qubit_gate_depth.data):
-        gate_name = gate[0].name
-        if gate_name not in set_of_all_nonlocal_gates:
-            circuit_for_getting_multi_qubit_gate_depth.data.pop(i)
+
+def _get_condition_bits(operation, clbit_indices, bits):
+    """Get the indices of the classical bits an operation is conditioned on that are not already in bits"""
+    condition = getattr(operation, 'condition', None)
+    if not condition:
+        return []
+    condition_bits = [condition[0]] if condition[0] in clbit_indices else condition[0]
+    return [clbit_indices[clbit] for clbit in condition_bits if clbit_indices[clbit] not in bits]
+
+
+def _get_expansion_key(operation):
+    """Get the key under which the expansion of an operation is memoized or None if it can not be memoized"""
+    key = (operation.name, tuple(operation.params), operation.num_qubits, operation.num_clbits)
+    if type(operation) in (Gate, Instruction):
+        # custom gates, e.g., created by to_gate(), can share a name while having different definitions
+        key = key + (id(operation.definition),)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _expand(operation, expansions):
+    """Expand an operation with a definition into operations without definition. Returns a tuple of
+    (qubit indices, clbit indices, operation) relative to the operation's bits and the accumulated global phase"""
+    key = _get_expansion_key(operation)
+    is_standard_gate = type(operation).__module__.startswith('qiskit.circuit.library.standard_gates')
+    if key is not None:
+        expansion = _standard_gate_expansions.get(key) if is_standard_gate else expansions.get(key)
+        if expansion is not None:
+            return expansion
+
+    definition = operation.definition
+    qubit_indices = {qubit: i for i, qubit in enumerate(definition.qubits)}
+    clbit_indices = {clbit: i for i, clbit in enumerate(definition.clbits)}
+    instructions = []
+    global_phase = definition.global_phase
+    for instruction in definition.data:
+        qubits = tuple(qubit_indices[qubit] for qubit in instruction.qubits)
+        clbits = tuple(clbit_indices[clbit] for clbit in instruction.clbits)
+        if getattr(instruction.operation, 'definition', None) is None:
+            instructions.append((qubits, clbits, instruction.operation))
         else:
-            # i is only incremented if the regarded gate (i.e. a nonlocal gate) is not removed,
-            # thus, the list size did not changed and go ahead to the next index
-            i = i + 1
+            inner_instructions, inner_global_phase = _expand(instruction.operation, expansions)
+            global_phase += inner_global_phase
+            instructions.extend((tuple(qubits[i] for i in inner_qubits), tuple(clbits[i] for i in inner_clbits),
+                                 inner_operation) for inner_qubits, inner_clbits, inner_operation in inner_instructions)
+
+    expansion = (tuple(instructions), global_phase)
+    if key is not None:
+        if is_standard_gate:
+            _standard_gate_expansions.set(key, expansion)
+        else:
+            expansions[key] = expansion
+    return expansion
+
 
-    transpiled_circuit = dag_to_circuit(transpiled_dag)
+def unroll_instructions(circuit, global_phase=None):
+    """Unroll every composite gate of the circuit to operations without definition in a single traversal.
+    Yields (qubit indices, clbit indices, operation) tuples, clbit indices start after the qubit indices.
+    If a list is given as global_phase, the global phase of the unrolled circuit is appended to it after the
+    traversal."""
+    qubit_indices = {qubit: i for i, qubit in enumerate(circuit.qubits)}
+    clbit_indices = {clbit: i + len(qubit_indices) for i, clbit in enumerate(circuit.clbits)}
+    # expansions of custom gates are only valid within the circuit they are defined in
+    expansions = {}
+    phase = circuit.global_phase
+    for instruction in circuit.data:
+        operation = instruction.operation
+        qubits = [qubit_indices[qubit] for qubit in instruction.qubits]
+        clbits = [clbit_indices[clbit] for clbit in instruction.clbits]
+        if getattr(operation, 'definition', None) is None:
+            yield qubits, clbits, operation
+            continue
+        inner_instructions, inner_global_phase = _expand(operation, expansions)
+        phase += inner_global_phase
+        for inner_qubits, inner_clbits, inner_operation in inner_instructions:
+            if getattr(operation, 'condition', None):
+                inner_operation = inner_operation.copy()
+                inner_operation.condition = operation.condition
+            yield [qubits[i] for i in inner_qubits], [clbits[i] for i in inner_clbits], inner_operation
+    if global_phase is not None:
+        global_phase.append(phase)
 
-    return circuit_for_getting_multi_qubit_gate_depth.depth(), transpiled_circuit
+
+def unroll_circuit(circuit):
+    """Return a copy of the circuit with every composite gate unrolled to operations without definition"""
+    unrolled_circuit = circuit.copy_empty_like()
+    bits = circuit.qubits + circuit.clbits
+    global_phase = []
+    for qubits, clbits, operation in unroll_instructions(circuit, global_phase):
+        unrolled_circuit._append(CircuitInstruction(operation, [bits[qubit] for qubit in qubits],
+                                                    [bits[clbit] for clbit in clbits]))
+    unrolled_circuit.global_phase = global_phase[0]
+    return unrolled_circuit
 
 
 def get_number_of_measurement_operations(transpiled_circuit):
     """ Get number of measurement operations in the transpiled circuit """
     transpiled_dag = circuit_to_dag(transpiled_circuit)
     return transpiled_dag.count_ops().get('measure', 0)
+
+
+class CircuitMetrics:
+    """Metrics of a circuit computed by a single walk over its instructions"""
+
+    def __init__(self, width, depth, total_number_of_operations, number_of_single_qubit_gates,
+                 number_of_multi_qubit_gates, number_of_measurement_operations, multi_qubit_gate_depth):
+        self.width = width
+        self.depth = depth
+        self.total_number_of_operations = total_number_of_operations
+        self.number_of_single_qubit_gates = number_of_single_qubit_gates
+        self.number_of_multi_qubit_gates = number_of_multi_qubit_gates
+        self.number_of_measurement_operations = number_of_measurement_operations
+        self.multi_qubit_gate_depth = multi_qubit_gate_depth
+
+    @classmethod
+    def from_circuit(cls, circuit, unroll=False):
+        """Compute all metrics of the circuit. Results equal those of get_width_of_circuit, depth(), size(),
+        num_nonlocal_gates(), get_number_of_measurement_operations and get_multi_qubit_gate_depth.
+        If unroll is set, the metrics are computed for the circuit with all composite gates unrolled, without
+        building the unrolled circuit."""
+        qubit_indices = {qubit: i for i, qubit in enumerate(circuit.qubits)}
+        clbit_indices = {clbit: i + len(qubit_indices) for i, clbit in enumerate(circuit.clbits)}
+        if unroll:
+            instructions = unroll_instructions(circuit)
+        else:
+            instructions = (([qubit_indices[qubit] for qubit in instruction.qubits],
+                             [clbit_indices[clbit] for clbit in instruction.clbits],
+                             instruction.operation) for instruction in circuit.data)
+        return cls.from_instructions(instructions, circuit.num_qubits, clbit_indices)
+
+    @classmethod
+    def from_instructions(cls, instructions, num_qubits, clbit_indices):
+        """Compute all metrics from a stream of (qubit indices, clbit indices, operation) tuples. Clbit indices
+        start after the qubit indices, clbit_indices maps the clbits of the circuit to these indices and is used to
+        resolve classical conditions."""
+        num_bits = num_qubits + len(clbit_indices)
+        # depth of every qubit and clbit, once for all operations and once for multi-qubit gates only
+        levels = [0] * num_bits
+        multi_qubit_levels = [0] * num_bits
+        # index of the last operation on each qubit that is not removed as final measurement or barrier
+        last_non_final = [-1] * num_qubits
+        barriers = []
+        size = 0
+        number_of_multi_qubit_gates = 0
+        number_of_measurement_operations = 0
+
+        for index, (qubits, clbits, operation) in enumerate(instructions):
+            bits = [*qubits, *clbits]
+            bits.extend(_get_condition_bits(operation, clbit_indices, bits))
+            name = operation.name
+
+            if getattr(operation, '_directive', False):
+                # directives such as barriers are not counted but synchronize the bits they act on
+                level = max((levels[bit] for bit in bits), default=0)
+                if name == 'barrier':
+                    barriers.append((index, qubits))
+            else:
+                level = max((levels[bit] for bit in bits), default=0) + 1
+                size += 1
+                if name == 'measure':
+                    number_of_measurement_operations += 1
+                else:
+                    for qubit in qubits:
+                        last_non_final[qubit] = index
+                if len(qubits) > 1:
+                    number_of_multi_qubit_gates += 1
+                    multi_qubit_level = max(multi_qubit_levels[bit] for bit in bits) + 1
+                    for bit in bits:
+                        multi_qubit_levels[bit] = multi_qubit_level
+            for bit in bits:
+                levels[bit] = level
+
+        # a barrier is final if it is only followed by final measurements and barriers on all of its qubits
+        for index, qubits in reversed(barriers):
+            if any(last_non_final[qubit] > index for qubit in qubits):
+                for qubit in qubits:
+                    last_non_final[qubit] = max(last_non_final[qubit], index)
+
+        return cls(width=sum(1 for index in last_non_final if index >= 0), depth=max(levels, default=0),
+                   total_number_of_operations=size,
+                   number_of_single_qubit_gates=size - number_of_multi_qubit_gates - number_of_measurement_operations,
+                   number_of_multi_qubit_gates=number_of_multi_qubit_gates,
+                   number_of_measurement_operations=number_of_measurement_operations,
+                   multi_qubit_gate_depth=max(multi_qubit_levels, default=0))
+
+    def to_json(self, prefix=''):
+        """Return the metrics using the keys of the API responses, e.g., prefix='original-' for original circuits"""
+        return {prefix + 'depth': self.depth, prefix + 'multi-qubit-gate-depth': self.multi_qubit_gate_depth,
+                prefix + 'width': self.width, prefix + 'total-number-of-operations': self.total_number_of_operations,
+                prefix + 'number-of-single-qubit-gates': self.number_of_single_qubit_gates,
+                prefix + 'number-of-multi-qubit-gates': self.number_of_multi_qubit_gates,
+                prefix + 'number-of-measurement-operations': self.number_of_measurement_operations}
@@ -28,6 +28,92 @@ class Config(object):
 
     REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:5040'
 
+    # number of transpiled circuits kept in memory by each worker and seconds they are kept in the Redis tier
+    TRANSPILE_CACHE_SIZE = int(os.environ.get('TRANSPILE_CACHE_SIZE') or 256)
+    TRANSPILE_CACHE_TTL = int(os.environ.get('TRANSPILE_CACHE_TTL') or 86400)
+
+    # worker processes executing user implementation code (0 executes it in the calling process without limits), tasks
+    # after which a worker is replaced, and the CPU seconds, wall-clock seconds, and megabytes of memory per execution
+    SANDBOX_POOL_SIZE = int(os.environ.get('SANDBOX_POOL_SIZE') or 2)
+    SANDBOX_MAX_TASKS_PER_CHILD = int(os.environ.get('SANDBOX_MAX_TASKS_PER_CHILD') or 1)
+    SANDBOX_CPU_TIME_LIMIT = int(os.environ.get('SANDBOX_CPU_TIME_LIMIT') or 300)
+    SANDBOX_TIMEOUT = int(os.environ.get('SANDBOX_TIMEOUT') or 450)
+    SANDBOX_MEMORY_LIMIT = int(os.environ.get('SANDBOX_MEMORY_LIMIT') or 4096)
+
+    # number of generated circuits kept in memory by each worker and seconds they are kept in the Redis tier
+    GENERATION_CACHE_SIZE = int(os.environ.get('GENERATION_CACHE_SIZE') or 128)
+    GENERATION_CACHE_TTL = int(os.environ.get('GENERATION_CACHE_TTL') or 3600)
+
+    # worker processes transpiling a circuit for several QPUs in parallel (0 transpiles in the calling process)
+    TRANSPILE_POOL_SIZE = int(os.environ.get('TRANSPILE_POOL_SIZE') or 4)
+
+    # directory of the download cache shared by all workers, seconds until a download times out, and pooled connections
+    DOWNLOAD_CACHE_DIR = os.environ.get('DOWNLOAD_CACHE_DIR') or os.path.join(basedir, 'download-cache')
+    DOWNLOAD_TIMEOUT = float(os.environ.get('DOWNLOAD_TIMEOUT') or 30)
+    DOWNLOAD_POOL_SIZE = int(os.environ.get('DOWNLOAD_POOL_SIZE') or 8)
+
+    # number of authenticated provider accounts kept per process and seconds they, and their backend handles, are reused
+    PROVIDER_SESSION_CACHE_SIZE = int(os.environ.get('PROVIDER_SESSION_CACHE_SIZE') or 64)
+    PROVIDER_SESSION_TTL = int(os.environ.get('PROVIDER_SESSION_TTL') or 3600)
+    PROVIDER_BACKEND_TTL = int(os.environ.get('PROVIDER_BACKEND_TTL') or 300)
+
+    # number of deserialized noise models kept by each worker and seconds they are kept in the Redis tier
+    NOISE_MODEL_CACHE_SIZE = int(os.environ.get('NOISE_MODEL_CACHE_SIZE') or 16)
+    NOISE_MODEL_CACHE_TTL = int(os.environ.get('NOISE_MODEL_CACHE_TTL') or 86400)
+
+    # number of calibration snapshots of backends kept by each worker
+    CALIBRATION_SNAPSHOT_CACHE_SIZE = int(os.environ.get('CALIBRATION_SNAPSHOT_CACHE_SIZE') or 64)
+    # number of calibrations each worker remembers as stored in the calibration history
+    CALIBRATION_HISTORY_RECORDED_SIZE = int(os.environ.get('CALIBRATION_HISTORY_RECORDED_SIZE') or 1024)
+
+    # number of deserialized calibration matrices kept by each worker, seconds they are kept in the Redis tier, and
+    # number of qubits up to which complete calibration matrices, needing 2^n calibration circuits, are calculated
+    CALIBRATION_MATRIX_CACHE_SIZE = int(os.environ.get('CALIBRATION_MATRIX_CACHE_SIZE') or 16)
+    CALIBRATION_MATRIX_CACHE_TTL = int(os.environ.get('CALIBRATION_MATRIX_CACHE_TTL') or 86400)
+    CALIBRATION_MATRIX_MAX_QUBITS = int(os.environ.get('CALIBRATION_MATRIX_MAX_QUBITS') or 10)
+    # maximum number of differing bits of the observed outcomes coupled by the readout-error mitigation
+    READOUT_MITIGATION_DISTANCE = int(os.environ.get('READOUT_MITIGATION_DISTANCE') or 3)
+
+    # seconds between status requests while waiting for a provider job, growing by the backoff factor up to the maximum
+    JOB_POLL_INITIAL_INTERVAL = float(os.environ.get('JOB_POLL_INITIAL_INTERVAL') or 1)
+    JOB_POLL_MAX_INTERVAL = float(os.environ.get('JOB_POLL_MAX_INTERVAL') or 60)
+    JOB_POLL_BACKOFF_FACTOR = float(os.environ.get('JOB_POLL_BACKOFF_FACTOR') or 1.5)
+    JOB_POLL_JITTER = float(os.environ.get('JOB_POLL_JITTER') or 0.1)
+
+    # hand jobs on remote QPUs over to the job watcher (python -m app.job_watcher) instead of blocking an rq worker
+    JOB_WATCHER_ENABLED = (os.environ.get('JOB_WATCHER_ENABLED') or 'false').lower() == 'true'
+    # seconds between scans for newly submitted jobs and number of threads for blocking provider requests
+    JOB_WATCHER_SCAN_INTERVAL = float(os.environ.get('JOB_WATCHER_SCAN_INTERVAL') or 2)
+    JOB_WATCHER_THREADS = int(os.environ.get('JOB_WATCHER_THREADS') or 32)
+    # seconds after which the record of a watched job expires, e.g., if the watcher is not running
+    JOB_WATCHER_RECORD_TTL = int(os.environ.get('JOB_WATCHER_RECORD_TTL') or 604800)
+    # Fernet key encrypting the credentials handed over via Redis, jobs are only handed over to the job watcher if set
+    CREDENTIALS_ENCRYPTION_KEY = os.environ.get('CREDENTIALS_ENCRYPTION_KEY')
+
+    # maximum seconds a request for a result waits for its completion, seconds between keep-alive comments and until
+    # the end of a result event stream, and seconds between database checks while waiting
+    RESULT_WAIT_MAX_TIMEOUT = float(os.environ.get('RESULT_WAIT_MAX_TIMEOUT') or 60)
+    RESULT_EVENTS_KEEP_ALIVE_INTERVAL = float(os.environ.get('RESULT_EVENTS_KEEP_ALIVE_INTERVAL') or 15)
+    RESULT_EVENTS_TIMEOUT = float(os.environ.get('RESULT_EVENTS_TIMEOUT') or 600)
+    RESULT_WAIT_POLL_INTERVAL = float(os.environ.get('RESULT_WAIT_POLL_INTERVAL') or 5)
+
+    # default and maximum number of results returned per page by a result query
+    RESULT_QUERY_PAGE_SIZE = int(os.environ.get('RESULT_QUERY_PAGE_SIZE') or 1000)
+    RESULT_QUERY_MAX_PAGE_SIZE = int(os.environ.get('RESULT_QUERY_MAX_PAGE_SIZE') or 5000)
+
+    # number of benchmark pairs loaded and analysed at once when analysing the benchmarks
+    BENCHMARK_ANALYSIS_PAGE_SIZE = int(os.environ.get('BENCHMARK_ANALYSIS_PAGE_SIZE') or 500)
+
+    # default maximum age in seconds of the queue sizes of the QPU catalog served by /providers/<provider_id>/qpus,
+    # seconds after which the refresher (python -m app.qpu_catalog) updates the queue sizes and calibrations, seconds
+    # after the last request of an account until its catalog is no longer refreshed, and number of threads for
+    # requests to the provider
+    QPU_CATALOG_MAX_AGE = float(os.environ.get('QPU_CATALOG_MAX_AGE') or 60)
+    QPU_CATALOG_QUEUE_INTERVAL = float(os.environ.get('QPU_CATALOG_QUEUE_INTERVAL') or 30)
+    QPU_CATALOG_CALIBRATION_INTERVAL = float(os.environ.get('QPU_CATALOG_CALIBRATION_INTERVAL') or 900)
+    QPU_CATALOG_IDLE_TIMEOUT = float(os.environ.get('QPU_CATALOG_IDLE_TIMEOUT') or 86400)
+    QPU_CATALOG_THREADS = int(os.environ.get('QPU_CATALOG_THREADS') or 16)
+
     API_TITLE = "qiskit-service"
     API_VERSION = "0.1"
     OPENAPI_VERSION = "3.0.2"
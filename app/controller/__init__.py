@@ -1,8 +1,8 @@
 from app.controller import transpile, execute, calculation, benchmark, analysis, analysis_original_circuit, wd_calc, \
-    provider, result, generated_circuit, generate_circuit
+    provider, result, generated_circuit, generate_circuit, transpilation, calibration
 
 MODULES = (transpile, execute, calculation, benchmark, analysis, analysis_original_circuit, wd_calc, provider, result,
-           generated_circuit, generate_circuit)
+           generated_circuit, generate_circuit, transpilation, calibration)
 
 
 def register_blueprints(api):
@@ -13,7 +13,8 @@ blp = Blueprint(
     "Calibrate Matrix Calculation",
     __name__,
     description="Send QPU information, optional shots, and your IBM Quantum Experience token to the API to calculate "
-                "the calibration matrix for the given QPU.",
+                "the calibration matrix for the given QPU. Optionally, only the given qubits are calibrated, and with "
+                "tensored, one 2x2 matrix per qubit is calculated instead of one matrix over all states of the qubits.",
 )
 
 
@@ -23,7 +24,9 @@ blp = Blueprint(
     example={
         "qpu-name": "ibmq_qasm_simulator",
         "shots": 1024,
-        "token": "YOUR-IBMQ-TOKEN"
+        "token": "YOUR-IBMQ-TOKEN",
+        "qubits": [0, 1, 2],
+        "tensored": False
     }
 )
 @blp.response(200, CalcCalibrationMatrixResponseSchema)
@@ -0,0 +1 @@
+from app.controller.calibration.calibration_controller import blp
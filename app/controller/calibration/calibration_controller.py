@@ -0,0 +1,14 @@
+from flask_smorest import Blueprint
+
+from app.model.circuit_response import (CalibrationResponseSchema)
+
+blp = Blueprint("Calibrations", __name__,
+                description="Request the stored properties of a QPU as of a given time, e.g., "
+                            "?at=2024-06-20T08:00:00Z, or the latest stored properties.", )
+
+
+@blp.route("/qiskit-service/api/v1.0/calibrations/<backend_name>", methods=["GET"])
+@blp.response(200, CalibrationResponseSchema)
+def encoding(json):
+    if json:
+        return
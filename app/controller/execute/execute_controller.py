@@ -12,7 +12,12 @@ blp = Blueprint("Execute", __name__,
 @blp.route("/qiskit-service/api/v1.0/execute", methods=["POST"])
 @blp.doc(description="*Note*: \"token\" should either be in \"input-params\" or extra. Both variants are combined "
                      "here for illustration purposes. *Note*: \"url\", \"hub\", \"group\", \"project\" are optional "
-                     "such that otherwise the standard values are used.")
+                     "such that otherwise the standard values are used. *Note*: with \"readout-mitigation\" set to "
+                     "\"tensored\" or \"complete\", the readout errors of the counts of IBMQ QPUs are mitigated "
+                     "with the cached calibration matrices of the measured qubits, and the result additionally "
+                     "contains the \"mitigated-counts\". The matrices are not calculated during the execution, "
+                     "calculate them beforehand via calculate-calibration-matrix, otherwise the result contains the "
+                     "\"mitigation-error\" instead.")
 @blp.arguments(ExecuteRequestSchema, description='''\
                 Execution via URL:
                     \"impl-url\": \"URL-OF-IMPLEMENTATION\" 
@@ -13,6 +13,9 @@ def encoding():
 
 
 @blp.route("/qiskit-service/api/v1.0/providers/f8f0c200-875d-0ff8-0352-1be4666c5829/qpus", methods=["GET"])
+@blp.doc(description="*Note*: the QPUs are served from a catalog that is refreshed regularly. With the query parameter "
+                     "\"max-age\", the queue sizes are refreshed before returning if they are older than the given "
+                     "seconds.")
 @blp.arguments(ProviderSchema, location="headers")
 @blp.response(200)
 def encoding(token):
@@ -1,12 +1,37 @@
 from flask_smorest import Blueprint
 
-from app.model.circuit_response import (ResultsResponseSchema)
+from app import routes
+from app.model.calculation_request import (ResultsQueryRequestSchema, ResultsQueryRequest, )
+from app.model.circuit_response import (ResultsResponseSchema, ResultsQueryResponseSchema, )
 
 blp = Blueprint("Results", __name__, description="Get execution results of an executed circuit.", )
 
 
 @blp.route("/qiskit-service/api/v1.0/results/<id>", methods=["GET"])
+@blp.doc(description="*Note*: with the query parameter \"wait\", a pending result is only returned after it is "
+                     "complete or the given seconds have passed, instead of immediately.")
 @blp.response(200, ResultsResponseSchema)
 def encoding(json):
     if json:
         return
+
+
+@blp.route("/qiskit-service/api/v1.0/results/<id>/events", methods=["GET"])
+@blp.doc(description="Server-sent event stream sending a \"complete\" event with the result once it is available. "
+                     "If the result is still pending after a while, a \"timeout\" event ends the stream.")
+@blp.response(200)
+def events(json):
+    if json:
+        return
+
+
+@blp.route("/qiskit-service/api/v1.0/results/query", methods=["POST"])
+@blp.doc(description="Returns the results with the given ids or matching all given filters, ordered by id. "
+                     "\"created-after\" and \"created-before\" are ISO 8601 dates. Only the requested \"fields\" are "
+                     "returned, e.g., [\"complete\"] to poll many results. If there are more results than the "
+                     "\"limit\", the \"next-cursor\" is passed as \"cursor\" to get the next page.")
+@blp.arguments(ResultsQueryRequestSchema, example={"ids": ["RESULT-ID-1", "RESULT-ID-2"], "fields": ["complete"]})
+@blp.response(200, ResultsQueryResponseSchema)
+def query(json: ResultsQueryRequest):
+    if json:
+        return routes.query_results(json)
@@ -0,0 +1 @@
+from app.controller.transpilation.transpilation_controller import blp
@@ -0,0 +1,13 @@
+from flask_smorest import Blueprint
+
+from app.model.circuit_response import (TranspilationResponseSchema)
+
+blp = Blueprint("Transpilations", __name__,
+                description="Request the analyzed properties of an asynchronously transpiled circuit.", )
+
+
+@blp.route("/qiskit-service/api/v1.0/transpilations/<id>", methods=["GET"])
+@blp.response(200, TranspilationResponseSchema)
+def encoding(json):
+    if json:
+        return
@@ -1,8 +1,9 @@
 from flask_smorest import Blueprint
 
 from app import routes
-from app.model.algorithm_request import (TranspileRequestSchema, TranspileRequest, )
-from app.model.circuit_response import (TranspileResponseSchema, )
+from app.model.algorithm_request import (TranspileRequestSchema, TranspileRequest, TranspileBatchRequestSchema,
+                                         TranspileBatchRequest, )
+from app.model.circuit_response import (TranspileResponseSchema, TranspileAsyncResponseSchema, )
 
 blp = Blueprint("Transpile", __name__,
     description="Send implementation, input, QPU information, and your access token to the API to get "
@@ -59,3 +60,47 @@ blp = Blueprint("Transpile", __name__,
 def encoding(json: TranspileRequest):
     if json:
         return routes.transpile_circuit(json)
+
+
+@blp.route("/qiskit-service/api/v1.0/transpile/batch", methods=["POST"])
+@blp.doc(description="Generates the circuit once and transpiles it for all targets in parallel. *Note*: the credentials "
+                     "of a target, e.g., \"token\", override the ones of the request.")
+@blp.arguments(TranspileBatchRequestSchema, description='''\
+                The implementation is given as for /transpile, the QPUs as a list of targets:
+                    \"targets\": [
+                        {
+                            \"provider\": \"ibmq\",
+                            \"qpu-name\": \"ibmq_qasm_simulator\"
+                        },
+                        {
+                            \"provider\": \"aws\",
+                            \"qpu-name\": \"SV1\",
+                            \"aws-access-key-id\": \"YOUR-AWS-ACCESS-KEY-ID\",
+                            \"aws-secret-access-key\": \"YOUR-AWS-SECRET-ACCESS-KEY\"
+                        }
+                    ]''', example={
+    "impl-url": "https://raw.githubusercontent.com/UST-QuAntiL/nisq-analyzer-content/master/example-implementations"
+                "/Grover-SAT/grover-fix-sat-qiskit.py", "impl-language": "qiskit", "token": "YOUR-IBMQ-TOKEN",
+    "targets": [{"provider": "ibmq", "qpu-name": "ibmq_qasm_simulator"},
+                {"provider": "ibmq", "qpu-name": "ibm_lagos"}], "input-params": {}},
+
+)
+@blp.response(200, TranspileResponseSchema(many=True))
+def transpile_batch(json: TranspileBatchRequest):
+    if json:
+        return routes.transpile_circuit_for_targets(json)
+
+
+@blp.route("/qiskit-service/api/v1.0/transpile/async", methods=["POST"])
+@blp.doc(description="Accepts the same request as /transpile, but generates and transpiles the circuit in the "
+                     "background. The analyzed properties are available at the returned location afterwards.")
+@blp.arguments(TranspileRequestSchema, example={
+    "impl-url": "https://raw.githubusercontent.com/UST-QuAntiL/nisq-analyzer-content/master/example-implementations"
+                "/Grover-SAT/grover-fix-sat-qiskit.py", "qpu-name": "ibmq_qasm_simulator", "impl-language": "qiskit",
+    "token": "YOUR-IBMQ-TOKEN", "input-params": {}},
+
+)
+@blp.response(202, TranspileAsyncResponseSchema)
+def transpile_async(json: TranspileRequest):
+    if json:
+        return routes.transpile_circuit_async(json)
@@ -0,0 +1,195 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import json
+import math
+import struct
+
+import numpy as np
+
+MAGIC = b'QCNT'
+LIST_MAGIC = b'QCNL'
+VERSION = 1
+VALUE_DTYPES = {b'I': np.dtype('<u4'), b'Q': np.dtype('<u8'), b'd': np.dtype('<f8')}
+
+
+class Counts:
+    """Histogram of measured outcomes as parallel arrays of the outcomes, as integers, and their counts.
+
+    The outcomes keep the order they were added in. Outcomes of up to 64 bits are stored as uint64, wider ones as
+    Python integers. The register sizes restore the spaces between the registers of the bitstrings."""
+
+    __slots__ = ('outcomes', 'values', 'register_sizes')
+
+    def __init__(self, outcomes, values, register_sizes):
+        self.outcomes = outcomes
+        self.values = values
+        self.register_sizes = tuple(register_sizes)
+
+    @property
+    def num_bits(self):
+        return sum(self.register_sizes)
+
+    @classmethod
+    def from_dict(cls, counts_dict):
+        """Create the counts from a dict of bitstrings, with the registers separated by spaces, to counts or
+        probabilities. Raises ValueError if the keys are not bitstrings of the same registers."""
+        bitstrings = list(counts_dict)
+        register_sizes = tuple(len(register) for register in bitstrings[0].split(' ')) if bitstrings else (0,)
+        if any(tuple(len(register) for register in bitstring.split(' ')) != register_sizes
+               for bitstring in bitstrings):
+            raise ValueError('The outcomes are not bitstrings of the same registers')
+        outcomes = [int(bitstring.replace(' ', ''), 2) for bitstring in bitstrings]
+        values = np.array(list(counts_dict.values()))
+        if values.dtype.kind in 'iub':
+            values = values.astype(np.uint64)
+        else:
+            values = values.astype(np.float64)
+        return cls(cls._outcome_array(outcomes, sum(register_sizes)), values, register_sizes)
+
+    @staticmethod
+    def _outcome_array(outcomes, num_bits):
+        if num_bits <= 64:
+            return np.array(outcomes, dtype=np.uint64)
+        outcome_array = np.empty(len(outcomes), dtype=object)
+        outcome_array[:] = outcomes
+        return outcome_array
+
+    def format(self, outcome):
+        """Return the outcome as bitstring"""
+        bits = format(int(outcome), f'0{self.num_bits}b')
+        registers = []
+        for size in self.register_sizes:
+            registers.append(bits[:size])
+            bits = bits[size:]
+        return ' '.join(registers)
+
+    def to_dict(self):
+        return {self.format(outcome): value for outcome, value in zip(self.outcomes, self.values.tolist())}
+
+    def get(self, bitstring, default=0):
+        indices = np.flatnonzero(self.outcomes == int(bitstring.replace(' ', ''), 2))
+        return self.values[indices[0]].item() if len(indices) else default
+
+    @property
+    def shots(self):
+        return self.values.sum().item()
+
+    def __len__(self):
+        return len(self.outcomes)
+
+    def __eq__(self, other):
+        return isinstance(other, Counts) and self.register_sizes == other.register_sizes and \
+            self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        return 'Counts({})'.format(self.to_dict())
+
+    def align(self, other):
+        """Return the sorted union of the outcomes of both histograms and the values of both for these outcomes as
+        float64 arrays, which are 0 for outcomes missing in a histogram"""
+        outcomes = np.union1d(self.outcomes, other.outcomes)
+        return outcomes, self._values_for(outcomes), other._values_for(outcomes)
+
+    def _values_for(self, outcomes):
+        values = np.zeros(len(outcomes))
+        values[np.searchsorted(outcomes, self.outcomes)] = self.values
+        return values
+
+    def to_bytes(self):
+        if self.values.dtype.kind == 'f':
+            value_code = b'd'
+        elif len(self.values) and self.values.max() >= 2 ** 32:
+            value_code = b'Q'
+        else:
+            value_code = b'I'
+        words = max(1, math.ceil(self.num_bits / 64))
+        if words == 1:
+            outcomes = np.asarray(self.outcomes, dtype='<u8').tobytes()
+        else:
+            outcomes = b''.join(int(outcome).to_bytes(8 * words, 'little') for outcome in self.outcomes)
+        return b''.join([struct.pack('<4sBcH', MAGIC, VERSION, value_code, len(self.register_sizes)),
+                         struct.pack(f'<{len(self.register_sizes)}HQ', *self.register_sizes, len(self)),
+                         outcomes, self.values.astype(VALUE_DTYPES[value_code]).tobytes()])
+
+    @classmethod
+    def from_bytes(cls, data):
+        data = memoryview(data)
+        magic, version, value_code, num_registers = struct.unpack_from('<4sBcH', data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('Not a serialized histogram')
+        offset = struct.calcsize('<4sBcH')
+        *register_sizes, length = struct.unpack_from(f'<{num_registers}HQ', data, offset)
+        offset += struct.calcsize(f'<{num_registers}HQ')
+
+        words = max(1, math.ceil(sum(register_sizes) / 64))
+        if words == 1:
+            outcomes = np.frombuffer(data, dtype='<u8', count=length, offset=offset).astype(np.uint64)
+        else:
+            outcomes = cls._outcome_array([int.from_bytes(data[start:start + 8 * words], 'little')
+                                           for start in range(offset, offset + 8 * words * length, 8 * words)],
+                                          sum(register_sizes))
+        offset += 8 * words * length
+        values = np.frombuffer(data, dtype=VALUE_DTYPES[value_code], count=length, offset=offset)
+        values = values.astype(np.float64 if value_code == b'd' else np.uint64)
+        return cls(outcomes, values, register_sizes)
+
+
+def from_json(counts):
+    """Convert the counts of one circuit as dict, or of several circuits as list of dicts, also as JSON text"""
+    if isinstance(counts, str):
+        counts = json.loads(counts) if counts else None
+    if counts is None or isinstance(counts, Counts):
+        return counts
+    if isinstance(counts, list):
+        return [from_json(circuit_counts) for circuit_counts in counts]
+    return Counts.from_dict(counts)
+
+
+def to_json(counts):
+    if isinstance(counts, list):
+        return [to_json(circuit_counts) for circuit_counts in counts]
+    return counts.to_dict() if counts is not None else None
+
+
+def dumps(counts):
+    """Serialize the counts of one circuit or a list of the counts of several circuits"""
+    if isinstance(counts, list):
+        serialized = [circuit_counts.to_bytes() for circuit_counts in counts]
+        return b''.join([LIST_MAGIC, struct.pack(f'<I{len(serialized)}Q', len(serialized), *map(len, serialized)),
+                         *serialized])
+    return counts.to_bytes()
+
+
+def loads(data):
+    data = memoryview(data)
+    if bytes(data[:4]) != LIST_MAGIC:
+        return Counts.from_bytes(data)
+    length, = struct.unpack_from('<I', data, 4)
+    sizes = struct.unpack_from(f'<{length}Q', data, 8)
+    offset = 8 + 8 * length
+    counts = []
+    for size in sizes:
+        counts.append(Counts.from_bytes(data[offset:offset + size]))
+        offset += size
+    return counts
+
+
+def is_serialized(data):
+    return bytes(data[:4]) in (MAGIC, LIST_MAGIC)
@@ -0,0 +1,71 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import zlib
+
+from sqlalchemy.types import LargeBinary, TypeDecorator
+
+from app import counts
+
+
+def compress(text):
+    return zlib.compress(text.encode())
+
+
+def decompress(data):
+    # values which were not migrated yet are still stored as text
+    if isinstance(data, str):
+        return data
+    try:
+        return zlib.decompress(data).decode()
+    except zlib.error:
+        return bytes(data).decode()
+
+
+class CompressedText(TypeDecorator):
+    """Text of unbounded length, e.g., JSON results or OpenQASM circuits, stored zlib-compressed as binary"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return compress(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        return decompress(value) if value is not None else None
+
+
+class CountsType(TypeDecorator):
+    """Counts of one circuit, or a list of the counts of several circuits, stored in the compact binary format of
+    app.counts. Dicts of bitstrings to counts, also as JSON, are converted when assigned."""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        value = counts.from_json(value)
+        return counts.dumps(value) if value is not None else None
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        if counts.is_serialized(value):
+            return counts.loads(value)
+        # counts which were not migrated yet are still stored as JSON
+        return counts.from_json(decompress(value))
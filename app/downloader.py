@@ -0,0 +1,130 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""Download implementations over pooled keep-alive connections with an on-disk cache shared by all workers.
+
+The cache directory contains the downloaded files content-addressed by their sha256 hash in objects/ and, for each
+URL, the ETag and Last-Modified header of the last response in urls/. Cached files are always revalidated with a
+conditional GET, so the server still decides about authorization and freshness, but unchanged files are not
+transferred again."""
+
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from hashlib import sha256
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app import app
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Get the HTTP session of this process. Processes forked afterwards create their own session, as the pooled
+    connections of the parent cannot be shared."""
+    global _session, _session_pid
+    with _session_lock:
+        if _session is None or _session_pid != os.getpid():
+            _session = requests.Session()
+            retries = Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504], allowed_methods=['GET'])
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=app.config['DOWNLOAD_POOL_SIZE'],
+                                  max_retries=retries)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+            _session_pid = os.getpid()
+        return _session
+
+
+def _get_path(*parts):
+    return os.path.join(app.config['DOWNLOAD_CACHE_DIR'], *parts)
+
+
+def _write_atomically(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as f:
+        f.write(data)
+    os.replace(f.name, path)
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _load_cache_entry(url):
+    """Return the validators and the content of the cached file of the URL or (None, None)"""
+    entry = _read(_get_path('urls', sha256(url.encode()).hexdigest() + '.json'))
+    if entry is None:
+        return None, None
+    entry = json.loads(entry)
+    content = _read(_get_path('objects', entry['sha256']))
+    return (entry, content) if content is not None else (None, None)
+
+
+def _store_cache_entry(url, response):
+    digest = sha256(response.content).hexdigest()
+    object_path = _get_path('objects', digest)
+    if not os.path.exists(object_path):
+        _write_atomically(object_path, response.content)
+    entry = {'url': url, 'sha256': digest, 'etag': response.headers.get('ETag'),
+             'last-modified': response.headers.get('Last-Modified')}
+    _write_atomically(_get_path('urls', sha256(url.encode()).hexdigest() + '.json'), json.dumps(entry).encode())
+
+
+def download(url, headers=None):
+    """Download the file at the URL and return its content. Raises requests.RequestException if the download
+    fails."""
+    headers = dict(headers or {})
+    entry, content = _load_cache_entry(url)
+    if entry is not None:
+        if entry['etag']:
+            headers['If-None-Match'] = entry['etag']
+        if entry['last-modified']:
+            headers['If-Modified-Since'] = entry['last-modified']
+
+    response = get_session().get(url, headers=headers, timeout=app.config['DOWNLOAD_TIMEOUT'])
+    if response.status_code == 304 and content is not None:
+        app.logger.info(f"Download of {url} not modified, using cached file")
+        return content
+    response.raise_for_status()
+    try:
+        _store_cache_entry(url, response)
+    except OSError as e:
+        app.logger.warning(f"Could not cache download of {url}: {str(e)}")
+    return response.content
+
+
+def download_all(urls, headers=None):
+    """Download the files at the URLs concurrently, optionally with a list of the headers of each URL. Return their
+    contents in the same order."""
+    headers = headers or [None] * len(urls)
+    if len(urls) <= 1:
+        return [download(url, url_headers) for url, url_headers in zip(urls, headers)]
+    with ThreadPoolExecutor(min(len(urls), app.config['DOWNLOAD_POOL_SIZE'])) as executor:
+        return list(executor.map(download, urls, headers))
@@ -0,0 +1,45 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""Encryption of credentials that are handed over to other processes via Redis, e.g., in the records of the job
+watcher, so that tokens and secret keys are never stored there in plaintext. All processes share the Fernet key of
+the CREDENTIALS_ENCRYPTION_KEY setting, which can be generated with:
+    python -c "from cryptography.fernet import Fernet; print(Fernet.generate_key().decode())"
+"""
+
+import json
+
+from cryptography.fernet import Fernet
+
+from app import app
+
+
+def is_available():
+    """Whether credentials can be encrypted, otherwise they must not leave the process"""
+    return bool(app.config['CREDENTIALS_ENCRYPTION_KEY'])
+
+
+def encrypt(value):
+    """Encrypt a JSON serializable value, e.g., a dict of credentials, into a string"""
+    return Fernet(app.config['CREDENTIALS_ENCRYPTION_KEY']).encrypt(json.dumps(value).encode()).decode()
+
+
+def decrypt(token):
+    """Decrypt a value encrypted by encrypt(). Raises cryptography.fernet.InvalidToken for a wrong key."""
+    return json.loads(Fernet(app.config['CREDENTIALS_ENCRYPTION_KEY']).decrypt(token.encode()))
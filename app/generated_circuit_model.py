@@ -18,11 +18,12 @@
 # ******************************************************************************
 
 from app import db
+from app.db_types import CompressedText
 
 
 class Generated_Circuit(db.Model):
     id = db.Column(db.String(36), primary_key=True)
-    generated_circuit = db.Column(db.String(1200), default="")
+    generated_circuit = db.deferred(db.Column(CompressedText, default=""))
     input_params = db.Column(db.String(1200), default="")
     original_depth = db.Column(db.Integer)
     original_width = db.Column(db.Integer)
@@ -16,47 +16,89 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 # ******************************************************************************
-from time import sleep
+import pickle
+import zlib
 
-from qiskit import QiskitError, QuantumRegister, execute, Aer
+from qiskit import QiskitError, QuantumRegister, transpile, Aer
 from qiskit.compiler import assemble
 from qiskit.providers.exceptions import JobError, JobTimeoutError
-from qiskit.providers.ibmq import IBMQ
-from qiskit.providers.jobstatus import JOB_FINAL_STATES
-from qiskit.utils.mitigation import CompleteMeasFitter, complete_meas_cal
+from qiskit.providers.ibmq import IBMQ, IBMQFactory
+from qiskit.utils.mitigation import CompleteMeasFitter, TensoredMeasFitter, complete_meas_cal, tensored_meas_cal
+from qiskit_aer.noise import NoiseModel
+
+from app import app, calibration_history, job_poller, provider_sessions, transpile_cache
+from app.cache import LRUCache, TieredCache
+
+noise_models = LRUCache(maxsize=app.config['NOISE_MODEL_CACHE_SIZE'], ttl=app.config['NOISE_MODEL_CACHE_TTL'])
+# deserialized noise models are kept in noise_models, thus, the serialized ones are only kept in the Redis tier
+noise_model_cache = TieredCache('noise-model', maxsize=0, ttl=app.config['NOISE_MODEL_CACHE_TTL'])
+# measurement filters of the calibration matrices per calibration of the backends, shared like the noise models
+meas_filters = LRUCache(maxsize=app.config['CALIBRATION_MATRIX_CACHE_SIZE'],
+                        ttl=app.config['CALIBRATION_MATRIX_CACHE_TTL'])
+meas_filter_cache = TieredCache('meas-filter', maxsize=0, ttl=app.config['CALIBRATION_MATRIX_CACHE_TTL'])
 
 
 def get_qpu(token, qpu_name, url='https://auth.quantum-computing.ibm.com/api', hub='ibm-q', group='open',
             project='main'):
     """Load account from token. Get backend."""
-    try:
-        IBMQ.disable_account()
-    except:
-        pass
-    provider = IBMQ.enable_account(token=token, url=url, hub=hub, group=group, project=project)
+    session = get_session(token, url, hub, group, project)
     if 'simulator' in qpu_name:
         backend = Aer.get_backend('aer_simulator')
     else:
-        backend = provider.get_backend(qpu_name)
+        backend = session.get_backend(qpu_name)
+        calibration_history.record_backend(backend)
     return backend
 
 
+def get_session(token, url='https://auth.quantum-computing.ibm.com/api', hub=None, group=None, project=None):
+    """Get the cached session of the account. Each account has its own IBMQFactory, so that sessions of different
+    accounts can be used concurrently."""
+    return provider_sessions.get_session(
+        'ibmq', lambda: provider_sessions.ProviderSession(
+            IBMQFactory().enable_account(token=token, url=url, hub=hub, group=group, project=project)),
+        token=token, url=url, hub=hub, group=group, project=project)
+
+
+def get_noise_model(backend, only_measurement_errors=False):
+    """Get the noise model of the current calibration of the backend, optionally only containing its readout errors.
+    Noise models are cached per calibration and shared with all workers via Redis."""
+    key = f"{transpile_cache.get_backend_name(backend)}:{transpile_cache.get_calibration_version(backend)}:" \
+          f"{only_measurement_errors}"
+    noise_model = noise_models.get(key)
+    if noise_model is not None:
+        return noise_model
+
+    serialized_noise_model = noise_model_cache.get(key)
+    if serialized_noise_model is not None:
+        noise_model = pickle.loads(zlib.decompress(serialized_noise_model))
+    else:
+        app.logger.info(f"Creating noise model of {key}")
+        if only_measurement_errors:
+            noise_model = NoiseModel()
+            for qubits, readout_error in get_noise_model(backend)._local_readout_errors.items():
+                noise_model.add_readout_error(readout_error, qubits)
+        else:
+            noise_model = NoiseModel.from_backend(backend)
+        # the readout errors contain numpy arrays that are not restored by NoiseModel.from_dict, thus, pickle is used
+        noise_model_cache.set(key, zlib.compress(pickle.dumps(noise_model)))
+    noise_models.set(key, noise_model)
+    return noise_model
+
+
 def delete_token():
     """Delete account."""
     IBMQ.delete_account()
 
 
-def execute_job(transpiled_circuits, shots, backend, noise_model):
-    """Generate qObject from transpiled circuit and execute it. Return result."""
+def submit_job(transpiled_circuits, shots, backend, noise_model=None):
+    """Submit the transpiled circuit to the backend without waiting for it to finish. Return the provider job."""
+    return backend.run(assemble(transpiled_circuits, shots=shots), noise_model=noise_model)
 
-    try:
-        job = backend.run(assemble(transpiled_circuits, shots=shots), noise_model=noise_model)
 
-        job_status = job.status()
-        while job_status not in JOB_FINAL_STATES:
-            print("The job is still running")
-            job_status = job.status()
+def get_job_result(job):
+    """Get the result of a finished job. Return None if the job failed."""
 
+    try:
         job_result = job.result()
         print("\nJob result:")
         print(job_result)
@@ -88,35 +130,93 @@ def execute_job(transpiled_circuits, shots, backend, noise_model):
         return None
 
 
-def get_meas_fitter(token, qpu_name, shots):
-    """Execute the calibration circuits on the given backend and calculate resulting matrix."""
-    print("Starting calculation of calibration matrix for QPU: ", qpu_name)
-
-    backend = get_qpu(token, qpu_name)
-
-    # Generate a calibration circuit for each state
-    qr = QuantumRegister(len(backend.properties().qubits))
-    meas_calibs, state_labels = complete_meas_cal(qr=qr, circlabel='mcal')
+def execute_job(transpiled_circuits, shots, backend, noise_model):
+    """Generate qObject from transpiled circuit and execute it. Return result."""
 
-    # Execute each calibration circuit and store results
-    print('Executing ' + str(len(meas_calibs)) + ' circuits to create calibration matrix...')
-    cal_results = []
-    for circuit in meas_calibs:
-        print('Executing circuit ' + circuit.name)
-        cal_results.append(execute_calibration_circuit(circuit, shots, backend))
+    try:
+        job = submit_job(transpiled_circuits, shots, backend, noise_model)
+        job_poller.wait_for_final_state(job)
+    except (JobError, JobTimeoutError):
+        return None
+    return get_job_result(job)
 
-    # Generate calibration matrix out of measurement results
-    meas_fitter = CompleteMeasFitter(cal_results, state_labels, circlabel='mcal')
-    return meas_fitter.filter
 
+def get_meas_filter_key(backend, qubits, tensored):
+    """Key of the measurement filter of the qubits in the current calibration of the backend, None if the backend does
+    not identify its calibration, then its filters are not cached. The shots of the calibration circuits are not part
+    of the key, and the qubits are sorted, as the filters hold the matrices in ascending order of the qubits."""
+    calibration_version = transpile_cache.get_calibration_version(backend)
+    if calibration_version is None:
+        return None
+    return f"{transpile_cache.get_backend_name(backend)}:{calibration_version}:" \
+           f"{'tensored' if tensored else 'complete'}:{','.join(map(str, sorted(qubits)))}"
 
-def execute_calibration_circuit(circuit, shots, backend):
-    """Execute a calibration circuit on the specified backend"""
-    job = execute(circuit, backend=backend, shots=shots)
 
-    job_status = job.status()
-    while job_status not in JOB_FINAL_STATES:
-        print('The execution is still running')
-        sleep(20)
-        job_status = job.status()
-    return job.result()
+def get_cached_meas_filter(backend, qubits, tensored=False):
+    """Get the measurement filter of the calibration matrix of the given qubits in the current calibration of the
+    backend if it was already calculated with any number of shots, without executing calibration circuits. None
+    otherwise. The matrices of the filter are in ascending order of the qubits, regardless of the given order."""
+    key = get_meas_filter_key(backend, qubits, tensored)
+    if key is None:
+        return None
+    meas_filter = meas_filters.get(key)
+    if meas_filter is None:
+        serialized_meas_filter = meas_filter_cache.get(key)
+        if serialized_meas_filter is None:
+            return None
+        meas_filter = pickle.loads(zlib.decompress(serialized_meas_filter))
+        meas_filters.set(key, meas_filter)
+    return meas_filter
+
+
+def get_meas_fitter(token, qpu_name, shots, qubits=None, tensored=False):
+    """Get the measurement filter of the calibration matrix of the given qubits, all qubits by default, of the backend.
+
+    The complete matrix covers all 2^n states of the qubits and needs 2^n calibration circuits, thus, it is limited to
+    CALIBRATION_MATRIX_MAX_QUBITS qubits. The tensored matrices are one 2x2 matrix per qubit, assuming uncorrelated
+    readout errors, and need two calibration circuits for any number of qubits. Filters are cached per calibration.
+    The matrices are calculated in ascending order of the qubits. Raise ValueError for invalid qubits."""
+    backend = get_qpu(token, qpu_name)
+    num_qubits = backend.configuration().n_qubits
+    qubits = list(range(num_qubits)) if qubits is None else sorted(qubits)
+    if not qubits or len(set(qubits)) != len(qubits) or any(not 0 <= qubit < num_qubits for qubit in qubits):
+        raise ValueError(f"The qubits must be distinct qubits of the {num_qubits} qubits of {qpu_name}")
+    if not tensored and len(qubits) > app.config['CALIBRATION_MATRIX_MAX_QUBITS']:
+        raise ValueError(f"The complete calibration matrix is limited to {app.config['CALIBRATION_MATRIX_MAX_QUBITS']} "
+                         f"qubits, calibrate fewer qubits or use the tensored calibration")
+
+    meas_filter = get_cached_meas_filter(backend, qubits, tensored)
+    if meas_filter is not None:
+        return meas_filter
+    key = get_meas_filter_key(backend, qubits, tensored)
+    app.logger.info(f"Calculating the calibration matrix of {key or qpu_name}")
+    qr = QuantumRegister(num_qubits)
+    if tensored:
+        mit_pattern = [[qubit] for qubit in qubits]
+        meas_calibs, _ = tensored_meas_cal(mit_pattern=mit_pattern, qr=qr, circlabel='mcal')
+        cal_results = execute_calibration_circuits(meas_calibs, shots, backend)
+        meas_filter = TensoredMeasFitter(cal_results, mit_pattern, circlabel='mcal').filter
+    else:
+        meas_calibs, state_labels = complete_meas_cal(qubit_list=qubits, qr=qr, circlabel='mcal')
+        cal_results = execute_calibration_circuits(meas_calibs, shots, backend)
+        meas_filter = CompleteMeasFitter(cal_results, state_labels, circlabel='mcal').filter
+    if key is not None:
+        meas_filter_cache.set(key, zlib.compress(pickle.dumps(meas_filter)))
+        meas_filters.set(key, meas_filter)
+    return meas_filter
+
+
+def execute_calibration_circuits(circuits, shots, backend):
+    """Execute the calibration circuits on the physical qubits of their register in as few jobs as the maximum number
+    of experiments per job of the backend allows. All jobs are submitted before waiting for them. Return the results
+    of the jobs."""
+    transpiled_circuits = transpile(circuits, backend, initial_layout=list(range(circuits[0].num_qubits)),
+                                    optimization_level=0)
+    max_experiments = getattr(backend.configuration(), 'max_experiments', None) or len(transpiled_circuits)
+    jobs = [backend.run(transpiled_circuits[start:start + max_experiments], shots=shots)
+            for start in range(0, len(transpiled_circuits), max_experiments)]
+    results = []
+    for job in jobs:
+        job_poller.wait_for_final_state(job)
+        results.append(job.result())
+    return results
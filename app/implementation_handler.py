@@ -16,56 +16,52 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 # ******************************************************************************
-import os
-import shutil
-import sys
-import tempfile
+import json
 import urllib.parse
-from http.client import HTTPResponse
-from importlib import reload
-from urllib import request, error
+from hashlib import sha256
 
 import qiskit
+import requests
 from flask import abort
 
-from app import app
+from app import app, downloader, sandbox
+from app.cache import TieredCache
+
+generation_cache = TieredCache('generation', maxsize=app.config['GENERATION_CACHE_SIZE'],
+                               ttl=app.config['GENERATION_CACHE_TTL'])
+
+
+def get_generation_key(data, input_params):
+    """Hash of the implementation code and the canonical representation of the typed input parameters"""
+    canonical_input_params = json.dumps(dict(input_params or {}), sort_keys=True, default=repr)
+    return f"{sha256(data.encode()).hexdigest()}:{sha256(canonical_input_params.encode()).hexdigest()}"
 
 
 def prepare_code_from_data(data, input_params):
     """Get implementation code from data. Set input parameters into implementation. Return circuit."""
-    temp_dir = tempfile.mkdtemp()
-    with open(os.path.join(temp_dir, "__init__.py"), "w") as f:
-        f.write("")
-    with open(os.path.join(temp_dir, "downloaded_code.py"), "w") as f:
-        f.write(data)
-    sys.path.append(temp_dir)
-    try:
-        import downloaded_code
-
-        # deletes every attribute from downloaded_code, except __name__, because importlib.reload
-        # doesn't reset the module's global variables
-        for attr in dir(downloaded_code):
-            if attr != "__name__":
-                delattr(downloaded_code, attr)
-
-        reload(downloaded_code)
-        if 'get_circuit' in dir(downloaded_code):
-            circuit = downloaded_code.get_circuit(**input_params)
-        elif 'qc' in dir(downloaded_code):
-            circuit = downloaded_code.qc
-    finally:
-        sys.path.remove(temp_dir)
-        shutil.rmtree(temp_dir, ignore_errors=True)
-    if not circuit:
-        raise ValueError
-    return circuit
+    return prepare_code_from_data_list([data], input_params)[0]
+
+
+def prepare_code_from_data_list(data_list, input_params):
+    """Get the circuits of several implementations, which are executed in parallel. Circuits that were already
+    generated with the same input parameters are taken from the generation cache. Return list of circuits."""
+    keys = [get_generation_key(data, input_params) for data in data_list]
+    generated_circuits = [generation_cache.get(key) for key in keys]
+    missing = [i for i, generated_circuit in enumerate(generated_circuits) if generated_circuit is None]
+    if missing:
+        results = sandbox.generate_circuits([data_list[i] for i in missing], input_params)
+        for i, (generated_circuit, deterministic) in zip(missing, results):
+            generated_circuits[i] = generated_circuit
+            if deterministic:
+                generation_cache.set(keys[i], generated_circuit)
+    return [sandbox.circuit_from_qpy(generated_circuit) for generated_circuit in generated_circuits]
 
 
 def prepare_code_from_url(url, input_params, bearer_token: str = "", post_processing=False):
     """Get implementation code from URL. Set input parameters into implementation. Return circuit."""
     try:
         impl = _download_code(url, bearer_token)
-    except (error.HTTPError, error.URLError):
+    except requests.RequestException:
         return None
 
     if not post_processing:
@@ -76,6 +72,18 @@ def prepare_code_from_url(url, input_params, bearer_token: str = "", post_proces
         return result
 
 
+def prepare_code_from_url_list(urls, input_params, bearer_token: str = "", language='qiskit'):
+    """Download the implementations concurrently and get their circuits. Return None if a download failed."""
+    try:
+        impls = _download_code_list(urls, bearer_token)
+    except requests.RequestException:
+        return None
+
+    if language.lower() == 'openqasm':
+        return [prepare_code_from_qasm(impl) for impl in impls]
+    return prepare_code_from_data_list(impls, input_params)
+
+
 def prepare_code_from_qasm(qasm):
     return qiskit.QuantumCircuit.from_qasm_str(qasm)
 
@@ -84,43 +92,18 @@ def prepare_code_from_qasm_url(url, bearer_token: str = ""):
     """Get implementation code from URL. Set input parameters into implementation. Return circuit."""
     try:
         impl = _download_code(url, bearer_token)
-    except (error.HTTPError, error.URLError):
+    except requests.RequestException:
         return None
 
     return prepare_code_from_qasm(impl)
 
 
 def prepare_post_processing_code_from_data(data, input_params):
-    """Get implementation code from data. Set input parameters into implementation. Return circuit."""
-    temp_dir = tempfile.mkdtemp()
-    with open(os.path.join(temp_dir, "__init__.py"), "w") as f:
-        f.write("")
-    with open(os.path.join(temp_dir, "downloaded_code.py"), "w") as f:
-        f.write(data)
-    sys.path.append(temp_dir)
-    try:
-        import downloaded_code
-
-        # deletes every attribute from downloaded_code, except __name__, because importlib.reload
-        # doesn't reset the module's global variables
-        for attr in dir(downloaded_code):
-            if attr != "__name__":
-                delattr(downloaded_code, attr)
-
-        reload(downloaded_code)
-        if 'post_processing' in dir(downloaded_code):
-            result = downloaded_code.post_processing(**input_params)
-    finally:
-        sys.path.remove(temp_dir)
-        shutil.rmtree(temp_dir, ignore_errors=True)
-    if not result:
-        raise ValueError
-    return result
+    """Get implementation code from data. Set input parameters into implementation. Return post processing result."""
+    return sandbox.post_processing(data, input_params)
 
 
-def _download_code(url: str, bearer_token: str = "") -> str:
-    req = request.Request(url)
-
+def _get_headers(url: str, bearer_token: str = "") -> dict:
     if urllib.parse.urlparse(url).netloc == "platform.planqk.de":
         if bearer_token == "":
             app.logger.error("No bearer token specified, download from the PlanQK platform will fail.")
@@ -131,20 +114,36 @@ def _download_code(url: str, bearer_token: str = "") -> str:
 
             abort(401)
 
-        req.add_header("Authorization", "Bearer " + bearer_token)
+        return {"Authorization": "Bearer " + bearer_token}
+    return {}
 
-    try:
-        res: HTTPResponse = request.urlopen(req)
-    except Exception as e:
-        app.logger.error("Could not open url: " + str(e))
 
-        if str(e).find("401") != -1:
-            abort(401)
+def _handle_download_error(e: requests.RequestException):
+    app.logger.error("Could not open url: " + str(e))
 
-    if res.getcode() == 200 and urllib.parse.urlparse(url).netloc == "platform.planqk.de":
+    if e.response is not None and e.response.status_code == 401:
+        abort(401)
+
+
+def _download_code(url: str, bearer_token: str = "") -> str:
+    try:
+        impl = downloader.download(url, _get_headers(url, bearer_token))
+    except requests.RequestException as e:
+        _handle_download_error(e)
+        raise
+
+    if urllib.parse.urlparse(url).netloc == "platform.planqk.de":
         app.logger.info("Request to platform.planqk.de was executed successfully.")
 
-    if res.getcode() == 401:
-        abort(401)
+    return impl.decode("utf-8")
+
+
+def _download_code_list(urls, bearer_token: str = "") -> list:
+    headers = [_get_headers(url, bearer_token) for url in urls]
+    try:
+        impls = downloader.download_all(urls, headers)
+    except requests.RequestException as e:
+        _handle_download_error(e)
+        raise
 
-    return res.read().decode("utf-8")
+    return [impl.decode("utf-8") for impl in impls]
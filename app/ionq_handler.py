@@ -17,30 +17,30 @@
 #  limitations under the License.
 # ******************************************************************************
 from qiskit import QiskitError
-from qiskit.providers.jobstatus import JOB_FINAL_STATES
 from qiskit_ionq import IonQProvider
 
+from app import job_poller, provider_sessions
+
 
 def get_qpu(token, qpu_name):
-    provider = IonQProvider(token)
+    session = provider_sessions.get_session(
+        'ionq', lambda: provider_sessions.ProviderSession(IonQProvider(token)), token=token)
     if "simulator" not in qpu_name:
         qpu_name = qpu_name.replace(" ", "-").lower()
         ionq_signature = "ionq_qpu."
         qpu_name = ionq_signature + qpu_name
-    return provider.get_backend(qpu_name)
+    return session.get_backend(qpu_name)
 
 
-def execute_job(transpiled_circuit, shots, backend):
-    """Generate qObject from transpiled circuit and execute it. Return result."""
+def submit_job(transpiled_circuit, shots, backend):
+    """Submit the transpiled circuit to the backend without waiting for it to finish. Return the provider job."""
+    return backend.run(transpiled_circuit, shots=shots)
 
-    try:
-        job = backend.run(transpiled_circuit, shots=shots)
 
-        job_status = job.status()
-        while job_status not in JOB_FINAL_STATES:
-            print("The job is still running")
-            job_status = job.status()
+def get_job_result(job):
+    """Get the result of a finished job. Return None if the job failed."""
 
+    try:
         job_result = job.result()
         print("\nJob result:")
         print(job_result)
@@ -71,3 +71,14 @@ def execute_job(transpiled_circuit, shots, backend):
         return {'job_result_raw': job_result_dict, 'statevector': statevector, 'counts': counts, 'unitary': unitary}
     except Exception:
         return None
+
+
+def execute_job(transpiled_circuit, shots, backend):
+    """Generate qObject from transpiled circuit and execute it. Return result."""
+
+    try:
+        job = submit_job(transpiled_circuit, shots, backend)
+        job_poller.wait_for_final_state(job)
+    except Exception:
+        return None
+    return get_job_result(job)
@@ -0,0 +1,60 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import random
+import time
+
+from qiskit.providers.exceptions import JobTimeoutError
+from qiskit.providers.jobstatus import JOB_FINAL_STATES
+
+from app import app
+
+
+def get_poll_intervals(initial_interval=None, max_interval=None, backoff_factor=None, jitter=None):
+    """Generate the seconds to wait between two status requests: exponential backoff up to the maximum interval,
+    each interval randomized by +/- jitter so that many waiting workers do not poll a provider in lockstep"""
+    interval = app.config['JOB_POLL_INITIAL_INTERVAL'] if initial_interval is None else initial_interval
+    max_interval = app.config['JOB_POLL_MAX_INTERVAL'] if max_interval is None else max_interval
+    backoff_factor = app.config['JOB_POLL_BACKOFF_FACTOR'] if backoff_factor is None else backoff_factor
+    jitter = app.config['JOB_POLL_JITTER'] if jitter is None else jitter
+    while True:
+        interval = min(interval, max_interval)
+        yield min(interval * random.uniform(1 - jitter, 1 + jitter), max_interval)
+        interval *= backoff_factor
+
+
+def wait_for_final_state(job, timeout=None, sleep=time.sleep, **interval_options):
+    """Block until the job reached a final state and return this state.
+
+    Raises a JobTimeoutError if the job is not finished after timeout seconds."""
+    start = time.monotonic()
+    intervals = get_poll_intervals(**interval_options)
+    job_status = job.status()
+    while job_status not in JOB_FINAL_STATES:
+        interval = next(intervals)
+        if timeout is not None:
+            remaining = timeout - (time.monotonic() - start)
+            if remaining <= 0:
+                raise JobTimeoutError(f"Job did not finish within {timeout} seconds, last status: {job_status}")
+            interval = min(interval, remaining)
+        sleep(interval)
+        previous_status, job_status = job_status, job.status()
+        if job_status != previous_status:
+            app.logger.info(f"The job status changed to {getattr(job_status, 'name', job_status)}")
+    return job_status
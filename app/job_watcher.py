@@ -0,0 +1,114 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""Watch jobs that were submitted to remote QPUs and enqueue their completion once they are finished.
+
+The execute task submits the job, stores its record under a key with the WATCHED_JOB_KEY_PREFIX in Redis and returns,
+so that no rq worker is blocked while the job waits in the queue of the QPU. The credentials in the record are
+encrypted, and the record expires after JOB_WATCHER_RECORD_TTL seconds. A single watcher process tracks all
+outstanding jobs concurrently and enqueues tasks.complete_execution for each finished job. Start it with:
+    python -m app.job_watcher
+"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from qiskit.providers.jobstatus import JOB_FINAL_STATES
+
+from app import app, encryption, job_poller, tasks
+
+# consecutive failed status requests after which a job is handed over for completion, which records the failure
+MAX_CONSECUTIVE_ERRORS = 10
+
+
+class JobWatcher:
+    """Poll the status of all watched jobs in one event loop, blocking provider requests run in a thread pool"""
+
+    def __init__(self, redis=None, threads=None, scan_interval=None, **poll_options):
+        self.redis = redis or app.redis
+        self.executor = ThreadPoolExecutor(threads or app.config['JOB_WATCHER_THREADS'])
+        self.scan_interval = scan_interval or app.config['JOB_WATCHER_SCAN_INTERVAL']
+        self.poll_options = poll_options
+        self.watched = {}
+
+    async def _call(self, function, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def run(self):
+        app.logger.info("Job watcher started")
+        while True:
+            await self.scan()
+            await asyncio.sleep(self.scan_interval)
+
+    async def scan(self):
+        """Start watching all jobs of the hash that are not watched yet, e.g., newly submitted jobs or jobs that
+        were watched by a previous watcher process"""
+        records = await self._call(self.get_records)
+        for result_id, record in records.items():
+            if result_id not in self.watched:
+                self.watched[result_id] = asyncio.create_task(self.watch(result_id, json.loads(record)))
+
+    def get_records(self):
+        keys = [key.decode() if isinstance(key, bytes) else key
+                for key in self.redis.scan_iter(match=tasks.WATCHED_JOB_KEY_PREFIX + '*')]
+        records = self.redis.mget(keys) if keys else []
+        # records may have expired or been completed since the scan
+        return {key[len(tasks.WATCHED_JOB_KEY_PREFIX):]: record for key, record in zip(keys, records)
+                if record is not None}
+
+    async def watch(self, result_id, record):
+        try:
+            intervals = job_poller.get_poll_intervals(**self.poll_options)
+            errors = 0
+            job = None
+            while errors < MAX_CONSECUTIVE_ERRORS:
+                try:
+                    if job is None:
+                        job = await self._call(self.retrieve_job, record)
+                    if await self._call(job.status) in JOB_FINAL_STATES:
+                        break
+                    errors = 0
+                except Exception:
+                    app.logger.exception(f"Requesting the status of job {record['provider_job_id']} failed")
+                    errors += 1
+                await asyncio.sleep(next(intervals))
+            await self._call(self.complete, result_id, record)
+        except Exception:
+            app.logger.exception(f"Completing job {record['provider_job_id']} failed, retrying with the next scan")
+        finally:
+            del self.watched[result_id]
+
+    def retrieve_job(self, record):
+        backend = tasks.get_backend(record['provider'], record['qpu_name'],
+                                    **encryption.decrypt(record['encrypted_credentials']))
+        return backend.retrieve_job(record['provider_job_id'])
+
+    def complete(self, result_id, record):
+        app.execute_queue.enqueue('app.tasks.complete_execution', **record)
+        self.redis.delete(tasks.WATCHED_JOB_KEY_PREFIX + result_id)
+        app.logger.info(f"Job {record['provider_job_id']} is finished, enqueued its completion")
+
+
+def main():
+    asyncio.run(JobWatcher().run())
+
+
+if __name__ == '__main__':
+    main()
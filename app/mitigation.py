@@ -0,0 +1,115 @@
+# ******************************************************************************
+#  Copyright (c) 2021 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""Readout-error mitigation of measured counts.
+
+A calibration matrix A holds the probability A[i, j] of measuring outcome i when state j is prepared, and the mitigated
+distribution x solves A x = p for the measured distribution p. Instead of inverting A over all 2^n outcomes, x is
+solved in the subspace of the observed outcomes, coupling only outcomes that differ in at most a given number of bits.
+The columns of the reduced matrix are renormalized, as the probability of measuring outcomes outside the subspace is
+neglected, and the solution is projected onto the nearest probability distribution."""
+
+import itertools
+
+import numpy as np
+from scipy.sparse import csc_matrix
+from scipy.sparse.linalg import spsolve
+
+from app.counts import Counts
+
+
+def flip_masks(bits, distance):
+    """Return the masks flipping up to distance of the given bits of an outcome, starting with the empty mask"""
+    return np.array([sum(1 << bit for bit in flipped) for size in range(min(distance, len(bits)) + 1)
+                     for flipped in itertools.combinations(bits, size)], dtype=np.uint64)
+
+
+def get_bit(outcomes, bit):
+    return ((outcomes >> np.uint64(bit)) & np.uint64(1)).astype(np.intp)
+
+
+def tensored_elements(measured, prepared, bits, cal_matrices):
+    """Return the elements of the tensor product of the 2x2 calibration matrices of the bits for the outcome pairs"""
+    elements = np.ones(len(measured))
+    for bit, cal_matrix in zip(bits, cal_matrices):
+        elements *= np.asarray(cal_matrix)[get_bit(measured, bit), get_bit(prepared, bit)]
+    return elements
+
+
+def complete_elements(measured, prepared, bits, cal_matrix, state_bits):
+    """Return the elements of the calibration matrix for the outcome pairs, bit state_bits[k] of its states being the
+    k-th bit"""
+    measured_states = np.zeros(len(measured), dtype=np.intp)
+    prepared_states = np.zeros(len(prepared), dtype=np.intp)
+    for bit, state_bit in zip(bits, state_bits):
+        measured_states |= get_bit(measured, bit) << state_bit
+        prepared_states |= get_bit(prepared, bit) << state_bit
+    return np.asarray(cal_matrix)[measured_states, prepared_states]
+
+
+def nearest_probability_distribution(quasi_probabilities):
+    """Return the probability distribution closest to the quasi-probabilities summing to 1 in Euclidean distance"""
+    descending = np.sort(quasi_probabilities)[::-1]
+    excess = np.cumsum(descending) - 1
+    rank = np.flatnonzero(descending - excess / np.arange(1, len(descending) + 1) > 0)[-1]
+    return np.maximum(quasi_probabilities - excess[rank] / (rank + 1), 0)
+
+
+def mitigate_counts(counts, bits, cal_matrix=None, cal_matrices=None, distance=3, cal_matrix_bits=None):
+    """Mitigate the readout errors of the given classical bits of the counts, either with the complete calibration
+    matrix over these bits or with the tensored calibration matrices, one 2x2 matrix per bit. The k-th bit is bit
+    cal_matrix_bits[k] of the states of the complete matrix, bit k by default. Return the expected counts of the
+    observed outcomes without readout errors, for the same number of shots, as float Counts.
+
+    Raises ValueError if the outcomes have more than 64 bits or the reduced calibration matrix is singular."""
+    if counts.outcomes.dtype == object:
+        raise ValueError('Readout-error mitigation is limited to outcomes of up to 64 bits')
+    order = np.argsort(counts.outcomes)
+    outcomes = counts.outcomes[order]
+
+    # pairs of the indices of the measured and the prepared outcomes within the distance
+    measured_indices, prepared_indices = [], []
+    for mask in flip_masks(bits, distance):
+        neighbours = outcomes ^ mask
+        indices = np.minimum(np.searchsorted(outcomes, neighbours), len(outcomes) - 1)
+        found = np.flatnonzero(outcomes[indices] == neighbours)
+        measured_indices.append(indices[found])
+        prepared_indices.append(found)
+    measured_indices = np.concatenate(measured_indices)
+    prepared_indices = np.concatenate(prepared_indices)
+
+    if cal_matrices is not None:
+        elements = tensored_elements(outcomes[measured_indices], outcomes[prepared_indices], bits, cal_matrices)
+    else:
+        state_bits = range(len(bits)) if cal_matrix_bits is None else cal_matrix_bits
+        elements = complete_elements(outcomes[measured_indices], outcomes[prepared_indices], bits, cal_matrix,
+                                     state_bits)
+    column_sums = np.bincount(prepared_indices, weights=elements, minlength=len(outcomes))
+    elements = elements / np.where(column_sums > 0, column_sums, 1)[prepared_indices]
+    reduced_matrix = csc_matrix((elements, (measured_indices, prepared_indices)), shape=(len(outcomes),) * 2)
+
+    shots = counts.values.sum()
+    quasi_probabilities = np.atleast_1d(spsolve(reduced_matrix, counts.values[order] / shots))
+    if not np.all(np.isfinite(quasi_probabilities)):
+        raise ValueError('The calibration matrix is singular for the observed outcomes')
+
+    values = np.empty(len(outcomes))
+    values[order] = nearest_probability_distribution(quasi_probabilities) * shots
+    observed = values > 0
+    return Counts(counts.outcomes[observed], values[observed], counts.register_sizes)
@@ -35,9 +35,28 @@ class TranspileRequestSchema(ma.Schema):
     token = ma.fields.String()
 
 
+class TranspileBatchRequest:
+    def __init__(self, impl_url, impl_language, qasm_string, targets, input_params, token):
+        self.impl_url = impl_url
+        self.impl_language = impl_language
+        self.qasm_string = qasm_string
+        self.targets = targets
+        self.input_params = input_params
+        self.token = token
+
+
+class TranspileBatchRequestSchema(ma.Schema):
+    impl_url = ma.fields.String()
+    impl_language = ma.fields.String()
+    qasm_string = ma.fields.String()
+    targets = ma.fields.List(ma.fields.Dict())
+    input_params = ma.fields.List(ma.fields.String())
+    token = ma.fields.String()
+
+
 class ExecuteRequest:
     def __init__(self, impl_url, impl_language, qpu_name, provider, noise_model, only_measurement_errors, input_params,
-                 token, correlation_id, post_processing_result):
+                 token, correlation_id, post_processing_result, readout_mitigation):
         self.impl_url = impl_url
         self.impl_language = impl_language
         self.qpu_name = qpu_name
@@ -47,6 +66,7 @@ class ExecuteRequest:
         self.input_params = input_params
         self.token = token
         self.correlation_id = correlation_id
+        self.readout_mitigation = readout_mitigation
 
 
 class ExecuteRequestSchema(ma.Schema):
@@ -59,3 +79,4 @@ class ExecuteRequestSchema(ma.Schema):
     noise_model = ma.fields.Str(required=False)
     only_measurement_errors = ma.fields.Boolean(required=False)
     correlation_id = ma.fields.String()
+    readout_mitigation = ma.fields.String(required=False)
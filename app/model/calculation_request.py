@@ -2,16 +2,20 @@ import marshmallow as ma
 
 
 class CalcCalibrationMatrixRequest:
-    def __init__(self, qpu_name, shots, token):
+    def __init__(self, qpu_name, shots, token, qubits, tensored):
         self.qpu_name = qpu_name
         self.token = token
         self.shots = shots
+        self.qubits = qubits
+        self.tensored = tensored
 
 
 class CalcCalibrationMatrixRequestSchema(ma.Schema):
     qpu_name = ma.fields.String()
     token = ma.fields.String()
     shots = ma.fields.Int()
+    qubits = ma.fields.List(ma.fields.Int(), required=False)
+    tensored = ma.fields.Boolean(required=False)
 
 
 class BenchmarkRequest:
@@ -52,3 +56,29 @@ class AnalysisOriginalCircuitRequestSchema(ma.Schema):
 
 class ProviderSchema(ma.Schema):
     token = ma.fields.String(required=True)
+
+
+class ResultsQueryRequest:
+    def __init__(self, ids, backend, complete, generated_circuit_id, created_after, created_before, fields, limit,
+                 cursor):
+        self.ids = ids
+        self.backend = backend
+        self.complete = complete
+        self.generated_circuit_id = generated_circuit_id
+        self.created_after = created_after
+        self.created_before = created_before
+        self.fields = fields
+        self.limit = limit
+        self.cursor = cursor
+
+
+class ResultsQueryRequestSchema(ma.Schema):
+    ids = ma.fields.List(ma.fields.String(), required=False)
+    backend = ma.fields.String(required=False)
+    complete = ma.fields.Boolean(required=False)
+    generated_circuit_id = ma.fields.String(required=False)
+    created_after = ma.fields.String(required=False)
+    created_before = ma.fields.String(required=False)
+    fields = ma.fields.List(ma.fields.String(), required=False)
+    limit = ma.fields.Int(required=False)
+    cursor = ma.fields.String(required=False)
@@ -92,6 +92,24 @@ class TranspileResponseSchema(ma.Schema):
         raise NotImplementedError
 
 
+class TranspileAsyncResponseSchema(ma.Schema):
+    location = ma.fields.String()
+
+
+class TranspilationResponseSchema(TranspileResponseSchema):
+    id = ma.fields.String()
+    complete = ma.fields.Boolean()
+    provider = ma.fields.String()
+    qpu_name = ma.fields.String()
+    error = ma.fields.String()
+
+
+class CalibrationResponseSchema(ma.Schema):
+    backend = ma.fields.String()
+    last_update_date = ma.fields.String()
+    properties = ma.fields.Dict()
+
+
 class ExecuteResponseSchema(ma.Schema):
     location = ma.fields.String()
 
@@ -115,6 +133,13 @@ class BenchmarkResponseSchema(ma.Schema):
 class ResultsResponseSchema(ma.Schema):
     result = ma.fields.List(ma.fields.String())
     post_processing_result = ma.fields.List(ma.fields.String())
+    mitigated_counts = ma.fields.Raw()
+    mitigation_error = ma.fields.String()
+
+
+class ResultsQueryResponseSchema(ma.Schema):
+    results = ma.fields.List(ma.fields.Dict())
+    next_cursor = ma.fields.String()
 
 
 class AnalysisOriginalCircuitResponse:
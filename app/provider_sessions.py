@@ -0,0 +1,82 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import json
+import os
+import threading
+from hashlib import sha256
+
+from app import app
+from app.cache import LRUCache
+
+sessions = LRUCache(maxsize=app.config['PROVIDER_SESSION_CACHE_SIZE'], ttl=app.config['PROVIDER_SESSION_TTL'])
+_sessions_pid = os.getpid()
+# sessions are created under one of a fixed number of locks selected by the session key, so that the locks do not
+# grow with the number of accounts
+_locks = [threading.Lock() for _ in range(64)]
+
+
+class ProviderSession:
+    """Authenticated provider of one account, keeping the backend handles it returned for reuse"""
+
+    def __init__(self, provider, **backend_options):
+        self.provider = provider
+        self.backend_options = backend_options
+        # backend handles cache their properties, thus, they are kept shorter than the session to see recalibrations
+        self.backends = LRUCache(maxsize=256, ttl=app.config['PROVIDER_BACKEND_TTL'])
+        self._lock = threading.Lock()
+
+    def get_backend(self, name):
+        backend = self.backends.get(name)
+        if backend is None:
+            with self._lock:
+                backend = self.backends.get(name)
+                if backend is None:
+                    backend = self.provider.get_backend(name, **self.backend_options)
+                    self.backends.set(name, backend)
+        return backend
+
+
+def get_session_key(provider_name, **credentials):
+    """Hash of the provider and all credentials and account settings, e.g., hub, group, project, or region"""
+    return sha256(json.dumps([provider_name, credentials], sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _get_lock(key):
+    return _locks[int(key[:8], 16) % len(_locks)]
+
+
+def get_session(provider_name, create_session, **credentials):
+    """Return the cached session of the account or create it by calling create_session() once, even if several
+    threads request the same account concurrently"""
+    global _sessions_pid
+    if _sessions_pid != os.getpid():
+        # the connections of sessions inherited from the parent process must not be shared with it
+        sessions.clear()
+        _sessions_pid = os.getpid()
+    key = get_session_key(provider_name, **credentials)
+    session = sessions.get(key)
+    if session is None:
+        with _get_lock(key):
+            session = sessions.get(key)
+            if session is None:
+                app.logger.info(f"Creating new {provider_name} session")
+                session = create_session()
+                sessions.set(key, session)
+    return session
@@ -0,0 +1,138 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""Catalog of the QPUs of IBMQ accounts and their metrics, kept in Redis.
+
+Requests for the QPUs of an account are served from the catalog if its queue sizes are recent enough, the metrics
+derived from the calibrations are refreshed less often. A refresher process keeps the catalogs of all accounts that
+were requested recently up to date, refreshing the queue sizes more often than the calibrations. The tokens of the
+accounts are handed over to the refresher encrypted, without CREDENTIALS_ENCRYPTION_KEY only requests refresh the
+catalogs. Start it with:
+    python -m app.qpu_catalog
+"""
+
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app import app, encryption, ibmq_handler, provider_sessions, qpu_metrics
+
+KEY_PREFIX = 'qiskit-service:qpu-catalog:'
+# hash of the requested accounts, account key -> json record with the encrypted token and the time of the last request
+ACCOUNTS_KEY = KEY_PREFIX + 'accounts'
+
+
+def get_account_key(token):
+    return provider_sessions.get_session_key('ibmq', token=token)
+
+
+class QpuCatalog:
+    """Catalogs of the accounts, each a Redis hash with the catalog as JSON and the times its queue sizes and
+    calibrations were updated"""
+
+    def __init__(self, redis=None, threads=None):
+        self.redis = redis or app.redis
+        self.threads = threads or app.config['QPU_CATALOG_THREADS']
+
+    def get(self, token, max_age):
+        """Get the catalog of the account as JSON, refreshing the queue sizes if they are older than max_age seconds.
+        The calibrations are refreshed if they are older than the calibration interval, too."""
+        account_key = get_account_key(token)
+        record = {'requested': time.time()}
+        if encryption.is_available():
+            record['encrypted-token'] = encryption.encrypt(token)
+        self.redis.hset(ACCOUNTS_KEY, account_key, json.dumps(record))
+        catalog, queue_updated, calibration_updated = self.redis.hmget(
+            KEY_PREFIX + account_key, 'catalog', 'queue-updated', 'calibration-updated')
+        now = time.time()
+        if catalog is None or \
+                now - float(calibration_updated) > max(max_age, app.config['QPU_CATALOG_CALIBRATION_INTERVAL']):
+            return self.refresh(token)
+        if now - float(queue_updated) > max_age:
+            return self.refresh(token, calibration=False)
+        return catalog.decode() if isinstance(catalog, bytes) else catalog
+
+    def refresh(self, token, calibration=True):
+        """Refresh the catalog of the account, either completely or only the queue sizes. Return it as JSON."""
+        key = KEY_PREFIX + get_account_key(token)
+        backends = self.get_backends(token)
+        now = time.time()
+        catalog = None if calibration else self.redis.hget(key, 'catalog')
+        if catalog is None:
+            catalog = json.dumps(self.get_metrics(backends))
+            self.redis.hset(key, mapping={'catalog': catalog, 'queue-updated': now, 'calibration-updated': now})
+            return catalog
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            statuses = {status.backend_name: status for status in executor.map(lambda backend: backend.status(),
+                                                                               backends)}
+        catalog = json.loads(catalog)
+        for qpu in catalog['_embedded']['qpuDtoes']:
+            if qpu['name'] in statuses:
+                qpu['queueSize'] = statuses[qpu['name']].pending_jobs
+                qpu['lastUpdated'] = datetime.utcfromtimestamp(now).isoformat()
+        catalog = json.dumps(catalog)
+        self.redis.hset(key, mapping={'catalog': catalog, 'queue-updated': now})
+        return catalog
+
+    def get_backends(self, token):
+        return ibmq_handler.get_session(token).provider.backends()
+
+    def get_metrics(self, backends):
+        return qpu_metrics.get_qpus_and_metrics(backends, self.threads)
+
+    def refresh_all(self):
+        """Refresh the outdated queue sizes and calibrations of all accounts requested recently and remove the
+        catalogs of the others"""
+        now = time.time()
+        for account_key, record in self.redis.hgetall(ACCOUNTS_KEY).items():
+            account_key = account_key.decode() if isinstance(account_key, bytes) else account_key
+            record = json.loads(record)
+            if now - record['requested'] > app.config['QPU_CATALOG_IDLE_TIMEOUT']:
+                self.redis.hdel(ACCOUNTS_KEY, account_key)
+                self.redis.delete(KEY_PREFIX + account_key)
+                continue
+            if 'encrypted-token' not in record:
+                continue
+            queue_updated, calibration_updated = self.redis.hmget(KEY_PREFIX + account_key, 'queue-updated',
+                                                                  'calibration-updated')
+            try:
+                token = encryption.decrypt(record['encrypted-token'])
+                if calibration_updated is None or \
+                        now - float(calibration_updated) >= app.config['QPU_CATALOG_CALIBRATION_INTERVAL']:
+                    self.refresh(token)
+                elif now - float(queue_updated) >= app.config['QPU_CATALOG_QUEUE_INTERVAL']:
+                    self.refresh(token, calibration=False)
+            except Exception:
+                app.logger.exception("Refreshing the QPU catalog of an account failed")
+
+    def run(self):
+        app.logger.info("QPU catalog refresher started")
+        while True:
+            self.refresh_all()
+            time.sleep(app.config['QPU_CATALOG_QUEUE_INTERVAL'])
+
+
+def main():
+    QpuCatalog().run()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,14 +1,17 @@
 import time
 from datetime import datetime
 from hashlib import sha256
-from multiprocessing import Pool
+from concurrent.futures import ThreadPoolExecutor
 from typing import List
 from uuid import UUID
 
-from qiskit.providers.ibmq import IBMQ, IBMQBackend
+from qiskit.providers.ibmq import IBMQBackend
 from marshmallow import Schema, fields
 from qiskit.providers.ibmq.ibmqbackend import IBMQSimulator
 
+from app import ibmq_handler
+from app.calibration import CalibrationSnapshot
+
 
 class Qpu:
 	def __init__(
@@ -80,7 +83,6 @@ def generate_deterministic_uuid(namespace: str, name: str) -> UUID:
 
 
 def backend_to_dto(backend: IBMQBackend) -> Qpu:
-	properties = backend.properties()
 	status = backend.status()
 
 	backend_name = status.backend_name
@@ -99,88 +101,34 @@ def backend_to_dto(backend: IBMQBackend) -> Qpu:
 			avg_t2_time=0, avg_readout_error=0, avg_single_qubit_gate_error=0, avg_multi_qubit_gate_error=0,
 			avg_single_qubit_gate_time=0, avg_multi_qubit_gate_time=0, max_gate_time=0, simulator=True)
 	else:
-		number_of_qubits = len(properties.qubits)
-		sum_t1 = 0
-		sum_t2 = 0
-		sum_readout_error = 0
-
-		for qubit in properties.qubits:
-			for property in qubit:
-				if property.name == "T1":
-					sum_t1 += property.value
-				if property.name == "T2":
-					sum_t2 += property.value
-				if property.name == "readout_error":
-					sum_readout_error += property.value
-
-		avg_t1 = sum_t1 / number_of_qubits
-		avg_t2 = sum_t2 / number_of_qubits
-		avg_readout_error = sum_readout_error / number_of_qubits
-
-		sum_single_qubit_gate_error = 0
-		sum_single_qubit_gate_time = 0
-		single_qubit_gate_cnt = 0
-		sum_multi_qubit_gate_error = 0
-		sum_multi_qubit_gate_time = 0
-		multi_qubit_gate_cnt = 0
-		max_gate_time = 0
-
-		for gate in properties.gates:
-			# ignoring reset gates as they have high gate lengths and are not common at the moment
-			if gate != "reset":
-				if len(gate.qubits) == 1:
-					for param in gate.parameters:
-						if param.name == "gate_error":
-							sum_single_qubit_gate_error += param.value
-						if param.name == "gate_length":
-							sum_single_qubit_gate_time += param.value
-							max_gate_time = max(max_gate_time, param.value)
-					single_qubit_gate_cnt += 1
-				if len(gate.qubits) == 2:
-					for param in gate.parameters:
-						if param.name == "gate_error":
-							sum_multi_qubit_gate_error += param.value
-							max_gate_time = max(max_gate_time, param.value)
-						if param.name == "gate_length":
-							sum_multi_qubit_gate_time += param.value
-					multi_qubit_gate_cnt += 1
-
-		avg_single_qubit_gate_error = sum_single_qubit_gate_error / single_qubit_gate_cnt
-		avg_single_qubit_gate_time = sum_single_qubit_gate_time / single_qubit_gate_cnt
-		avg_multi_qubit_gate_error = 0
-
-		if multi_qubit_gate_cnt != 0:
-			avg_multi_qubit_gate_error = sum_multi_qubit_gate_error / multi_qubit_gate_cnt
-
-		avg_multi_qubit_gate_time = 0
-
-		if multi_qubit_gate_cnt != 0:
-			avg_multi_qubit_gate_time = sum_multi_qubit_gate_time / multi_qubit_gate_cnt
-
-		last_calibrated_with_timezone: datetime = properties.last_update_date
+		snapshot = CalibrationSnapshot.from_backend(backend)
+
+		last_calibrated_with_timezone: datetime = snapshot.last_update_date
 		last_calibrated_utc = datetime.utcfromtimestamp(last_calibrated_with_timezone.timestamp()).isoformat()
 
 		return Qpu(
 			id=str(qpu_id), name=backend_name, version=backend_version, last_updated=last_updated_utc,
-			last_calibrated=last_calibrated_utc, max_shots=max_shots, queue_size=queue_size, number_of_qubits=number_of_qubits,
-			avg_t1_time=avg_t1, avg_t2_time=avg_t2, avg_readout_error=avg_readout_error,
-			avg_single_qubit_gate_error=avg_single_qubit_gate_error, avg_multi_qubit_gate_error=avg_multi_qubit_gate_error,
-			avg_single_qubit_gate_time=avg_single_qubit_gate_time, avg_multi_qubit_gate_time=avg_multi_qubit_gate_time,
-			max_gate_time=max_gate_time, simulator=False)
-
+			last_calibrated=last_calibrated_utc, max_shots=max_shots, queue_size=queue_size,
+			number_of_qubits=snapshot.number_of_qubits, avg_t1_time=snapshot.avg_t1_time, avg_t2_time=snapshot.avg_t2_time,
+			avg_readout_error=snapshot.avg_readout_error, avg_single_qubit_gate_error=snapshot.avg_single_qubit_gate_error,
+			avg_multi_qubit_gate_error=snapshot.avg_multi_qubit_gate_error,
+			avg_single_qubit_gate_time=snapshot.avg_single_qubit_gate_time,
+			avg_multi_qubit_gate_time=snapshot.avg_multi_qubit_gate_time, max_gate_time=snapshot.max_gate_time,
+			simulator=False)
 
-def get_all_qpus_and_metrics_as_json_str(token: str):
-	try:
-		IBMQ.disable_account()
-	except:
-		pass
-
-	account_provider = IBMQ.enable_account(token)
-	backends = account_provider.backends()
 
-	with Pool(16) as p:
-		qpu_dtoes = p.map(backend_to_dto, backends)
+def get_qpus_and_metrics(backends, threads: int = 16):
+	# the requests to the provider are network-bound, so they run in threads instead of forked processes
+	with ThreadPoolExecutor(threads) as executor:
+		qpu_dtoes = list(executor.map(backend_to_dto, backends))
 
 	result = QpuListEmbedded(QpuList(qpu_dtoes))
 
 	return QpuListEmbeddedSchema().dump(result)
+
+
+def get_all_qpus_and_metrics_as_json_str(token: str):
+	account_provider = ibmq_handler.get_session(token).provider
+	backends = account_provider.backends()
+
+	return get_qpus_and_metrics(backends)
@@ -0,0 +1,143 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""Notify waiting requests when results are completed.
+
+Committing a result with complete=True publishes its id on a Redis channel, wherever the result is completed. Each
+web worker process subscribes to these channels with a single connection and wakes the requests waiting for the
+result. Pub/sub messages are not persisted, so waiting requests still check the database in long intervals and when
+Redis is unavailable."""
+
+import os
+import threading
+import time
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app import app
+from app.result_model import Result
+
+CHANNEL_PREFIX = 'qiskit-service:results:'
+
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_completed_results(session, flush_context, instances):
+    for instance in [*session.new, *session.dirty]:
+        if isinstance(instance, Result) and instance.complete and inspect(instance).attrs.complete.history.added:
+            session.info.setdefault('completed_results', set()).add(instance.id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_completed_results(session):
+    for result_id in session.info.pop('completed_results', ()):
+        publish(result_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_completed_results(session):
+    session.info.pop('completed_results', None)
+
+
+def publish(result_id):
+    try:
+        app.redis.publish(CHANNEL_PREFIX + result_id, 'complete')
+    except RedisError as e:
+        app.logger.warning(f"Could not publish completion of result {result_id}: {str(e)}")
+
+
+class ResultListener:
+    """Subscribes to the completion of all results and sets the events of the threads waiting for them"""
+
+    def __init__(self, redis, retry_interval=5):
+        self.redis = redis
+        self.retry_interval = retry_interval
+        self.waiters = {}
+        self.lock = threading.Lock()
+        threading.Thread(target=self.listen, name='result-listener', daemon=True).start()
+
+    def register(self, result_id):
+        waiter = threading.Event()
+        with self.lock:
+            self.waiters.setdefault(result_id, set()).add(waiter)
+        return waiter
+
+    def unregister(self, result_id, waiter):
+        with self.lock:
+            waiters = self.waiters.get(result_id, set())
+            waiters.discard(waiter)
+            if not waiters:
+                self.waiters.pop(result_id, None)
+
+    def notify(self, result_id):
+        with self.lock:
+            for waiter in self.waiters.get(result_id, ()):
+                waiter.set()
+
+    def listen(self):
+        warn = True
+        while True:
+            try:
+                pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(CHANNEL_PREFIX + '*')
+                warn = True
+                for message in pubsub.listen():
+                    if message['type'] == 'pmessage':
+                        self.notify(message['channel'].decode()[len(CHANNEL_PREFIX):])
+            except Exception as e:
+                # waiting requests fall back to checking the database until the listener is subscribed again
+                if warn:
+                    app.logger.warning(f"Result listener unavailable: {str(e)}")
+                    warn = False
+            time.sleep(self.retry_interval)
+
+
+def get_listener():
+    """Get the result listener of this process. Processes forked afterwards start their own listener thread."""
+    global _listener, _listener_pid
+    with _listener_lock:
+        if _listener is None or _listener_pid != os.getpid():
+            _listener = ResultListener(app.redis)
+            _listener_pid = os.getpid()
+        return _listener
+
+
+def wait_for_result(result_id, timeout, is_complete, poll_interval=None):
+    """Wait up to timeout seconds until is_complete() is true. It is checked initially, whenever the result is
+    published as completed, and every poll interval. Return whether the result is complete."""
+    poll_interval = poll_interval or app.config['RESULT_WAIT_POLL_INTERVAL']
+    deadline = time.monotonic() + timeout
+    listener = get_listener()
+    # register before the first check, so a completion in between is not missed
+    waiter = listener.register(result_id)
+    try:
+        while not is_complete():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            waiter.wait(min(remaining, poll_interval))
+            waiter.clear()
+        return True
+    finally:
+        listener.unregister(result_id, waiter)
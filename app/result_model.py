@@ -17,17 +17,28 @@
 #  limitations under the License.
 # ******************************************************************************
 
+import datetime
+
 from app import db
+from app.db_types import CompressedText, CountsType
 
 
 class Result(db.Model):
     id = db.Column(db.String(36), primary_key=True)
-    result = db.Column(db.String(1200), default="")
+    result = db.deferred(db.Column(CompressedText, default=""))
+    # counts of the execution in the compact binary format, result holds them as JSON
+    counts = db.deferred(db.Column(CountsType, nullable=True))
+    # expected counts without readout errors, if readout-error mitigation was requested
+    mitigated_counts = db.deferred(db.Column(CountsType, nullable=True))
+    # why the counts were not mitigated, e.g., if no calibration matrix was cached
+    mitigation_error = db.Column(db.String(1200), nullable=True)
     backend = db.Column(db.String(1200), default="")
     shots = db.Column(db.Integer, default=0)
     generated_circuit_id = db.Column(db.String(36), db.ForeignKey('generated__circuit.id'), nullable=True)
-    post_processing_result = db.Column(db.String(1200), default="")
+    post_processing_result = db.deferred(db.Column(CompressedText, default=""))
     complete = db.Column(db.Boolean, default=False)
+    provider_job_id = db.Column(db.String(256), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.datetime.utcnow, index=True)
 
     def __repr__(self):
         return 'Result {}'.format(self.result)
@@ -18,19 +18,23 @@
 # ******************************************************************************
 
 import base64
+import datetime
 import json
+import time
 
-from flask import jsonify, abort, request
-from qiskit import transpile
+from flask import jsonify, abort, request, Response, stream_with_context
 from qiskit.providers.ibmq import IBMQAccountError
 from qiskit.transpiler.exceptions import TranspilerError
+from redis.exceptions import RedisError
+from sqlalchemy import inspect
 
-from app import app, benchmarking, aws_handler, ibmq_handler, implementation_handler, db, parameters, circuit_analysis, \
-    analysis, ionq_handler
+from app import app, benchmarking, implementation_handler, db, parameters, circuit_analysis, analysis, tasks, \
+    transpilation, result_events, counts, qpu_catalog, calibration_history
 from app.benchmark_model import Benchmark
 from app.generated_circuit_model import Generated_Circuit
 from app.qpu_metrics import generate_deterministic_uuid, get_all_qpus_and_metrics_as_json_str
 from app.result_model import Result
+from app.transpilation_model import Transpilation
 
 
 @app.route('/qiskit-service/api/v1.0/generate-circuit', methods=['POST'])
@@ -89,41 +93,45 @@ def get_generated_circuit(generated_circuit_id):
         return jsonify({'id': generated_circuit.id, 'complete': generated_circuit.complete}), 200
 
 
-@app.route('/qiskit-service/api/v1.0/transpile', methods=['POST'])
-def transpile_circuit():
-    """Get implementation from URL. Pass input into implementation. Generate and transpile circuit
-    and return depth and width."""
-
-    if not request.json or not 'qpu-name' in request.json:
-        abort(400)
-
-    # Default value is ibmq for services that do not support multiple providers and expect the IBMQ provider
-    provider = request.json.get('provider', 'ibmq')
-    qpu_name = request.json['qpu-name']
-    impl_language = request.json.get('impl-language', '')
-    input_params = request.json.get('input-params', "")
-    impl_url = request.json.get('impl-url', "")
-    bearer_token = request.json.get("bearer-token", "")
-    if input_params:
-        input_params = parameters.ParameterDictionary(input_params)
-
+def get_credentials_from_request(provider, input_params, source=None):
+    """Get the credentials for the provider from the input params or the request, or from the given source, e.g., a
+    target of the request. Return them as keyword arguments of tasks.get_backend."""
+    source = source or request.json
+    credentials = {}
     if provider == 'ibmq' or provider == 'ionq':
         if 'token' in input_params:
-            token = input_params['token']
-        elif 'token' in request.json:
-            token = request.json.get('token')
+            credentials['token'] = input_params['token']
+        elif 'token' in source:
+            credentials['token'] = source.get('token')
         else:
             abort(400)
     elif provider == 'aws':
         if 'aws-access-key-id' in input_params and 'aws-secret-access-key' in input_params:
-            aws_access_key_id = input_params['aws-access-key-id']
-            aws_secret_access_key = input_params['aws-secret-access-key']
-        elif 'aws-access-key-id' in request.json and 'aws-secret-access-key' in request.json:
-            aws_access_key_id = request.json.get('aws-access-key-id')
-            aws_secret_access_key = request.json.get('aws-secret-access-key')
+            credentials['access_key_aws'] = input_params['aws-access-key-id']
+            credentials['secret_access_key_aws'] = input_params['aws-secret-access-key']
+        elif 'aws-access-key-id' in source and 'aws-secret-access-key' in source:
+            credentials['access_key_aws'] = source.get('aws-access-key-id')
+            credentials['secret_access_key_aws'] = source.get('aws-secret-access-key')
         else:
             abort(400)
 
+    if provider == 'ibmq':
+        for key in ['url', 'hub', 'group', 'project']:
+            if key in input_params:
+                credentials[key] = input_params[key]
+    elif provider == 'aws':
+        if 'region' in input_params:
+            credentials['region'] = input_params['region']
+    return credentials
+
+
+def get_circuit_from_request(input_params):
+    """Get the circuit of the implementation URL, the implementation data, or the OpenQASM string of the request.
+    Return the circuit and a short name of the implementation."""
+    impl_language = request.json.get('impl-language', '')
+    impl_url = request.json.get('impl-url', "")
+    bearer_token = request.json.get("bearer-token", "")
+
     if impl_url is not None and impl_url != "":
         impl_url = request.json['impl-url']
         if impl_language.lower() == 'openqasm':
@@ -152,22 +160,32 @@ def transpile_circuit():
         circuit = implementation_handler.prepare_code_from_qasm(request.json.get('qasm-string'))
     else:
         abort(400)
+    return circuit, short_impl_name
+
+
+@app.route('/qiskit-service/api/v1.0/transpile', methods=['POST'])
+def transpile_circuit():
+    """Get implementation from URL. Pass input into implementation. Generate and transpile circuit
+    and return depth and width."""
+
+    if not request.json or not 'qpu-name' in request.json:
+        abort(400)
+
+    # Default value is ibmq for services that do not support multiple providers and expect the IBMQ provider
+    provider = request.json.get('provider', 'ibmq')
+    qpu_name = request.json['qpu-name']
+    input_params = request.json.get('input-params', "")
+    if input_params:
+        input_params = parameters.ParameterDictionary(input_params)
+
+    credentials = get_credentials_from_request(provider, input_params)
+    circuit, short_impl_name = get_circuit_from_request(input_params)
 
     try:
-        non_transpiled_depth_old = 0
-        non_transpiled_depth = circuit.depth()
-        while non_transpiled_depth_old < non_transpiled_depth:
-            non_transpiled_depth_old = non_transpiled_depth
-            circuit = circuit.decompose()
-            non_transpiled_depth = circuit.depth()
-        non_transpiled_width = circuit_analysis.get_width_of_circuit(circuit)
-        non_transpiled_total_number_of_operations = circuit.size()
-        non_transpiled_number_of_multi_qubit_gates = circuit.num_nonlocal_gates()
-        non_transpiled_number_of_measurement_operations = circuit_analysis.get_number_of_measurement_operations(circuit)
-        non_transpiled_number_of_single_qubit_gates = non_transpiled_total_number_of_operations - non_transpiled_number_of_multi_qubit_gates - non_transpiled_number_of_measurement_operations
-        non_transpiled_multi_qubit_gate_depth, non_transpiled_circuit = circuit_analysis.get_multi_qubit_gate_depth(
-            circuit.copy())
-        print(f"Non transpiled width {non_transpiled_width} & non transpiled depth {non_transpiled_depth}")
+        circuit = circuit_analysis.unroll_circuit(circuit)
+        non_transpiled_metrics = circuit_analysis.CircuitMetrics.from_circuit(circuit)
+        print(f"Non transpiled width {non_transpiled_metrics.width} & non transpiled depth "
+              f"{non_transpiled_metrics.depth}")
         if not circuit:
             app.logger.warn(f"{short_impl_name} not found.")
             abort(404)
@@ -175,134 +193,144 @@ def transpile_circuit():
         app.logger.info(f"Transpile {short_impl_name} for {qpu_name}: {str(e)}")
         return jsonify({'error': str(e)}), 200
 
-    backend = None
-    credentials = {}
-    if provider == 'ibmq':
-        if 'url' in input_params:
-            credentials['url'] = input_params['url']
-        if 'hub' in input_params:
-            credentials['hub'] = input_params['hub']
-        if 'group' in input_params:
-            credentials['group'] = input_params['group']
-        if 'project' in input_params:
-            credentials['project'] = input_params['project']
-        backend = ibmq_handler.get_qpu(token, qpu_name, **credentials)
-    elif provider == 'ionq':
-        backend = ionq_handler.get_qpu(token, qpu_name)
-    elif provider == 'aws':
-        if 'region' in input_params:
-            credentials['region'] = input_params['region']
-        backend = aws_handler.get_qpu(access_key=aws_access_key_id, secret_access_key=aws_secret_access_key,
-                                      qpu_name=qpu_name, **credentials)
+    backend = tasks.get_backend(provider, qpu_name, **credentials)
     if not backend:
         app.logger.warn(f"{qpu_name} not found.")
         abort(404)
 
     try:
-        if provider == 'aws':
-            transpiled_circuit = transpile(circuit, backend=backend)
-        else:
-            transpiled_circuit = transpile(circuit, backend=backend, optimization_level=3)
-        width = circuit_analysis.get_width_of_circuit(transpiled_circuit)
-        depth = transpiled_circuit.depth()
-        total_number_of_operations = transpiled_circuit.size()
-        number_of_multi_qubit_gates = transpiled_circuit.num_nonlocal_gates()
-        number_of_measurement_operations = circuit_analysis.get_number_of_measurement_operations(transpiled_circuit)
-        number_of_single_qubit_gates = total_number_of_operations - number_of_multi_qubit_gates - number_of_measurement_operations
-        multi_qubit_gate_depth, transpiled_circuit = circuit_analysis.get_multi_qubit_gate_depth(transpiled_circuit)
-
+        transpiled_circuit, metrics = transpilation.transpile_for_backend(circuit, provider, backend)
     except TranspilerError:
         app.logger.info(f"Transpile {short_impl_name} for {qpu_name}: too many qubits required")
         return jsonify({'error': 'too many qubits required'}), 200
 
-    app.logger.info(f"Transpile {short_impl_name} for {qpu_name}: w={width}, "
-                    f"d={depth}, "
-                    f"multi qubit gate depth={multi_qubit_gate_depth}, "
-                    f"total number of operations={total_number_of_operations}, "
-                    f"number of single qubit gates={number_of_single_qubit_gates}, "
-                    f"number of multi qubit gates={number_of_multi_qubit_gates}, "
-                    f"number of measurement operations={number_of_measurement_operations}")
-    return jsonify({'original-depth': non_transpiled_depth, 'original-width': non_transpiled_width,
-                    'original-total-number-of-operations': non_transpiled_total_number_of_operations,
-                    'original-number-of-multi-qubit-gates': non_transpiled_number_of_multi_qubit_gates,
-                    'original-number-of-measurement-operations': non_transpiled_number_of_measurement_operations,
-                    'original-number-of-single-qubit-gates': non_transpiled_number_of_single_qubit_gates,
-                    'original-multi-qubit-gate-depth': non_transpiled_multi_qubit_gate_depth, 'depth': depth,
-                    'multi-qubit-gate-depth': multi_qubit_gate_depth, 'width': width,
-                    'total-number-of-operations': total_number_of_operations,
-                    'number-of-single-qubit-gates': number_of_single_qubit_gates,
-                    'number-of-multi-qubit-gates': number_of_multi_qubit_gates,
-                    'number-of-measurement-operations': number_of_measurement_operations,
+    app.logger.info(f"Transpile {short_impl_name} for {qpu_name}: w={metrics['width']}, "
+                    f"d={metrics['depth']}, "
+                    f"multi qubit gate depth={metrics['multi-qubit-gate-depth']}, "
+                    f"total number of operations={metrics['total-number-of-operations']}, "
+                    f"number of single qubit gates={metrics['number-of-single-qubit-gates']}, "
+                    f"number of multi qubit gates={metrics['number-of-multi-qubit-gates']}, "
+                    f"number of measurement operations={metrics['number-of-measurement-operations']}")
+    return jsonify({**non_transpiled_metrics.to_json(prefix='original-'), **metrics,
                     'transpiled-qasm': transpiled_circuit.qasm()}), 200
 
 
-@app.route('/qiskit-service/api/v1.0/analyze-original-circuit', methods=['POST'])
-def analyze_original_circuit():
-    if not request.json:
+@app.route('/qiskit-service/api/v1.0/transpile/batch', methods=['POST'])
+def transpile_circuit_for_targets():
+    """Generate the circuit once and transpile it for several QPUs in parallel. Return the analyzed properties of the
+    original and the transpiled circuit for each QPU."""
+
+    if not request.json or not request.json.get('targets'):
+        abort(400)
+
+    input_params = request.json.get('input-params', "")
+    if input_params:
+        input_params = parameters.ParameterDictionary(input_params)
+
+    targets = []
+    for target in request.json['targets']:
+        if 'qpu-name' not in target:
+            abort(400)
+        # Default value is ibmq for services that do not support multiple providers and expect the IBMQ provider
+        provider = target.get('provider', 'ibmq')
+        credentials = get_credentials_from_request(provider, input_params, {**request.json, **target})
+        targets.append((provider, target['qpu-name'], credentials))
+
+    circuit, short_impl_name = get_circuit_from_request(input_params)
+    try:
+        circuit = circuit_analysis.unroll_circuit(circuit)
+        non_transpiled_metrics = circuit_analysis.CircuitMetrics.from_circuit(circuit).to_json(prefix='original-')
+    except Exception as e:
+        app.logger.info(f"Transpile {short_impl_name}: {str(e)}")
+        return jsonify({'error': str(e)}), 200
+
+    results = transpilation.transpile_for_targets(circuit, targets)
+    app.logger.info(f"Transpiled {short_impl_name} for {len(targets)} QPUs")
+    return jsonify([{'provider': provider, 'qpu-name': qpu_name, **non_transpiled_metrics, **result}
+                    for (provider, qpu_name, _), result in zip(targets, results)]), 200
+
+
+@app.route('/qiskit-service/api/v1.0/transpile/async', methods=['POST'])
+def transpile_circuit_async():
+    """Enqueue the generation and transpilation of the circuit. The result is available as a transpilation resource
+    afterwards."""
+
+    if not request.json or not 'qpu-name' in request.json:
         abort(400)
 
+    # Default value is ibmq for services that do not support multiple providers and expect the IBMQ provider
+    provider = request.json.get('provider', 'ibmq')
+    qpu_name = request.json['qpu-name']
     impl_language = request.json.get('impl-language', '')
     impl_url = request.json.get('impl-url', "")
-    input_params = request.json.get('input-params', "")
     bearer_token = request.json.get("bearer-token", "")
+    qasm_string = request.json.get('qasm-string', "")
+    impl_data = ''
+    input_params = request.json.get('input-params', "")
     if input_params:
         input_params = parameters.ParameterDictionary(input_params)
 
+    credentials = get_credentials_from_request(provider, input_params)
     if impl_url is not None and impl_url != "":
         impl_url = request.json['impl-url']
-        if impl_language.lower() == 'openqasm':
-            short_impl_name = 'no name'
-            circuit = implementation_handler.prepare_code_from_qasm_url(impl_url, bearer_token)
-        else:
-            short_impl_name = "untitled"
-            try:
-                circuit = implementation_handler.prepare_code_from_url(impl_url, input_params, bearer_token)
-            except ValueError:
-                abort(400)
     elif 'impl-data' in request.json:
         impl_data = base64.b64decode(request.json.get('impl-data').encode()).decode()
-        short_impl_name = 'no short name'
-        if impl_language.lower() == 'openqasm':
-            circuit = implementation_handler.prepare_code_from_qasm(impl_data)
-        else:
-            try:
-                circuit = implementation_handler.prepare_code_from_data(impl_data, input_params)
-            except ValueError:
-                abort(400)
-    elif 'qasm-string' in request.json:
-        short_impl_name = 'no short name'
-        app.logger.info(request.json.get('qasm-string'))
-        circuit = implementation_handler.prepare_code_from_qasm(request.json.get('qasm-string'))
+    elif not qasm_string:
+        abort(400)
+
+    job = app.transpile_queue.enqueue('app.tasks.transpile', provider=provider, qpu_name=qpu_name, impl_url=impl_url,
+                                      impl_data=impl_data, impl_language=impl_language, qasm_string=qasm_string,
+                                      input_params=input_params, bearer_token=bearer_token, credentials=credentials)
+
+    result = Transpilation(id=job.get_id(), provider=provider, backend=qpu_name)
+    db.session.add(result)
+    db.session.commit()
+
+    app.logger.info('Returning HTTP response to client...')
+    content_location = '/qiskit-service/api/v1.0/transpilations/' + result.id
+    response = jsonify({'Location': content_location})
+    response.status_code = 202
+    response.headers['Location'] = content_location
+    response.autocorrect_location_header = True
+    return response
+
+
+@app.route('/qiskit-service/api/v1.0/transpilations/<transpilation_id>', methods=['GET'])
+def get_transpilation(transpilation_id):
+    """Return the analyzed properties of the original and the transpiled circuit when they are available."""
+    transpilation_result = Transpilation.query.get(transpilation_id)
+    if transpilation_result is None:
+        abort(404)
+    if transpilation_result.complete:
+        return jsonify({'id': transpilation_result.id, 'complete': transpilation_result.complete,
+                        'provider': transpilation_result.provider, 'qpu-name': transpilation_result.backend,
+                        **json.loads(transpilation_result.result)}), 200
     else:
+        return jsonify({'id': transpilation_result.id, 'complete': transpilation_result.complete}), 200
+
+
+@app.route('/qiskit-service/api/v1.0/analyze-original-circuit', methods=['POST'])
+def analyze_original_circuit():
+    if not request.json:
         abort(400)
 
+    input_params = request.json.get('input-params', "")
+    if input_params:
+        input_params = parameters.ParameterDictionary(input_params)
+
+    circuit, short_impl_name = get_circuit_from_request(input_params)
+
     try:
-        non_transpiled_depth_old = 0
-        non_transpiled_depth = circuit.depth()
-        while non_transpiled_depth_old < non_transpiled_depth:
-            non_transpiled_depth_old = non_transpiled_depth
-            circuit = circuit.decompose()
-            non_transpiled_depth = circuit.depth()
-        non_transpiled_width = circuit_analysis.get_width_of_circuit(circuit)
-        non_transpiled_total_number_of_operations = circuit.size()
-        non_transpiled_number_of_multi_qubit_gates = circuit.num_nonlocal_gates()
-        non_transpiled_number_of_measurement_operations = circuit_analysis.get_number_of_measurement_operations(circuit)
-        non_transpiled_number_of_single_qubit_gates = non_transpiled_total_number_of_operations - non_transpiled_number_of_multi_qubit_gates - non_transpiled_number_of_measurement_operations
-        non_transpiled_multi_qubit_gate_depth, non_transpiled_circuit = circuit_analysis.get_multi_qubit_gate_depth(
-            circuit)
-        print(f"Non transpiled width {non_transpiled_width} & non transpiled depth {non_transpiled_depth}")
+        non_transpiled_metrics = circuit_analysis.CircuitMetrics.from_circuit(circuit, unroll=True)
+        print(f"Non transpiled width {non_transpiled_metrics.width} & non transpiled depth "
+              f"{non_transpiled_metrics.depth}")
         if not circuit:
             app.logger.warn(f"{short_impl_name} not found.")
             abort(404)
     except Exception as e:
         return jsonify({'error': str(e)}), 200
 
-    return jsonify({'original-depth': non_transpiled_depth, 'original-width': non_transpiled_width,
-                    'original-total-number-of-operations': non_transpiled_total_number_of_operations,
-                    'original-number-of-multi-qubit-gates': non_transpiled_number_of_multi_qubit_gates,
-                    'original-number-of-measurement-operations': non_transpiled_number_of_measurement_operations,
-                    'original-number-of-single-qubit-gates': non_transpiled_number_of_single_qubit_gates,
-                    'original-multi-qubit-gate-depth': non_transpiled_multi_qubit_gate_depth}), 200
+    return jsonify(non_transpiled_metrics.to_json(prefix='original-')), 200
 
 
 @app.route('/qiskit-service/api/v1.0/execute', methods=['POST'])
@@ -335,6 +363,10 @@ def execute_circuit():
     noise_model = request.json.get("noise-model")
     only_measurement_errors = request.json.get("only-measurement-errors")
     optimization_level = request.json.get('transpilation-optimization-level', 3)
+    readout_mitigation = request.json.get('readout-mitigation')
+    if readout_mitigation is not None and (readout_mitigation not in ['tensored', 'complete'] or provider != 'ibmq'
+                                           or noise_model):
+        abort(400)
     if input_params:
         input_params = parameters.ParameterDictionary(input_params)
 
@@ -383,7 +415,7 @@ def execute_circuit():
                                     input_params=input_params, noise_model=noise_model,
                                     only_measurement_errors=only_measurement_errors,
                                     optimization_level=optimization_level, shots=shots, bearer_token=bearer_token,
-                                    qasm_string=qasm_string, **credentials)
+                                    qasm_string=qasm_string, readout_mitigation=readout_mitigation, **credentials)
 
     result = Result(id=job.get_id(), backend=qpu_name, shots=shots)
     db.session.add(result)
@@ -406,9 +438,15 @@ def calculate_calibration_matrix():
     qpu_name = request.json['qpu-name']
     token = request.json['token']
     shots = request.json.get('shots', 8192)
+    qubits = request.json.get('qubits')
+    tensored = request.json.get('tensored', False)
+    if qubits is not None and (not isinstance(qubits, list) or not all(isinstance(qubit, int) for qubit in qubits)):
+        abort(400)
+    if not isinstance(tensored, bool):
+        abort(400)
 
     job = app.execute_queue.enqueue('app.tasks.calculate_calibration_matrix', qpu_name=qpu_name, token=token,
-                                    shots=shots)
+                                    shots=shots, qubits=qubits, tensored=tensored)
     result = Result(id=job.get_id())
     db.session.add(result)
     db.session.commit()
@@ -454,24 +492,150 @@ def randomize():
     return jsonify(0)
 
 
-@app.route('/qiskit-service/api/v1.0/results/<result_id>', methods=['GET'])
-def get_result(result_id):
-    """Return result when it is available."""
-    result = Result.query.get(result_id)
+def get_result_json(result):
     if result.complete:
         result_dict = json.loads(result.result)
         if result.post_processing_result:
             post_processing_result_dict = json.loads(result.post_processing_result)
-            return jsonify(
-                {'id': result.id, 'complete': result.complete, 'result': result_dict, 'backend': result.backend,
-                 'shots': result.shots, 'generated-circuit-id': result.generated_circuit_id,
-                 'post-processing-result': post_processing_result_dict}), 200
+            result_json = {'id': result.id, 'complete': result.complete, 'result': result_dict,
+                           'backend': result.backend, 'shots': result.shots,
+                           'generated-circuit-id': result.generated_circuit_id,
+                           'post-processing-result': post_processing_result_dict}
         else:
-            return jsonify(
-                {'id': result.id, 'complete': result.complete, 'result': result_dict, 'backend': result.backend,
-                 'shots': result.shots}), 200
+            result_json = {'id': result.id, 'complete': result.complete, 'result': result_dict,
+                           'backend': result.backend, 'shots': result.shots}
+        if result.mitigated_counts is not None:
+            result_json['mitigated-counts'] = counts.to_json(result.mitigated_counts)
+        if result.mitigation_error is not None:
+            result_json['mitigation-error'] = result.mitigation_error
+        return result_json
     else:
-        return jsonify({'id': result.id, 'complete': result.complete}), 200
+        return {'id': result.id, 'complete': result.complete}
+
+
+def wait_for_result(result, timeout):
+    """Wait up to timeout seconds until the result is complete. Return whether it is complete. The database connection
+    is returned to the pool while waiting, the result is reloaded when it is accessed afterwards."""
+    result_id = inspect(result).identity[0]
+
+    def is_complete():
+        complete = db.session.query(Result.complete).filter(Result.id == result_id).scalar()
+        # end the transaction, so no connection is held and no read transaction is open while waiting
+        db.session.rollback()
+        return complete
+
+    return result_events.wait_for_result(result_id, timeout, is_complete)
+
+
+@app.route('/qiskit-service/api/v1.0/results/<result_id>', methods=['GET'])
+def get_result(result_id):
+    """Return result when it is available. With ?wait=<seconds>, wait up to the given seconds for a pending result
+    before returning."""
+    result = Result.query.get(result_id)
+    if result is None:
+        abort(404)
+    wait = request.args.get('wait', type=float)
+    if wait and not result.complete:
+        wait_for_result(result, min(wait, app.config['RESULT_WAIT_MAX_TIMEOUT']))
+    return jsonify(get_result_json(result)), 200
+
+
+@app.route('/qiskit-service/api/v1.0/results/<result_id>/events', methods=['GET'])
+def get_result_events(result_id):
+    """Stream a server-sent 'complete' event with the result once it is available. Keep-alive comments are sent while
+    waiting, and a 'timeout' event ends the stream if the result is still pending after RESULT_EVENTS_TIMEOUT seconds,
+    after which clients reconnect."""
+    result = Result.query.get(result_id)
+    if result is None:
+        abort(404)
+
+    def generate():
+        deadline = time.monotonic() + app.config['RESULT_EVENTS_TIMEOUT']
+        # check immediately, so the response starts without waiting for the first keep-alive
+        timeout = 0
+        while not wait_for_result(result, timeout):
+            if time.monotonic() >= deadline:
+                yield 'event: timeout\ndata: {}\n\n'
+                return
+            yield ': keep-alive\n\n'
+            timeout = min(app.config['RESULT_EVENTS_KEEP_ALIVE_INTERVAL'], max(deadline - time.monotonic(), 0))
+        yield f"event: complete\ndata: {json.dumps(get_result_json(result))}\n\n"
+
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+# response keys of the result columns that can be requested by a result query
+RESULT_QUERY_FIELDS = {'complete': Result.complete, 'backend': Result.backend, 'shots': Result.shots,
+                       'result': Result.result, 'post-processing-result': Result.post_processing_result,
+                       'mitigated-counts': Result.mitigated_counts, 'mitigation-error': Result.mitigation_error,
+                       'generated-circuit-id': Result.generated_circuit_id, 'created-at': Result.created_at}
+
+
+def parse_datetime(value):
+    """Parse an ISO 8601 date and time, naive ones are UTC like the creation times of results"""
+    date_time = datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if date_time.tzinfo:
+        date_time = date_time.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return date_time
+
+
+def get_result_field_json(field, value):
+    if field in ['result', 'post-processing-result']:
+        return json.loads(value) if value else None
+    if field == 'created-at':
+        return value.isoformat() if value else None
+    if field == 'mitigated-counts':
+        return counts.to_json(value)
+    return value
+
+
+@app.route('/qiskit-service/api/v1.0/results/query', methods=['POST'])
+def query_results():
+    """Return the results with the given ids or matching the given filters, ordered by id. Only the requested fields
+    are loaded, and the next page is requested with the returned cursor."""
+    if request.json is None:
+        abort(400)
+
+    fields = request.json.get('fields', list(RESULT_QUERY_FIELDS))
+    limit = request.json.get('limit', app.config['RESULT_QUERY_PAGE_SIZE'])
+    if not isinstance(fields, list) or any(field not in RESULT_QUERY_FIELDS for field in fields):
+        abort(400)
+    if not isinstance(limit, int) or not 0 < limit <= app.config['RESULT_QUERY_MAX_PAGE_SIZE']:
+        abort(400)
+    ids = request.json.get('ids')
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(result_id, str) for result_id in ids)
+                            or len(ids) > app.config['RESULT_QUERY_MAX_PAGE_SIZE']):
+        abort(400)
+    if 'complete' in request.json and not isinstance(request.json['complete'], bool):
+        abort(400)
+
+    query = db.session.query(Result.id, *[RESULT_QUERY_FIELDS[field] for field in fields])
+    if ids is not None:
+        query = query.filter(Result.id.in_(ids))
+    if 'backend' in request.json:
+        query = query.filter(Result.backend == request.json['backend'])
+    if 'complete' in request.json:
+        query = query.filter(Result.complete == request.json['complete'])
+    if 'generated-circuit-id' in request.json:
+        query = query.filter(Result.generated_circuit_id == request.json['generated-circuit-id'])
+    try:
+        if 'created-after' in request.json:
+            query = query.filter(Result.created_at >= parse_datetime(request.json['created-after']))
+        if 'created-before' in request.json:
+            query = query.filter(Result.created_at < parse_datetime(request.json['created-before']))
+    except (AttributeError, ValueError):
+        abort(400)
+    if request.json.get('cursor'):
+        query = query.filter(Result.id > request.json['cursor'])
+
+    # one more row than requested tells whether there is a next page
+    rows = query.order_by(Result.id).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return jsonify({'results': [{'id': row[0], **{field: get_result_field_json(field, value)
+                                                  for field, value in zip(fields, row[1:])}}
+                                for row in rows[:limit]],
+                    'next-cursor': next_cursor}), 200
 
 
 @app.route('/qiskit-service/api/v1.0/benchmarks/<benchmark_id>', methods=['GET'])
@@ -496,17 +660,12 @@ def get_benchmark(benchmark_id):
                 return json.dumps({'error': 'execution failed'})
 
             # both backends finished execution
+            comparison = analysis.compare_histograms(benchmark_sim.counts, benchmark_real.counts, benchmark_real.shots)
             return jsonify({'id': int(benchmark_id), 'benchmarking-complete': True,
-                            'histogram-intersection': analysis.calc_intersection(
-                                json.loads(benchmark_sim.counts).copy(), json.loads(benchmark_real.counts).copy(),
-                                benchmark_real.shots),
-                            'perc-error': analysis.calc_percentage_error(json.loads(benchmark_sim.counts),
-                                                                         json.loads(benchmark_real.counts)),
-                            'correlation': analysis.calc_correlation(json.loads(benchmark_sim.counts).copy(),
-                                                                     json.loads(benchmark_real.counts).copy(),
-                                                                     benchmark_real.shots),
-                            'chi-square': analysis.calc_chi_square_distance(json.loads(benchmark_sim.counts).copy(),
-                                                                            json.loads(benchmark_real.counts).copy()),
+                            'histogram-intersection': comparison['histogram-intersection'],
+                            'perc-error': comparison['percentage-error'],
+                            'correlation': comparison['correlation'],
+                            'chi-square': comparison['chi-square'],
                             'benchmarking-results': [get_benchmark_body(benchmark_backend=benchmark_sim),
                                                      get_benchmark_body(benchmark_backend=benchmark_real)]}), 200
 
@@ -551,7 +710,8 @@ def get_providers():
 
 @app.route('/qiskit-service/api/v1.0/providers/<provider_id>/qpus', methods=['GET'])
 def get_qpus_and_metrics_of_provider(provider_id: str):
-    """Return qpus and metrics of the specified provider."""
+    """Return qpus and metrics of the specified provider. With ?max-age=<seconds>, the queue sizes may be at most the
+    given seconds old, otherwise they are refreshed before returning."""
 
     if 'token' not in request.headers:
         return jsonify({"message": "Error: token missing in request"}), 401
@@ -559,42 +719,59 @@ def get_qpus_and_metrics_of_provider(provider_id: str):
     token = request.headers.get('token')
 
     if provider_id == str(generate_deterministic_uuid("ibmq", "provider")):
+        max_age = request.args.get('max-age', default=app.config['QPU_CATALOG_MAX_AGE'], type=float)
         try:
-            return get_all_qpus_and_metrics_as_json_str(token), 200
+            try:
+                return Response(qpu_catalog.QpuCatalog().get(token, max_age), mimetype='application/json'), 200
+            except RedisError as e:
+                app.logger.warning(f"QPU catalog unavailable: {str(e)}")
+                return get_all_qpus_and_metrics_as_json_str(token), 200
         except IBMQAccountError:
             return jsonify({"message": "the provided token is wrong"}), 401
     else:
         return jsonify({"message": "Error: unknown provider ID."}), 400
 
 
+@app.route('/qiskit-service/api/v1.0/calibrations/<backend_name>', methods=['GET'])
+def get_calibration(backend_name):
+    """Return the stored properties of the backend as of the time given by ?at=<ISO 8601 date and time>, or the
+    latest stored properties."""
+    at = None
+    if 'at' in request.args:
+        try:
+            at = parse_datetime(request.args['at'])
+        except ValueError:
+            abort(400)
+    calibration = calibration_history.get_calibration(backend_name, at)
+    if calibration is None:
+        abort(404)
+    return jsonify({'backend': calibration.backend, 'last-update-date': calibration.last_update_date.isoformat(),
+                    'properties': json.loads(calibration.properties)}), 200
+
+
 @app.route('/qiskit-service/api/v1.0/analysis', methods=['GET'])
 def get_analysis():
     """Return analysis of all benchmarks saved in the database"""
-    return jsonify(benchmarking.analyse())
+    return stream_json_list(benchmarking.iter_analysis())
 
 
 @app.route('/qiskit-service/api/v1.0/analysis/<qpu_name>', methods=['GET'])
 def get_analysis_qpu(qpu_name):
     """Return analysis of all benchmarks from a specific quantum computer saved in the database"""
-    benchmarks = Benchmark.query.all()
-    list = []
-    for i in range(0, len(benchmarks), 2):
-        if (benchmarks[i].complete and benchmarks[i + 1].complete) and (
-                benchmarks[i].benchmark_id == benchmarks[i + 1].benchmark_id) and (
-                benchmarks[i].result != "" and benchmarks[i + 1].result != "") and (
-                benchmarks[i + 1].backend == qpu_name):
-            counts_sim = json.loads(benchmarks[i].counts)
-            counts_real = json.loads(benchmarks[i + 1].counts)
-            shots = benchmarks[i + 1].shots
-            perc_error = analysis.calc_percentage_error(counts_sim, counts_real)
-            correlation = analysis.calc_correlation(counts_sim.copy(), counts_real.copy(), shots)
-            chi_square = analysis.calc_chi_square_distance(counts_sim.copy(), counts_real.copy())
-            intersection = analysis.calc_intersection(counts_sim.copy(), counts_real.copy(), shots)
-            list.append({'benchmark-' + str(benchmarks[i].benchmark_id): {
-                'benchmark-location': '/qiskit-service/api/v1.0/benchmarks/' + str(benchmarks[i].benchmark_id),
-                'counts-sim': counts_sim, 'counts-real': counts_real, 'percentage-error': perc_error,
-                'chi-square': chi_square, 'correlation': correlation, 'histogram-intersection': intersection}})
-    return jsonify(list)
+    return stream_json_list(benchmarking.iter_analysis(qpu_name))
+
+
+def stream_json_list(pages):
+    """Stream the items of the pages as one JSON list, while the next page is loaded"""
+    def generate():
+        separator = '['
+        for page in pages:
+            for item in page:
+                yield separator + json.dumps(item)
+                separator = ','
+        yield ']' if separator == ',' else '[]'
+
+    return Response(stream_with_context(generate()), mimetype='application/json')
 
 
 @app.route('/qiskit-service/api/v1.0/version', methods=['GET'])
@@ -605,7 +782,7 @@ def version():
 def get_benchmark_body(benchmark_backend):
     return {'result-id': benchmark_backend.id,
             'result-location': '/qiskit-service/api/v1.0/results/' + benchmark_backend.id,
-            'backend': benchmark_backend.backend, 'counts': json.loads(benchmark_backend.counts),
+            'backend': benchmark_backend.backend, 'counts': counts.to_json(benchmark_backend.counts),
             'original-depth': benchmark_backend.original_depth, 'original-width': benchmark_backend.original_width,
             'original-number-of-multi-qubit-gates': benchmark_backend.original_number_of_multi_qubit_gates,
             'transpiled-depth': benchmark_backend.transpiled_depth,
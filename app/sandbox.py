@@ -0,0 +1,227 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""Run user implementation code in a pool of worker processes.
+
+The workers are started by a forkserver, which is a fresh interpreter that preloads qiskit and the service, so they
+start quickly without inheriting the memory of the calling process, e.g., the provider sessions of other users, or
+locks held by its other threads. The workers neither get the environment nor the database, Redis, or encryption
+settings of the service. Each call executes the code in a fresh module namespace and limits the CPU time, the
+wall-clock time, and the memory of the worker. By default, a worker is replaced after each call, so that no state leaks
+between implementations. Circuits are returned as QPY bytes.
+
+Only the process that started the forkserver can use it, and starting it takes seconds. Thus, rq workers are started
+with the worker class of app.worker, which executes the jobs in the long-lived worker process, so that the forkserver
+and the pool are started once and stay warm. The work horses forked by the default rq worker start a forkserver for
+each job, and processes forked after the forkserver was started execute the implementations in-process without limits.
+
+Implementations whose get_circuit is not deterministic define DETERMINISTIC = False, so that their circuits are not
+cached."""
+
+import io
+import multiprocessing
+import os
+import resource
+import signal
+import threading
+import types
+
+from qiskit import qpy
+
+from app import app
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+# process that started the forkserver of the worker pools of this module and app.transpilation
+_forkserver_pid = None
+_forkserver_lock = threading.Lock()
+
+# environment variables kept for the workers, all others, e.g., the settings of the service, are removed
+WORKER_ENVIRONMENT = ['PATH', 'HOME', 'LANG', 'LC_ALL', 'TMPDIR', 'PYTHONPATH']
+# settings of the service removed from the configuration of the workers
+WORKER_REMOVED_SETTINGS = ['SQLALCHEMY_DATABASE_URI', 'REDIS_URL', 'CREDENTIALS_ENCRYPTION_KEY']
+
+
+class ImplementationError(ValueError):
+    """Raised if the implementation code fails, exceeds its limits, or does not provide a result"""
+
+
+def _raise_cpu_time_limit_exceeded(signum, frame):
+    raise ImplementationError("CPU time limit of the implementation exceeded")
+
+
+def _raise_timeout(signum, frame):
+    raise ImplementationError("Time limit of the implementation exceeded")
+
+
+def _init_worker(memory_limit):
+    for name in list(os.environ):
+        if name not in WORKER_ENVIRONMENT:
+            del os.environ[name]
+    for name in WORKER_REMOVED_SETTINGS:
+        app.config[name] = None
+    app.redis = None
+    if memory_limit:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit * 1024 * 1024, hard))
+    signal.signal(signal.SIGXCPU, _raise_cpu_time_limit_exceeded)
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    # implementations may transpile, which must run single-threaded in the worker
+    os.environ['QISKIT_IN_PARALLEL'] = 'TRUE'
+
+
+def _set_cpu_time_limit(seconds):
+    _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    if seconds is None:
+        resource.setrlimit(resource.RLIMIT_CPU, (resource.RLIM_INFINITY, hard))
+    else:
+        # the limit applies to the whole process, thus, the time already used by the worker is added
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        resource.setrlimit(resource.RLIMIT_CPU, (int(usage.ru_utime + usage.ru_stime) + 1 + seconds, hard))
+
+
+def circuit_to_qpy(circuit):
+    buffer = io.BytesIO()
+    qpy.dump(circuit, buffer)
+    return buffer.getvalue()
+
+
+def circuit_from_qpy(data):
+    return qpy.load(io.BytesIO(data))[0]
+
+
+def _run(code, function_name, input_params, cpu_time_limit=None, timeout=None):
+    """Execute the code in a fresh module and call the function. Return the circuit as QPY bytes together with the
+    DETERMINISTIC flag of the implementation or the result of the post processing."""
+    if cpu_time_limit:
+        _set_cpu_time_limit(cpu_time_limit)
+    if timeout:
+        signal.alarm(timeout)
+    try:
+        module = types.ModuleType('downloaded_code')
+        exec(compile(code, 'downloaded_code.py', 'exec'), module.__dict__)
+        if function_name == 'get_circuit':
+            if hasattr(module, 'get_circuit'):
+                circuit = module.get_circuit(**input_params)
+            else:
+                circuit = getattr(module, 'qc', None)
+            if not circuit:
+                raise ImplementationError("The implementation provides neither get_circuit nor qc")
+            # implementations returning different circuits for the same input parameters set DETERMINISTIC = False
+            return circuit_to_qpy(circuit), bool(getattr(module, 'DETERMINISTIC', True))
+        else:
+            result = module.post_processing(**input_params) if hasattr(module, 'post_processing') else None
+            if not result:
+                raise ImplementationError("The implementation provides no post_processing result")
+            return result
+    except ImplementationError:
+        raise
+    except Exception as e:
+        raise ImplementationError(f"The implementation failed: {type(e).__name__}: {e}")
+    finally:
+        if timeout:
+            signal.alarm(0)
+        if cpu_time_limit:
+            _set_cpu_time_limit(None)
+
+
+def get_forkserver_context():
+    """Get the multiprocessing context starting worker processes from the forkserver, which preloads qiskit and the
+    service. None in processes forked after the forkserver was started, as they cannot use it."""
+    global _forkserver_pid
+    with _forkserver_lock:
+        if _forkserver_pid is None:
+            multiprocessing.set_forkserver_preload(['qiskit', 'app.sandbox', 'app.transpilation'])
+            _forkserver_pid = os.getpid()
+        elif _forkserver_pid != os.getpid():
+            return None
+        return multiprocessing.get_context('forkserver')
+
+
+def get_pool():
+    """Get the worker pool of this process, None if it cannot use the forkserver. Processes forked afterwards cannot
+    use the pool of their parent."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            context = get_forkserver_context()
+            if context is None:
+                app.logger.warning("Implementations are executed in-process without limits, as this process was "
+                                   "forked after the forkserver was started")
+                return None
+            _pool = context.Pool(
+                app.config['SANDBOX_POOL_SIZE'], initializer=_init_worker,
+                initargs=(app.config['SANDBOX_MEMORY_LIMIT'],),
+                maxtasksperchild=app.config['SANDBOX_MAX_TASKS_PER_CHILD'] or None)
+            _pool_pid = os.getpid()
+        return _pool
+
+
+def shutdown():
+    """Terminate the worker pool, e.g., if a worker stopped responding. The next call creates a new pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.terminate()
+        _pool = None
+
+
+def _submit(code, function_name, input_params):
+    input_params = dict(input_params or {})
+    pool = get_pool() if app.config['SANDBOX_POOL_SIZE'] else None
+    if pool is None:
+        # run in the calling process without limits, e.g., on platforms without fork
+        return None, _run(code, function_name, input_params)
+    return pool.apply_async(_run, (code, function_name, input_params, app.config['SANDBOX_CPU_TIME_LIMIT'],
+                                   app.config['SANDBOX_TIMEOUT'])), None
+
+
+def _get(async_result, result):
+    if async_result is None:
+        return result
+    try:
+        # the worker enforces the timeout itself, the grace period covers killed workers, e.g., by the OOM killer
+        return async_result.get(app.config['SANDBOX_TIMEOUT'] + 30)
+    except multiprocessing.TimeoutError:
+        shutdown()
+        raise ImplementationError("The implementation did not finish, its worker was restarted")
+
+
+def generate_circuits(codes, input_params):
+    """Execute the implementations in parallel. Return a (QPY bytes, deterministic) pair for each circuit provided by
+    their get_circuit functions or qc variables."""
+    submitted = [_submit(code, 'get_circuit', input_params) for code in codes]
+    return [_get(*entry) for entry in submitted]
+
+
+def get_circuits(codes, input_params):
+    """Execute the implementations in parallel and return the circuits provided by their get_circuit functions or qc
+    variables"""
+    return [circuit_from_qpy(data) for data, _ in generate_circuits(codes, input_params)]
+
+
+def get_circuit(code, input_params):
+    """Execute the implementation and return the circuit provided by its get_circuit function or qc variable"""
+    return get_circuits([code], input_params)[0]
+
+
+def post_processing(code, input_params):
+    """Execute the implementation and return the result of its post_processing function"""
+    return _get(*_submit(code, 'post_processing', input_params))
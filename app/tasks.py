@@ -20,17 +20,42 @@ import base64
 import datetime
 import json
 
-from qiskit import transpile, QuantumCircuit, Aer
+from qiskit import QuantumCircuit, Aer, QiskitError
 from qiskit.transpiler.exceptions import TranspilerError
-from qiskit.utils.measurement_error_mitigation import get_measured_qubits
-from qiskit_aer.noise import NoiseModel
 from rq import get_current_job
 
-from app import implementation_handler, aws_handler, ibmq_handler, db, app, ionq_handler, circuit_analysis
+from app import implementation_handler, aws_handler, ibmq_handler, db, app, ionq_handler, circuit_analysis, \
+    transpile_cache, transpilation, counts, mitigation, encryption
 from app.NumpyEncoder import NumpyEncoder
 from app.benchmark_model import Benchmark
 from app.generated_circuit_model import Generated_Circuit
 from app.result_model import Result
+from app.transpilation_model import Transpilation
+
+# prefix of the keys of the records of the jobs handed over to the job watcher
+WATCHED_JOB_KEY_PREFIX = 'qiskit-service:job-watcher:job:'
+
+
+def get_backend(provider, qpu_name, token=None, access_key_aws=None, secret_access_key_aws=None, **kwargs):
+    """Get the backend with the given name from the provider"""
+    if provider == 'ibmq':
+        return ibmq_handler.get_qpu(token, qpu_name, **kwargs)
+    elif provider == 'ionq':
+        return ionq_handler.get_qpu(token, qpu_name)
+    elif provider == 'aws':
+        return aws_handler.get_qpu(access_key=access_key_aws, secret_access_key=secret_access_key_aws,
+                                   qpu_name=qpu_name, **kwargs)
+    return None
+
+
+def get_handler(provider):
+    """Get the handler module that submits jobs to the given provider"""
+    return {'ibmq': ibmq_handler, 'ionq': ionq_handler, 'aws': aws_handler}[provider]
+
+
+def is_local_simulator(backend):
+    """Jobs on local simulators finish without waiting in a queue, thus, they are not handed over to the watcher"""
+    return type(backend).__module__.startswith('qiskit_aer')
 
 
 def generate(impl_url, impl_data, impl_language, input_params, bearer_token):
@@ -49,24 +74,17 @@ def generate(impl_url, impl_data, impl_language, input_params, bearer_token):
         db.session.commit()
 
     if generated_circuit_code:
-        non_transpiled_depth_old = 0
         generated_circuit_object = Generated_Circuit.query.get(job.get_id())
         generated_circuit_object.generated_circuit = generated_circuit_code.qasm()
 
-        non_transpiled_depth = generated_circuit_code.depth()
-        while non_transpiled_depth_old < non_transpiled_depth:
-            non_transpiled_depth_old = non_transpiled_depth
-            generated_circuit_code = generated_circuit_code.decompose()
-            non_transpiled_depth = generated_circuit_code.depth()
-        generated_circuit_object.original_depth = non_transpiled_depth
-        generated_circuit_object.original_width = circuit_analysis.get_width_of_circuit(generated_circuit_code)
-        generated_circuit_object.original_total_number_of_operations = generated_circuit_code.size()
-        generated_circuit_object.original_number_of_multi_qubit_gates = generated_circuit_code.num_nonlocal_gates()
-        generated_circuit_object.original_number_of_measurement_operations = circuit_analysis.get_number_of_measurement_operations(
-            generated_circuit_code)
-        generated_circuit_object.original_number_of_single_qubit_gates = generated_circuit_object.original_total_number_of_operations - generated_circuit_object.original_number_of_multi_qubit_gates - generated_circuit_object.original_number_of_measurement_operations
-        generated_circuit_object.original_multi_qubit_gate_depth, non_transpiled_circuit = circuit_analysis.get_multi_qubit_gate_depth(
-            generated_circuit_code)
+        metrics = circuit_analysis.CircuitMetrics.from_circuit(generated_circuit_code, unroll=True)
+        generated_circuit_object.original_depth = metrics.depth
+        generated_circuit_object.original_width = metrics.width
+        generated_circuit_object.original_total_number_of_operations = metrics.total_number_of_operations
+        generated_circuit_object.original_number_of_multi_qubit_gates = metrics.number_of_multi_qubit_gates
+        generated_circuit_object.original_number_of_measurement_operations = metrics.number_of_measurement_operations
+        generated_circuit_object.original_number_of_single_qubit_gates = metrics.number_of_single_qubit_gates
+        generated_circuit_object.original_multi_qubit_gate_depth = metrics.multi_qubit_gate_depth
 
         generated_circuit_object.input_params = json.dumps(input_params)
         app.logger.info(f"Received input params for circuit generation: {generated_circuit_object.input_params}")
@@ -74,20 +92,49 @@ def generate(impl_url, impl_data, impl_language, input_params, bearer_token):
         db.session.commit()
 
 
+def transpile(provider, qpu_name, impl_url, impl_data, impl_language, qasm_string, input_params, bearer_token,
+              credentials):
+    app.logger.info("Starting transpile task...")
+    job = get_current_job()
+
+    try:
+        if impl_url:
+            if impl_language.lower() == 'openqasm':
+                circuit = implementation_handler.prepare_code_from_qasm_url(impl_url, bearer_token)
+            else:
+                circuit = implementation_handler.prepare_code_from_url(impl_url, input_params, bearer_token)
+        elif impl_data:
+            if impl_language.lower() == 'openqasm':
+                circuit = implementation_handler.prepare_code_from_qasm(impl_data)
+            else:
+                circuit = implementation_handler.prepare_code_from_data(impl_data, input_params)
+        else:
+            circuit = implementation_handler.prepare_code_from_qasm(qasm_string)
+        if not circuit:
+            raise ValueError('generating circuit failed')
+
+        circuit = circuit_analysis.unroll_circuit(circuit)
+        non_transpiled_metrics = circuit_analysis.CircuitMetrics.from_circuit(circuit)
+        result = {**non_transpiled_metrics.to_json(prefix='original-'),
+                  **transpilation.transpile_for_target(circuit, provider, qpu_name, credentials)}
+    except Exception as e:
+        app.logger.info(f"Transpile for {qpu_name}: {str(e)}")
+        result = {'error': str(e)}
+
+    transpilation_object = Transpilation.query.get(job.get_id())
+    transpilation_object.result = json.dumps(result)
+    transpilation_object.complete = True
+    db.session.commit()
+
+
 def execute(correlation_id, provider, impl_url, impl_data, impl_language, transpiled_qasm, input_params, token,
             access_key_aws, secret_access_key_aws, qpu_name, optimization_level, noise_model, only_measurement_errors,
-            shots, bearer_token, qasm_string, **kwargs):
+            shots, bearer_token, qasm_string, readout_mitigation=None, **kwargs):
     """Create database entry for result. Get implementation code, prepare it, and execute it. Save result in db"""
     app.logger.info("Starting execute task...")
     job = get_current_job()
 
-    if provider == 'ibmq':
-        backend = ibmq_handler.get_qpu(token, qpu_name, **kwargs)
-    elif provider == 'ionq':
-        backend = ionq_handler.get_qpu(token, qpu_name)
-    elif provider == 'aws':
-        backend = aws_handler.get_qpu(access_key=access_key_aws, secret_access_key=secret_access_key_aws,
-                                      qpu_name=qpu_name, **kwargs)
+    backend = get_backend(provider, qpu_name, token, access_key_aws, secret_access_key_aws, **kwargs)
     if not backend:
         result = Result.query.get(job.get_id())
         result.result = json.dumps({'error': 'qpu-name or token wrong'})
@@ -101,18 +148,15 @@ def execute(correlation_id, provider, impl_url, impl_data, impl_language, transp
         if qasm_string:
             circuits = [implementation_handler.prepare_code_from_qasm(qasm) for qasm in qasm_string]
         elif impl_url and not correlation_id:
-            if impl_language.lower() == 'openqasm':
-                # list of circuits
-                circuits = [implementation_handler.prepare_code_from_qasm_url(url, bearer_token) for url in impl_url]
-            else:
-                circuits = [implementation_handler.prepare_code_from_url(url, input_params, bearer_token) for url in
-                            impl_url]
+            # list of circuits
+            circuits = implementation_handler.prepare_code_from_url_list(impl_url, input_params, bearer_token,
+                                                                         impl_language)
         elif impl_data:
             impl_data = [base64.b64decode(data.encode()).decode() for data in impl_data]
             if impl_language.lower() == 'openqasm':
                 circuits = [implementation_handler.prepare_code_from_qasm(data) for data in impl_data]
             else:
-                circuits = [implementation_handler.prepare_code_from_data(data, input_params) for data in impl_data]
+                circuits = implementation_handler.prepare_code_from_data_list(impl_data, input_params)
         if not circuits:
             result = Result.query.get(job.get_id())
             result.result = json.dumps({'error': 'URL not found'})
@@ -122,38 +166,59 @@ def execute(correlation_id, provider, impl_url, impl_data, impl_language, transp
 
         if noise_model and provider == 'ibmq':
             noisy_qpu = ibmq_handler.get_qpu(token, noise_model, **kwargs)
-            noise_model = NoiseModel.from_backend(noisy_qpu)
-            properties = noisy_qpu.properties()
-            configuration = noisy_qpu.configuration()
-            coupling_map = configuration.coupling_map
-            basis_gates = noise_model.basis_gates
+            noise_model = ibmq_handler.get_noise_model(noisy_qpu, only_measurement_errors)
             try:
-                transpiled_circuits = transpile(circuits, noisy_qpu)
+                transpiled_circuits = transpile_cache.transpile(circuits, noisy_qpu)
             except TranspilerError:
                 result = Result.query.get(job.get_id())
                 result.result = json.dumps({'error': 'too many qubits required'})
                 result.complete = True
                 db.session.commit()
-            measurement_qubits = get_measurement_qubits_from_transpiled_circuit(transpiled_circuits)
-
-            if only_measurement_errors:
-                ro_noise_model = NoiseModel()
-                for k, v in noise_model._local_readout_errors.items():
-                    ro_noise_model.add_readout_error(v, k)
-                noise_model = ro_noise_model
 
             backend = Aer.get_backend('aer_simulator')
 
         else:
             try:
-                transpiled_circuits = transpile(circuits, backend=backend, optimization_level=optimization_level)
+                transpiled_circuits = transpile_cache.transpile(circuits, backend,
+                                                                optimization_level=optimization_level)
             except TranspilerError:
                 result = Result.query.get(job.get_id())
                 result.result = json.dumps({'error': 'too many qubits required'})
                 result.complete = True
                 db.session.commit()
 
+    measurement_qubits = None
+    if readout_mitigation:
+        measurement_qubits = [get_measurement_qubits_from_transpiled_circuit(circuit)
+                              for circuit in transpiled_circuits]
+
     app.logger.info('Start executing...')
+    if app.config['JOB_WATCHER_ENABLED'] and encryption.is_available() and not noise_model \
+            and not is_local_simulator(backend):
+        # do not block the worker while the job waits in the queue of the QPU, the job watcher enqueues
+        # complete_execution once the job is finished. The credentials are only stored encrypted in the record.
+        try:
+            provider_job = get_handler(provider).submit_job(transpiled_circuits, shots, backend)
+        except Exception:
+            app.logger.exception(f"Submitting job to {qpu_name} failed")
+            save_execution_result(job.get_id(), None, correlation_id, impl_url, impl_data, bearer_token)
+            return
+        result = Result.query.get(job.get_id())
+        result.provider_job_id = provider_job.job_id()
+        db.session.commit()
+        app.redis.set(WATCHED_JOB_KEY_PREFIX + job.get_id(), json.dumps({
+            'result_id': job.get_id(), 'provider': provider, 'qpu_name': qpu_name,
+            'provider_job_id': result.provider_job_id,
+            'encrypted_credentials': encryption.encrypt({'token': token, 'access_key_aws': access_key_aws,
+                                                          'secret_access_key_aws': secret_access_key_aws,
+                                                          **kwargs}),
+            'post_processing': {'correlation_id': correlation_id, 'impl_url': impl_url, 'impl_data': impl_data,
+                                'bearer_token': encryption.encrypt(bearer_token)},
+            'readout_mitigation': readout_mitigation, 'measurement_qubits': measurement_qubits}),
+            ex=app.config['JOB_WATCHER_RECORD_TTL'])
+        app.logger.info(f"Submitted job {result.provider_job_id} to {qpu_name}, handed over to the job watcher")
+        return
+
     if provider == 'aws' and not noise_model:
         # Note: AWS cannot handle such a noise model
         job_result = aws_handler.execute_job(transpiled_circuits, shots, backend)
@@ -163,9 +228,120 @@ def execute(correlation_id, provider, impl_url, impl_data, impl_language, transp
         # If we need a noise model, we have to use IBM Q
         job_result = ibmq_handler.execute_job(transpiled_circuits, shots, backend, noise_model)
 
+    mitigated_counts, mitigation_error = get_mitigated_counts(job_result, readout_mitigation, measurement_qubits,
+                                                              backend)
+    save_execution_result(job.get_id(), job_result, correlation_id, impl_url, impl_data, bearer_token,
+                          mitigated_counts, mitigation_error)
+
+
+def complete_execution(result_id, provider, qpu_name, provider_job_id, encrypted_credentials, post_processing,
+                       readout_mitigation=None, measurement_qubits=None):
+    """Get the result of a job that was handed over to the job watcher and save it in db"""
+    result = Result.query.get(result_id)
+    if result.complete:
+        return
+    app.logger.info(f"Completing execution of job {provider_job_id} on {qpu_name}...")
+    credentials = encryption.decrypt(encrypted_credentials)
+    post_processing = {**post_processing, 'bearer_token': encryption.decrypt(post_processing['bearer_token'])}
+    try:
+        backend = get_backend(provider, qpu_name, **credentials)
+        job_result = get_handler(provider).get_job_result(backend.retrieve_job(provider_job_id))
+    except Exception:
+        app.logger.exception(f"Retrieving job {provider_job_id} failed")
+        backend = None
+        job_result = None
+    mitigated_counts, mitigation_error = get_mitigated_counts(job_result, readout_mitigation, measurement_qubits,
+                                                              backend)
+    save_execution_result(result_id, job_result, mitigated_counts=mitigated_counts, mitigation_error=mitigation_error,
+                          **post_processing)
+
+
+def get_compact_counts(job_counts):
+    """Convert the counts of the job to the compact representation, None if they are not keyed by bitstrings"""
+    try:
+        return counts.from_json(job_counts)
+    except (ValueError, AttributeError, TypeError) as e:
+        app.logger.warning(f"Counts not stored in compact form: {str(e)}")
+        return None
+
+
+def get_tensored_cal_matrices(backend, qubits):
+    """Get the cached tensored calibration matrices of the qubits, calculated for exactly these qubits or for all
+    qubits of the backend. None if none of them is cached."""
+    all_qubits = list(range(backend.configuration().n_qubits))
+    for calibrated_qubits in [qubits, all_qubits]:
+        meas_filter = ibmq_handler.get_cached_meas_filter(backend, calibrated_qubits, tensored=True)
+        if meas_filter is not None:
+            # the matrices are in ascending order of the calibrated qubits
+            return {qubit: meas_filter.cal_matrices[sorted(calibrated_qubits).index(qubit)] for qubit in qubits}
+    return None
+
+
+def get_mitigated_counts(job_result, readout_mitigation, measurement_qubits, backend):
+    """Mitigate the readout errors of the counts of each circuit with the cached calibration matrices of its measured
+    qubits, either 'tensored' or 'complete', calculated with any number of shots. Calibration circuits are never
+    executed here, the matrices are calculated beforehand via the calculate-calibration-matrix endpoint. Return the
+    mitigated counts, None if no mitigation is requested or it is not possible, as the raw counts are saved regardless,
+    and the reason why it was not possible."""
+    if not readout_mitigation or not job_result:
+        return None, None
+
+    def no_matrix_error(qubits):
+        return f"No {readout_mitigation} calibration matrix of the qubits {qubits} is cached for the current " \
+               f"calibration of {transpile_cache.get_backend_name(backend)}, calculate it first with any number of " \
+               f"shots via the calculate-calibration-matrix endpoint"
+
+    try:
+        job_counts = counts.from_json(job_result['counts'])
+        circuit_counts = job_counts if isinstance(job_counts, list) else [job_counts]
+        distance = app.config['READOUT_MITIGATION_DISTANCE']
+        if readout_mitigation == 'tensored':
+            # the matrices of all qubits measured by any of the circuits
+            measured_qubits = sorted({qubit for qubits in measurement_qubits for qubit in qubits if qubit is not None})
+            cal_matrices = get_tensored_cal_matrices(backend, measured_qubits)
+            if cal_matrices is None:
+                return None, no_matrix_error(measured_qubits)
+        else:
+            # the matrices of the distinct sets of qubits measured by the circuits, regardless of their order
+            meas_filters = {}
+            for qubits in measurement_qubits:
+                measured_qubits = tuple(sorted(qubit for qubit in qubits if qubit is not None))
+                if measured_qubits not in meas_filters:
+                    meas_filters[measured_qubits] = ibmq_handler.get_cached_meas_filter(backend, list(measured_qubits))
+                    if meas_filters[measured_qubits] is None:
+                        return None, no_matrix_error(list(measured_qubits))
+
+        mitigated_counts = []
+        for counts_of_circuit, qubits in zip(circuit_counts, measurement_qubits):
+            bits = [bit for bit, qubit in enumerate(qubits) if qubit is not None]
+            if readout_mitigation == 'tensored':
+                mitigated_counts.append(mitigation.mitigate_counts(
+                    counts_of_circuit, bits, cal_matrices=[cal_matrices[qubits[bit]] for bit in bits],
+                    distance=distance))
+            else:
+                # bit k of the states of the matrix is the k-th qubit in ascending order
+                measured_qubits = sorted(qubits[bit] for bit in bits)
+                meas_filter = meas_filters[tuple(measured_qubits)]
+                mitigated_counts.append(mitigation.mitigate_counts(
+                    counts_of_circuit, bits, cal_matrix=meas_filter.cal_matrix, distance=distance,
+                    cal_matrix_bits=[measured_qubits.index(qubits[bit]) for bit in bits]))
+        return (mitigated_counts if isinstance(job_counts, list) else mitigated_counts[0]), None
+    except (ValueError, AttributeError, TypeError, QiskitError) as e:
+        error = f"Readout errors of the counts not mitigated: {str(e)}"
+        app.logger.warning(error)
+        return None, error
+
+
+def save_execution_result(result_id, job_result, correlation_id, impl_url, impl_data, bearer_token,
+                          mitigated_counts=None, mitigation_error=None):
+    """Save the result of an execution in db, including the mitigated counts, or why they are missing, and the result
+    of the post processing if required"""
     if job_result:
-        result = Result.query.get(job.get_id())
+        result = Result.query.get(result_id)
         result.result = json.dumps(job_result['counts'])
+        result.counts = get_compact_counts(job_result['counts'])
+        result.mitigated_counts = mitigated_counts
+        result.mitigation_error = mitigation_error
 
         # check if implementation contains post processing of execution results that has to be executed
         if correlation_id and (impl_url or impl_data):
@@ -183,22 +359,30 @@ def execute(correlation_id, provider, impl_url, impl_data, impl_language, transp
             elif impl_data:
                 post_p_result = implementation_handler.prepare_post_processing_code_from_data(data=impl_data[0],
                                                                                               input_params=input_params_for_post_processing)
-            result.post_processing_result = json.loads(post_p_result)
+            post_processing_result = json.loads(post_p_result)
+            # the column holds text, results which decode to numbers, lists, or dicts are stored as JSON
+            if not isinstance(post_processing_result, str):
+                post_processing_result = json.dumps(post_processing_result)
+            result.post_processing_result = post_processing_result
 
         result.complete = True
         db.session.commit()
 
     else:
-        result = Result.query.get(job.get_id())
+        result = Result.query.get(result_id)
         result.result = json.dumps({'error': 'execution failed'})
         result.complete = True
         db.session.commit()
 
 
 def get_measurement_qubits_from_transpiled_circuit(transpiled_circuit):
-    qubit_index, qubit_mappings = get_measured_qubits([transpiled_circuit])
-    measurement_qubits = [int(i) for i in list(qubit_mappings.keys())[0].split("_")]
-
+    """Return the physical qubit measured into each classical bit of the transpiled circuit, None for classical bits
+    without measurement"""
+    measurement_qubits = [None] * transpiled_circuit.num_clbits
+    for instruction in transpiled_circuit.data:
+        if instruction.operation.name == 'measure':
+            clbit = transpiled_circuit.find_bit(instruction.clbits[0]).index
+            measurement_qubits[clbit] = transpiled_circuit.find_bit(instruction.qubits[0]).index
     return measurement_qubits
 
 
@@ -233,7 +417,8 @@ def execute_benchmark(transpiled_qasm, token, qpu_name, shots):
 
         benchmark = Benchmark.query.get(job.get_id())
         benchmark.result = json.dumps(job_result, default=convert_into_suitable_format)
-        benchmark.counts = json.dumps(job_result['counts'])
+        result.counts = benchmark.counts = get_compact_counts(job_result['counts'])
+        # completed clifford benchmarks are added to their wd-class on commit, see benchmarking.calc_wd
         benchmark.complete = True
 
         db.session.commit()
@@ -248,23 +433,33 @@ def execute_benchmark(transpiled_qasm, token, qpu_name, shots):
         db.session.commit()
 
 
-def calculate_calibration_matrix(token, qpu_name, shots):
-    """Calculate the current calibration matrix for the given QPU and save the result in db"""
+def calculate_calibration_matrix(token, qpu_name, shots, qubits=None, tensored=False):
+    """Calculate the current calibration matrix, or the tensored matrices, of the given qubits of the QPU and save the
+    result in db"""
     job = get_current_job()
 
     backend = ibmq_handler.get_qpu(token, qpu_name)
     if backend:
-        job_result = ibmq_handler.get_meas_fitter(token, qpu_name, shots)
-        if job_result:
-            result = Result.query.get(job.get_id())
-            result.result = json.dumps({'matrix': job_result.cal_matrix}, cls=NumpyEncoder)
-            result.complete = True
-            db.session.commit()
+        # the matrices are calculated in ascending order of the qubits
+        qubits = list(range(backend.configuration().n_qubits)) if qubits is None else sorted(qubits)
+        try:
+            meas_filter = ibmq_handler.get_meas_fitter(token, qpu_name, shots, qubits, tensored)
+        except ValueError as e:
+            meas_filter = None
+            error = str(e)
+        except QiskitError as e:
+            app.logger.warning(f"Calculation of the calibration matrix of {qpu_name} failed: {str(e)}")
+            meas_filter = None
+            error = 'matrix calculation failed'
+        result = Result.query.get(job.get_id())
+        if meas_filter is None:
+            result.result = json.dumps({'error': error})
+        elif tensored:
+            result.result = json.dumps({'matrices': meas_filter.cal_matrices, 'qubits': qubits}, cls=NumpyEncoder)
         else:
-            result = Result.query.get(job.get_id())
-            result.result = json.dumps({'error': 'matrix calculation failed'})
-            result.complete = True
-            db.session.commit()
+            result.result = json.dumps({'matrix': meas_filter.cal_matrix, 'qubits': qubits}, cls=NumpyEncoder)
+        result.complete = True
+        db.session.commit()
     else:
         result = Result.query.get(job.get_id())
         result.result = json.dumps({'error': 'qpu-name or token wrong'})
@@ -0,0 +1,114 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from qiskit.transpiler.exceptions import TranspilerError
+
+from app import app, db, sandbox, tasks, transpile_cache
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_optimization_level(provider):
+    """AWS backends are transpiled with the default optimization level, all others with the highest one"""
+    return None if provider == 'aws' else 3
+
+
+def transpile_for_backend(circuit, provider, backend):
+    """Transpile the circuit for the backend of the provider. Return the transpiled circuit and its metrics."""
+    return transpile_cache.transpile_with_metrics(circuit, backend, optimization_level=get_optimization_level(provider))
+
+
+def transpile_for_target(circuit, provider, qpu_name, credentials):
+    """Transpile the circuit for the QPU of the provider. Return a dict with the metrics and the transpiled OpenQASM
+    circuit or with the error."""
+    try:
+        backend = tasks.get_backend(provider, qpu_name, **credentials)
+        if not backend:
+            return {'error': f"{qpu_name} not found"}
+        transpiled_circuit, metrics = transpile_for_backend(circuit, provider, backend)
+        return {**metrics, 'transpiled-qasm': transpiled_circuit.qasm()}
+    except TranspilerError:
+        return {'error': 'too many qubits required'}
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def _transpile_for_target(circuit_qpy, provider, qpu_name, credentials):
+    # runs in a worker process, which keeps its own provider sessions
+    return transpile_for_target(sandbox.circuit_from_qpy(circuit_qpy), provider, qpu_name, credentials)
+
+
+def _init_worker():
+    # the connections of the pool of the forkserver must not be shared, the worker opens its own ones, e.g., to record
+    # calibrations of the backends
+    db.engine.dispose()
+    # like qiskit's parallel_map, run the transpiler passes single-threaded in the workers, which run in parallel
+    os.environ['QISKIT_IN_PARALLEL'] = 'TRUE'
+
+
+def get_executor():
+    """Get the transpilation worker pool of this process, None if it cannot use the forkserver of app.sandbox.
+    Processes forked afterwards cannot use the pool of their parent."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            # the workers start from the forkserver, as forking the threads of the web workers copies their locks and
+            # database connections
+            context = sandbox.get_forkserver_context()
+            if context is None:
+                return None
+            _executor = ProcessPoolExecutor(app.config['TRANSPILE_POOL_SIZE'], mp_context=context,
+                                            initializer=_init_worker)
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def shutdown():
+    global _executor
+    with _executor_lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown()
+        _executor = None
+
+
+def transpile_for_targets(circuit, targets):
+    """Transpile the circuit for each (provider, qpu name, credentials) target in parallel. Return a dict with the
+    metrics and the transpiled OpenQASM circuit or with the error for each target."""
+    circuit_qpy = sandbox.circuit_to_qpy(circuit)
+    executor = get_executor() if app.config['TRANSPILE_POOL_SIZE'] and len(targets) > 1 else None
+    if executor is None:
+        return [_transpile_for_target(circuit_qpy, *target) for target in targets]
+
+    futures = [executor.submit(_transpile_for_target, circuit_qpy, *target) for target in targets]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result())
+        except BrokenProcessPool:
+            # a worker died, e.g., killed by the OOM killer, the next request creates a new pool
+            shutdown()
+            results.append({'error': 'transpilation failed'})
+    return results
@@ -0,0 +1,165 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import base64
+import io
+import json
+from hashlib import sha256
+
+import numpy as np
+from qiskit import QuantumCircuit, qpy, transpile as qiskit_transpile
+from qiskit.circuit import Gate, Instruction
+
+from app import app, circuit_analysis
+from app.cache import TieredCache
+
+cache = TieredCache('transpile', maxsize=app.config['TRANSPILE_CACHE_SIZE'], ttl=app.config['TRANSPILE_CACHE_TTL'])
+
+
+def get_backend_name(backend):
+    """Return the name of BackendV1 (name() method) and BackendV2 (name attribute) backends"""
+    name = backend.name
+    return name() if callable(name) else name
+
+
+def get_calibration_version(backend):
+    """Return an identifier of the current calibration of the backend, e.g., the last update date of its
+    properties, so that cached transpilations are invalidated when the backend is recalibrated. None if the backend
+    does not identify its calibration, then its transpilations are not cached."""
+    try:
+        properties = backend.properties() if hasattr(backend, 'properties') else None
+        if properties is not None and getattr(properties, 'last_update_date', None):
+            return properties.last_update_date.isoformat()
+        if hasattr(backend, 'configuration'):
+            return str(backend.configuration().backend_version)
+        # BackendV2 backends of AWS Braket provide the update time of the calibration of their device, their version
+        # attribute is only the version of the backend interface
+        service = getattr(getattr(getattr(backend, '_device', None), 'properties', None), 'service', None)
+        updated_at = getattr(service, 'updatedAt', None)
+        return updated_at.isoformat() if updated_at else None
+    except Exception:
+        return None
+
+
+def _hash_param(digest, param):
+    if isinstance(param, np.ndarray):
+        digest.update(param.tobytes())
+    else:
+        digest.update(repr(param).encode())
+
+
+def _hash_circuit_into(digest, circuit):
+    digest.update(f"{circuit.num_qubits},{circuit.num_clbits},{circuit.global_phase};".encode())
+    qubit_indices = {qubit: i for i, qubit in enumerate(circuit.qubits)}
+    clbit_indices = {clbit: i for i, clbit in enumerate(circuit.clbits)}
+    for instruction in circuit.data:
+        operation = instruction.operation
+        digest.update(operation.name.encode())
+        for param in operation.params:
+            _hash_param(digest, param)
+        digest.update(str([qubit_indices[qubit] for qubit in instruction.qubits]).encode())
+        digest.update(str([clbit_indices[clbit] for clbit in instruction.clbits]).encode())
+        condition = getattr(operation, 'condition', None)
+        if condition:
+            bits = [condition[0]] if condition[0] in clbit_indices else list(condition[0])
+            digest.update(f"if{[clbit_indices[bit] for bit in bits]}=={condition[1]}".encode())
+        # custom gates, e.g., created by to_gate(), can share a name while having different definitions
+        if type(operation) in (Gate, Instruction) and operation.definition is not None:
+            _hash_circuit_into(digest, operation.definition)
+        digest.update(b';')
+
+
+def circuit_hash(circuit):
+    """Canonical sha256 hash of the instruction stream of a circuit, independent of circuit and register names"""
+    digest = sha256()
+    _hash_circuit_into(digest, circuit)
+    return digest.hexdigest()
+
+
+def get_transpilation_key(circuit, backend, optimization_level=None):
+    """Return the cache key of the transpilation, None if it must not be cached as the calibration is unknown"""
+    calibration_version = get_calibration_version(backend)
+    if calibration_version is None:
+        return None
+    return f"{circuit_hash(circuit)}:{get_backend_name(backend)}:{calibration_version}:{optimization_level}"
+
+
+def _circuit_to_qpy(circuit):
+    buffer = io.BytesIO()
+    qpy.dump(circuit, buffer)
+    return buffer.getvalue()
+
+
+def _circuit_from_qpy(data):
+    return qpy.load(io.BytesIO(data))[0]
+
+
+def _store(key, transpiled_circuit, metrics=None):
+    if key is None:
+        return
+    cache.set(key, json.dumps({'qpy': base64.b64encode(_circuit_to_qpy(transpiled_circuit)).decode(),
+                               'metrics': metrics}).encode())
+
+
+def _load(key):
+    entry = cache.get(key) if key is not None else None
+    if entry is None:
+        return None, None
+    entry = json.loads(entry)
+    return _circuit_from_qpy(base64.b64decode(entry['qpy'])), entry['metrics']
+
+
+def transpile(circuits, backend, optimization_level=None):
+    """Transpile a circuit or a list of circuits for the given backend. Circuits that were already transpiled for
+    the same backend calibration and optimization level are taken from the transpilation cache."""
+    single_circuit = isinstance(circuits, QuantumCircuit)
+    if single_circuit:
+        circuits = [circuits]
+
+    keys = [get_transpilation_key(circuit, backend, optimization_level) for circuit in circuits]
+    transpiled_circuits = [_load(key)[0] for key in keys]
+    missing = [i for i, transpiled_circuit in enumerate(transpiled_circuits) if transpiled_circuit is None]
+    app.logger.info(f"Transpilation cache: {len(circuits) - len(missing)} of {len(circuits)} circuits cached for "
+                    f"{get_backend_name(backend)}")
+
+    if missing:
+        # transpile all cache misses in one call so that qiskit can parallelize them
+        newly_transpiled = qiskit_transpile([circuits[i] for i in missing], backend=backend,
+                                            optimization_level=optimization_level)
+        for i, transpiled_circuit in zip(missing, newly_transpiled):
+            transpiled_circuits[i] = transpiled_circuit
+            _store(keys[i], transpiled_circuit)
+
+    return transpiled_circuits[0] if single_circuit else transpiled_circuits
+
+
+def transpile_with_metrics(circuit, backend, optimization_level=None):
+    """Transpile a circuit for the given backend and return the transpiled circuit together with its metrics.
+    Both are taken from the transpilation cache if available."""
+    key = get_transpilation_key(circuit, backend, optimization_level)
+    transpiled_circuit, metrics = _load(key)
+    if transpiled_circuit is None:
+        app.logger.info(f"Transpilation cache miss for {get_backend_name(backend)}")
+        transpiled_circuit = qiskit_transpile(circuit, backend=backend, optimization_level=optimization_level)
+    else:
+        app.logger.info(f"Transpilation cache hit for {get_backend_name(backend)}")
+    if metrics is None:
+        metrics = circuit_analysis.CircuitMetrics.from_circuit(transpiled_circuit).to_json()
+        _store(key, transpiled_circuit, metrics)
+    return transpiled_circuit, metrics
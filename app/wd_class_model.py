@@ -0,0 +1,34 @@
+# ******************************************************************************
+#  Copyright (c) 2020 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+from app import db
+
+
+class WdClass(db.Model):
+    """Number of all and of the successful clifford benchmarks of a quantum computer with a transpiled depth in the
+    range of the depth class, i.e., [5 * depth_class, 5 * depth_class + 4], and the transpiled width"""
+    backend = db.Column(db.String(1200), primary_key=True)
+    depth_class = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    width = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    benchmarks = db.Column(db.Integer, default=0, nullable=False)
+    successful_benchmarks = db.Column(db.Integer, default=0, nullable=False)
+    # maximum transpiled depth of the benchmarks of the class
+    max_depth = db.Column(db.Integer, default=0, nullable=False)
+
+    def __repr__(self):
+        return 'WdClass {} {} {}'.format(self.backend, self.depth_class, self.width)
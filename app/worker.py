@@ -0,0 +1,38 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""rq worker executing the jobs in the worker process instead of forking a work horse for each job, so that the
+forkserver and the worker pools of app.sandbox and app.transpilation are started once and stay warm. The implementations
+run in the pool workers, not in the worker process. Start it with:
+    rq worker -w app.worker.Worker --url redis://localhost:5040 qiskit-service_execute qiskit-service_transpile
+"""
+
+from rq.worker import SimpleWorker
+
+from app import db
+
+
+class Worker(SimpleWorker):
+
+    def perform_job(self, job, queue):
+        try:
+            return super().perform_job(job, queue)
+        finally:
+            # each job starts with a new session, as it would in a work horse
+            db.session.remove()
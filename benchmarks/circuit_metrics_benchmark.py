@@ -0,0 +1,124 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+"""Compare the single-pass CircuitMetrics engine with the separate metric functions.
+
+Run from the repository root, e.g.:
+    python -m benchmarks.circuit_metrics_benchmark --gates 10000 100000 1000000
+"""
+
+import argparse
+import random
+import time
+
+from qiskit import QuantumCircuit
+from qiskit.converters import circuit_to_dag, dag_to_circuit
+
+from app import circuit_analysis
+
+
+def build_circuit(number_of_gates, number_of_qubits, seed=42):
+    """Build a transpiled-like circuit of single-qubit rotations and CNOTs followed by final measurements"""
+    rng = random.Random(seed)
+    circuit = QuantumCircuit(number_of_qubits, number_of_qubits)
+    for _ in range(number_of_gates - number_of_qubits):
+        if rng.random() < 0.3:
+            control, target = rng.sample(range(number_of_qubits), 2)
+            circuit.cx(control, target)
+        else:
+            circuit.rz(rng.random(), rng.randrange(number_of_qubits))
+    circuit.measure(range(number_of_qubits), range(number_of_qubits))
+    return circuit
+
+
+def legacy_get_multi_qubit_gate_depth(transpiled_circuit):
+    """Verbatim copy of circuit_analysis.get_multi_qubit_gate_depth before the CircuitMetrics engine. Removes the
+    single qubit gates from the given circuit."""
+
+    # construct set of names of occurring multi-qubit gates, i.e. nonlocal gates
+    transpiled_dag = circuit_to_dag(transpiled_circuit)
+    set_of_all_nonlocal_gates = set()
+    for gate in transpiled_dag.multi_qubit_ops():
+        set_of_all_nonlocal_gates.add(gate.name)
+    for gate in transpiled_dag.two_qubit_ops():
+        set_of_all_nonlocal_gates.add(gate.name)
+
+    # remove all single qubit gates
+    # get all gates and check if they are single qubit gates
+    circuit_for_getting_multi_qubit_gate_depth = transpiled_circuit
+    i = 0
+    for gate in list(circuit_for_getting_multi_qubit_gate_depth.data):
+        gate_name = gate[0].name
+        if gate_name not in set_of_all_nonlocal_gates:
+            circuit_for_getting_multi_qubit_gate_depth.data.pop(i)
+        else:
+            # i is only incremented if the regarded gate (i.e. a nonlocal gate) is not removed,
+            # thus, the list size did not changed and go ahead to the next index
+            i = i + 1
+
+    transpiled_circuit = dag_to_circuit(transpiled_dag)
+
+    return circuit_for_getting_multi_qubit_gate_depth.depth(), transpiled_circuit
+
+
+def legacy_metrics(circuit):
+    """Metrics as computed by the transpile endpoint before the CircuitMetrics engine. Like the endpoint, the multi
+    qubit gate depth is computed last, as it removes the single qubit gates from the circuit."""
+    width = circuit_analysis.get_width_of_circuit(circuit)
+    depth = circuit.depth()
+    total_number_of_operations = circuit.size()
+    number_of_multi_qubit_gates = circuit.num_nonlocal_gates()
+    number_of_measurement_operations = circuit_analysis.get_number_of_measurement_operations(circuit)
+    multi_qubit_gate_depth, _ = legacy_get_multi_qubit_gate_depth(circuit)
+    return {'depth': depth, 'multi-qubit-gate-depth': multi_qubit_gate_depth, 'width': width,
+            'total-number-of-operations': total_number_of_operations,
+            'number-of-single-qubit-gates': total_number_of_operations - number_of_multi_qubit_gates -
+                                            number_of_measurement_operations,
+            'number-of-multi-qubit-gates': number_of_multi_qubit_gates,
+            'number-of-measurement-operations': number_of_measurement_operations}
+
+
+def measure(function, circuit):
+    start = time.perf_counter()
+    result = function(circuit)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--gates', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--qubits', type=int, default=27)
+    parser.add_argument('--skip-legacy-above', type=int, default=None,
+                        help='do not run the legacy functions on circuits with more gates than this')
+    args = parser.parse_args()
+
+    print(f"{'gates':>10} {'legacy [s]':>12} {'engine [s]':>12} {'speedup':>9}")
+    for number_of_gates in args.gates:
+        circuit = build_circuit(number_of_gates, args.qubits)
+        metrics, engine_time = measure(lambda c: circuit_analysis.CircuitMetrics.from_circuit(c).to_json(), circuit)
+        if args.skip_legacy_above is not None and number_of_gates > args.skip_legacy_above:
+            print(f"{number_of_gates:>10} {'-':>12} {engine_time:>12.3f} {'-':>9}")
+            continue
+        expected, legacy_time = measure(legacy_metrics, circuit)
+        assert metrics == expected, f"metrics differ: {metrics} != {expected}"
+        print(f"{number_of_gates:>10} {legacy_time:>12.3f} {engine_time:>12.3f} {legacy_time / engine_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,31 @@
+"""add transpilation table
+
+Revision ID: 3e8b5d2c9a17
+Revises: 7c3f1a9e2d41
+Create Date: 2024-05-13 09:41:07.238114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3e8b5d2c9a17'
+down_revision = '7c3f1a9e2d41'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('transpilation',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('provider', sa.String(length=256), nullable=True),
+    sa.Column('backend', sa.String(length=1200), nullable=True),
+    sa.Column('result', sa.Text(), nullable=True),
+    sa.Column('complete', sa.Boolean(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('transpilation')
@@ -0,0 +1,24 @@
+"""add provider job id to result
+
+Revision ID: 7c3f1a9e2d41
+Revises: e551728398ab
+Create Date: 2024-05-06 10:12:31.417552
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7c3f1a9e2d41'
+down_revision = 'e551728398ab'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('result', sa.Column('provider_job_id', sa.String(length=256), nullable=True))
+
+
+def downgrade():
+    op.drop_column('result', 'provider_job_id')
@@ -0,0 +1,26 @@
+"""add creation time to result
+
+Revision ID: a4d7e1c3b5f8
+Revises: 3e8b5d2c9a17
+Create Date: 2024-05-21 15:02:44.901276
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4d7e1c3b5f8'
+down_revision = '3e8b5d2c9a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('result', sa.Column('created_at', sa.DateTime(), nullable=True))
+    op.create_index(op.f('ix_result_created_at'), 'result', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_result_created_at'), table_name='result')
+    op.drop_column('result', 'created_at')
@@ -0,0 +1,32 @@
+"""add calibration table with the history of the backend properties
+
+Revision ID: a7c2e5f9b1d3
+Revises: f3b7d9a2c6e1
+Create Date: 2024-06-24 10:16:02.518734
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c2e5f9b1d3'
+down_revision = 'f3b7d9a2c6e1'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('calibration',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('backend', sa.String(length=1200), nullable=False),
+    sa.Column('last_update_date', sa.DateTime(), nullable=False),
+    sa.Column('properties', sa.LargeBinary(), nullable=False),
+    sa.Column('properties_hash', sa.String(length=64), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('backend', 'last_update_date')
+    )
+
+
+def downgrade():
+    op.drop_table('calibration')
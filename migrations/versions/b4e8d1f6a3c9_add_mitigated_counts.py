@@ -0,0 +1,26 @@
+"""add mitigated counts to result
+
+Revision ID: b4e8d1f6a3c9
+Revises: a7c2e5f9b1d3
+Create Date: 2024-07-01 15:48:27.093615
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b4e8d1f6a3c9'
+down_revision = 'a7c2e5f9b1d3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('result') as batch_op:
+        batch_op.add_column(sa.Column('mitigated_counts', sa.LargeBinary(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('result') as batch_op:
+        batch_op.drop_column('mitigated_counts')
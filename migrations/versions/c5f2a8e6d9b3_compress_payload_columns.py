@@ -0,0 +1,78 @@
+"""store results, counts and circuits compressed
+
+Revision ID: c5f2a8e6d9b3
+Revises: a4d7e1c3b5f8
+Create Date: 2024-06-03 11:27:15.604829
+
+"""
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5f2a8e6d9b3'
+down_revision = 'a4d7e1c3b5f8'
+branch_labels = None
+depends_on = None
+
+# table, column and type of the column before the migration
+COLUMNS = [('result', 'result', sa.String(length=1200)),
+           ('result', 'post_processing_result', sa.String(length=1200)),
+           ('benchmark', 'result', sa.String(length=1200)),
+           ('benchmark', 'counts', sa.String(length=1200)),
+           ('generated__circuit', 'generated_circuit', sa.String(length=1200)),
+           ('transpilation', 'result', sa.Text())]
+
+BATCH_SIZE = 500
+
+
+def compress(value):
+    return zlib.compress(value.encode())
+
+
+def decompress(value):
+    if isinstance(value, str):
+        return value
+    try:
+        return zlib.decompress(value).decode()
+    except zlib.error:
+        return bytes(value).decode()
+
+
+def convert_column(table_name, column_name, old_type, new_type, convert):
+    """Replace the column by a column of the new type holding the converted values"""
+    new_column_name = column_name + '_converted'
+    with op.batch_alter_table(table_name) as batch_op:
+        batch_op.add_column(sa.Column(new_column_name, new_type, nullable=True))
+
+    table = sa.table(table_name, sa.column('id', sa.String()), sa.column(column_name, old_type),
+                     sa.column(new_column_name, new_type))
+    connection = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(table.c.id, table.c[column_name]).order_by(table.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = connection.execute(query).fetchall()
+        if not rows:
+            break
+        for row_id, value in rows:
+            if value is not None:
+                connection.execute(table.update().where(table.c.id == row_id).values({new_column_name: convert(value)}))
+        last_id = rows[-1][0]
+
+    with op.batch_alter_table(table_name) as batch_op:
+        batch_op.drop_column(column_name)
+        batch_op.alter_column(new_column_name, new_column_name=column_name, existing_type=new_type)
+
+
+def upgrade():
+    for table_name, column_name, old_type in COLUMNS:
+        convert_column(table_name, column_name, old_type, sa.LargeBinary(), compress)
+
+
+def downgrade():
+    for table_name, column_name, old_type in COLUMNS:
+        convert_column(table_name, column_name, sa.LargeBinary(), old_type, decompress)
@@ -0,0 +1,26 @@
+"""add mitigation error to result
+
+Revision ID: c9d2e7a4f1b8
+Revises: b4e8d1f6a3c9
+Create Date: 2024-07-08 10:21:44.530912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c9d2e7a4f1b8'
+down_revision = 'b4e8d1f6a3c9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('result') as batch_op:
+        batch_op.add_column(sa.Column('mitigation_error', sa.String(length=1200), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('result') as batch_op:
+        batch_op.drop_column('mitigation_error')
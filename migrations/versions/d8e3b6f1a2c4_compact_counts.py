@@ -0,0 +1,145 @@
+"""store counts in the compact binary format
+
+Revision ID: d8e3b6f1a2c4
+Revises: c5f2a8e6d9b3
+Create Date: 2024-06-10 09:42:51.318207
+
+"""
+import json
+import math
+import struct
+import zlib
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8e3b6f1a2c4'
+down_revision = 'c5f2a8e6d9b3'
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 500
+
+
+# the compact binary format of version 1 of app.counts, copied so that the migration does not change with the app
+MAGIC = b'QCNT'
+LIST_MAGIC = b'QCNL'
+VERSION = 1
+VALUE_DTYPES = {b'I': np.dtype('<u4'), b'Q': np.dtype('<u8'), b'd': np.dtype('<f8')}
+HEADER = '<4sBcH'
+
+
+def is_serialized(data):
+    return bytes(data[:4]) in (MAGIC, LIST_MAGIC)
+
+
+def histogram_to_bytes(counts_dict):
+    bitstrings = list(counts_dict)
+    register_sizes = tuple(len(register) for register in bitstrings[0].split(' ')) if bitstrings else (0,)
+    if any(tuple(len(register) for register in bitstring.split(' ')) != register_sizes for bitstring in bitstrings):
+        raise ValueError('The outcomes are not bitstrings of the same registers')
+    values = np.array(list(counts_dict.values()))
+    if values.dtype.kind in 'iub':
+        values = values.astype(np.uint64)
+        value_code = b'Q' if len(values) and values.max() >= 2 ** 32 else b'I'
+    else:
+        values = values.astype(np.float64)
+        value_code = b'd'
+    words = max(1, math.ceil(sum(register_sizes) / 64))
+    outcomes = b''.join(int(bitstring.replace(' ', ''), 2).to_bytes(8 * words, 'little') for bitstring in bitstrings)
+    return b''.join([struct.pack(HEADER, MAGIC, VERSION, value_code, len(register_sizes)),
+                     struct.pack(f'<{len(register_sizes)}HQ', *register_sizes, len(bitstrings)),
+                     outcomes, values.astype(VALUE_DTYPES[value_code]).tobytes()])
+
+
+def histogram_from_bytes(data):
+    _, _, value_code, num_registers = struct.unpack_from(HEADER, data)
+    offset = struct.calcsize(HEADER)
+    *register_sizes, length = struct.unpack_from(f'<{num_registers}HQ', data, offset)
+    offset += struct.calcsize(f'<{num_registers}HQ')
+    num_bits = sum(register_sizes)
+    words = max(1, math.ceil(num_bits / 64))
+    outcomes = [int.from_bytes(data[start:start + 8 * words], 'little')
+                for start in range(offset, offset + 8 * words * length, 8 * words)]
+    offset += 8 * words * length
+    values = np.frombuffer(data, dtype=VALUE_DTYPES[value_code], count=length, offset=offset).tolist()
+    counts_dict = {}
+    for outcome, value in zip(outcomes, values):
+        bits = format(outcome, f'0{num_bits}b')
+        registers = []
+        for size in register_sizes:
+            registers.append(bits[:size])
+            bits = bits[size:]
+        counts_dict[' '.join(registers)] = value
+    return counts_dict
+
+
+def dumps(counts):
+    """Serialize the counts of one circuit as dict or of several circuits as list of dicts"""
+    if isinstance(counts, list):
+        serialized = [histogram_to_bytes(circuit_counts) for circuit_counts in counts]
+        return b''.join([LIST_MAGIC, struct.pack(f'<I{len(serialized)}Q', len(serialized), *map(len, serialized)),
+                         *serialized])
+    return histogram_to_bytes(counts)
+
+
+def loads(data):
+    data = bytes(data)
+    if data[:4] != LIST_MAGIC:
+        return histogram_from_bytes(data)
+    length, = struct.unpack_from('<I', data, 4)
+    sizes = struct.unpack_from(f'<{length}Q', data, 8)
+    offset = 8 + 8 * length
+    counts = []
+    for size in sizes:
+        counts.append(histogram_from_bytes(data[offset:offset + size]))
+        offset += size
+    return counts
+
+
+def to_compact(value):
+    if is_serialized(value):
+        return value
+    text = value if isinstance(value, str) else zlib.decompress(value).decode()
+    try:
+        return dumps(json.loads(text)) if text else None
+    except ValueError:
+        return value
+
+
+def to_json(value):
+    if not is_serialized(value):
+        return value
+    return zlib.compress(json.dumps(loads(value)).encode())
+
+
+def convert_counts(convert):
+    table = sa.table('benchmark', sa.column('id', sa.String()), sa.column('counts', sa.LargeBinary()))
+    connection = op.get_bind()
+    last_id = None
+    while True:
+        query = sa.select(table.c.id, table.c.counts).order_by(table.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(table.c.id > last_id)
+        rows = connection.execute(query).fetchall()
+        if not rows:
+            break
+        for row_id, value in rows:
+            if value is not None:
+                connection.execute(table.update().where(table.c.id == row_id).values(counts=convert(value)))
+        last_id = rows[-1][0]
+
+
+def upgrade():
+    with op.batch_alter_table('result') as batch_op:
+        batch_op.add_column(sa.Column('counts', sa.LargeBinary(), nullable=True))
+    convert_counts(to_compact)
+
+
+def downgrade():
+    convert_counts(to_json)
+    with op.batch_alter_table('result') as batch_op:
+        batch_op.drop_column('counts')
@@ -0,0 +1,28 @@
+"""add indexes to the benchmark table
+
+Revision ID: e6a1c4d8f2b7
+Revises: d8e3b6f1a2c4
+Create Date: 2024-06-14 10:18:06.552931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6a1c4d8f2b7'
+down_revision = 'd8e3b6f1a2c4'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ['benchmark_id', 'backend', 'complete', 'clifford']
+
+
+def upgrade():
+    for column in COLUMNS:
+        op.create_index(op.f('ix_benchmark_' + column), 'benchmark', [column], unique=False)
+
+
+def downgrade():
+    for column in COLUMNS:
+        op.drop_index(op.f('ix_benchmark_' + column), table_name='benchmark')
@@ -0,0 +1,87 @@
+"""add wd_class table with the clifford benchmarks per wd-class
+
+Revision ID: f3b7d9a2c6e1
+Revises: e6a1c4d8f2b7
+Create Date: 2024-06-18 14:05:39.107462
+
+"""
+import math
+import struct
+
+from alembic import op
+import numpy as np
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b7d9a2c6e1'
+down_revision = 'e6a1c4d8f2b7'
+branch_labels = None
+depends_on = None
+
+# wd-class parameters of app.benchmarking at the time of the migration
+MAX_EXPECTED_DEPTH = 30
+MIN_HISTOGRAM_INTERSECTION = 0.75
+BATCH_SIZE = 500
+# value types of version 1 of the compact counts format of app.counts
+VALUE_DTYPES = {b'I': np.dtype('<u4'), b'Q': np.dtype('<u8'), b'd': np.dtype('<f8')}
+
+
+def get_first_count(data):
+    """Read the count of the first outcome of a histogram in the compact counts format, i.e., of the expected outcome
+    of a clifford benchmark"""
+    data = bytes(data)
+    _, _, value_code, num_registers = struct.unpack_from('<4sBcH', data)
+    offset = struct.calcsize('<4sBcH')
+    *register_sizes, length = struct.unpack_from(f'<{num_registers}HQ', data, offset)
+    offset += struct.calcsize(f'<{num_registers}HQ') + 8 * max(1, math.ceil(sum(register_sizes) / 64)) * length
+    return np.frombuffer(data, dtype=VALUE_DTYPES[value_code], count=1, offset=offset)[0].item()
+
+
+def upgrade():
+    wd_class = op.create_table('wd_class',
+    sa.Column('backend', sa.String(length=1200), nullable=False),
+    sa.Column('depth_class', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('width', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('benchmarks', sa.Integer(), nullable=False),
+    sa.Column('successful_benchmarks', sa.Integer(), nullable=False),
+    sa.Column('max_depth', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('backend', 'depth_class', 'width')
+    )
+
+    # add the existing complete clifford benchmarks to their wd-classes
+    benchmark = sa.table('benchmark', sa.column('id', sa.String()), sa.column('backend', sa.String()),
+                         sa.column('counts', sa.LargeBinary()), sa.column('shots', sa.Integer()),
+                         sa.column('transpiled_depth', sa.Integer()), sa.column('transpiled_width', sa.Integer()),
+                         sa.column('clifford', sa.Boolean()), sa.column('complete', sa.Boolean()))
+    connection = op.get_bind()
+    wd_classes = {}
+    last_id = None
+    while True:
+        query = sa.select(benchmark.c.id, benchmark.c.backend, benchmark.c.counts, benchmark.c.shots,
+                          benchmark.c.transpiled_depth, benchmark.c.transpiled_width) \
+            .where(benchmark.c.clifford.is_(True), benchmark.c.complete.is_(True), benchmark.c.counts.isnot(None)) \
+            .order_by(benchmark.c.id).limit(BATCH_SIZE)
+        if last_id is not None:
+            query = query.where(benchmark.c.id > last_id)
+        rows = connection.execute(query).fetchall()
+        if not rows:
+            break
+        for _, backend, benchmark_counts, shots, depth, width in rows:
+            depth_class = min(depth // 5, MAX_EXPECTED_DEPTH // 5)
+            successful = get_first_count(benchmark_counts) / shots >= MIN_HISTOGRAM_INTERSECTION
+            benchmarks, successful_benchmarks, max_depth = wd_classes.get((backend, depth_class, width), (0, 0, 0))
+            wd_classes[(backend, depth_class, width)] = (benchmarks + 1, successful_benchmarks + successful,
+                                                         max(max_depth, depth))
+        last_id = rows[-1][0]
+
+    if wd_classes:
+        op.bulk_insert(wd_class, [{'backend': backend, 'depth_class': depth_class, 'width': width,
+                                   'benchmarks': benchmarks, 'successful_benchmarks': successful_benchmarks,
+                                   'max_depth': max_depth}
+                                  for (backend, depth_class, width), (benchmarks, successful_benchmarks, max_depth)
+                                  in wd_classes.items()])
+
+
+def downgrade():
+    op.drop_table('wd_class')
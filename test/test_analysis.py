@@ -61,6 +61,30 @@ class AnalysisTestCase(unittest.TestCase):
         result = analysis.calc_correlation(counts_sim, counts_real, 1000)
         self.assertEqual(0.408, round(result, 3))
 
+    def test_compare_histograms(self):
+        counts_sim = {"11111": 500, "00000": 500}
+        counts_real = {"11111": 350, "00000": 200, "10101": 200, "11100": 250}
+        result = analysis.compare_histograms(counts_sim, counts_real, 1000)
+        self.assertEqual({"11111": 0.3, "00000": 0.6}, result['percentage-error'])
+        self.assertEqual(0.55, result['histogram-intersection'])
+        self.assertEqual(302.521, round(result['chi-square'], 3))
+        self.assertEqual(0.408, round(result['correlation'], 3))
+
+    def test_compare_histogram_pairs(self):
+        pairs = [({"11111": 500, "00000": 500}, {"11111": 350, "00000": 200, "10101": 200, "11100": 250}),
+                 ({"01": 10}, {"01": 10}),
+                 ({"00000": 1000}, {"11111": 1000})]
+        results = analysis.compare_histogram_pairs(pairs, [1000, 10, 1000])
+        self.assertEqual(3, len(results))
+        for (counts_sim, counts_real), result, shots in zip(pairs, results, [1000, 10, 1000]):
+            self.assertEqual(analysis.calc_percentage_error(counts_sim, counts_real), result['percentage-error'])
+            self.assertAlmostEqual(analysis.calc_intersection(counts_sim, counts_real, shots),
+                                   result['histogram-intersection'])
+            self.assertAlmostEqual(analysis.calc_chi_square_distance(counts_sim, counts_real), result['chi-square'])
+        self.assertIsNone(results[1]['correlation'])
+        self.assertEqual(-1, round(results[2]['correlation'], 3))
+        self.assertEqual([], analysis.compare_histogram_pairs([], 1000))
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -23,6 +23,7 @@ import os
 from app.config import basedir
 from app import app, db
 from app.benchmark_model import Benchmark
+from app.wd_class_model import WdClass
 
 
 class BenchmarksTestCase(unittest.TestCase):
@@ -124,6 +125,45 @@ class BenchmarksTestCase(unittest.TestCase):
         self.assertEqual('0', solution_athens[0]['wd'])
         self.assertGreater(int(solution_lima[0]['wd']), 0)
 
+    def test_wd_class_updated_on_completion(self):
+        self.assertEqual(1, WdClass.query.get(('ibmq_lima', 0, 1)).benchmarks)
+        for benchmark_id, first_count in [("7", 100), ("8", 1000)]:
+            db.session.add(Benchmark(id=benchmark_id, backend='ibmq_lima', benchmark_id=4, shots=1024, clifford=True,
+                                     transpiled_depth=3, transpiled_width=1))
+            db.session.commit()
+            benchmark = Benchmark.query.get(benchmark_id)
+            benchmark.counts = {"0": first_count, "1": 1024 - first_count}
+            benchmark.complete = True
+            db.session.commit()
+
+        wd_class = WdClass.query.get(('ibmq_lima', 0, 1))
+        self.assertEqual(3, wd_class.benchmarks)
+        self.assertEqual(2, wd_class.successful_benchmarks)
+        self.assertEqual(3, wd_class.max_depth)
+        response = self.client.get('/qiskit-service/api/v1.0/calc-wd/ibmq_lima')
+        self.assertEqual('5', response.get_json()[0]['wd'])
+
+    def test_new_wd_class_completed_concurrently(self):
+        for benchmark_id in ["7", "8"]:
+            db.session.add(Benchmark(id=benchmark_id, backend='ibmq_lima', benchmark_id=4, shots=1024, clifford=True,
+                                     transpiled_depth=7, transpiled_width=2))
+        db.session.commit()
+        benchmark = Benchmark.query.get("7")
+        benchmark.counts = {"00": 1000, "11": 24}
+        benchmark.complete = True
+        # another worker adds the new wd-class before this one commits
+        other_session = db.create_scoped_session()
+        other_benchmark = other_session.get(Benchmark, "8")
+        other_benchmark.counts = {"00": 100, "11": 924}
+        other_benchmark.complete = True
+        other_session.commit()
+        other_session.remove()
+        db.session.commit()
+
+        wd_class = WdClass.query.get(('ibmq_lima', 1, 2))
+        self.assertEqual(2, wd_class.benchmarks)
+        self.assertEqual(1, wd_class.successful_benchmarks)
+
     def test_get_result_incomplete(self):
 
         benchmark_id = "0"
@@ -169,6 +209,29 @@ class BenchmarksTestCase(unittest.TestCase):
         self.assertEqual(1024, benchmarking_results[1]['shots'])
         self.assertEqual(True, benchmarking_results[1]['complete'])
 
+    def test_analysis(self):
+        # the quantum computer's benchmark is stored before the simulator's one
+        db.session.add(Benchmark(id="6", backend='ibmq_athens', benchmark_id=3, shots=1024, complete=True,
+                                 result='{}', counts='{"00000": 512, "11111": 512}'))
+        db.session.add(Benchmark(id="5", backend='ibmq_qasm_simulator', benchmark_id=3, shots=1024, complete=True,
+                                 result='{}', counts='{"00000": 1024}'))
+        db.session.commit()
+        app.config['BENCHMARK_ANALYSIS_PAGE_SIZE'] = 1
+        try:
+            response = self.client.get('/qiskit-service/api/v1.0/analysis')
+            self.assertEqual(response.status_code, 200)
+            analysis = response.get_json()
+            self.assertEqual(['benchmark-1', 'benchmark-3'], [list(benchmark)[0] for benchmark in analysis])
+            self.assertEqual({"00000": 1024}, analysis[1]['benchmark-3']['counts-sim'])
+            self.assertEqual({"00000": 512, "11111": 512}, analysis[1]['benchmark-3']['counts-real'])
+            self.assertEqual(0.5, analysis[1]['benchmark-3']['histogram-intersection'])
+        finally:
+            app.config['BENCHMARK_ANALYSIS_PAGE_SIZE'] = 500
+
+        response = self.client.get('/qiskit-service/api/v1.0/analysis/ibmq_lima')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([], response.get_json())
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,68 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import unittest
+
+from qiskit.providers.fake_provider import FakeLima
+
+from app.calibration import CalibrationSnapshot
+
+
+class CalibrationSnapshotTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.backend = FakeLima()
+        self.properties = self.backend.properties()
+        self.snapshot = CalibrationSnapshot.from_properties(self.properties)
+
+    def value(self, nduvs, name):
+        # the snapshot holds the values as reported, without converting them to SI units
+        return next(nduv.value for nduv in nduvs if nduv.name == name)
+
+    def test_qubit_averages(self):
+        self.assertEqual(5, self.snapshot.number_of_qubits)
+        for name, average in [('T1', self.snapshot.avg_t1_time), ('T2', self.snapshot.avg_t2_time),
+                              ('readout_error', self.snapshot.avg_readout_error)]:
+            self.assertAlmostEqual(sum(self.value(qubit, name) for qubit in self.properties.qubits) / 5, average)
+
+    def test_gate_averages(self):
+        cx_gates = [gate for gate in self.properties.gates if gate.gate == 'cx']
+        self.assertAlmostEqual(sum(self.value(gate.parameters, 'gate_error') for gate in cx_gates) / len(cx_gates),
+                               self.snapshot.avg_multi_qubit_gate_error)
+        self.assertAlmostEqual(sum(self.value(gate.parameters, 'gate_length') for gate in cx_gates) / len(cx_gates),
+                               self.snapshot.avg_multi_qubit_gate_time)
+        # reset gates are ignored
+        gates = [gate for gate in self.properties.gates if gate.gate != 'reset']
+        single_qubit_gates = [gate for gate in gates if len(gate.qubits) == 1]
+        self.assertAlmostEqual(
+            sum(self.value(gate.parameters, 'gate_length') for gate in single_qubit_gates) / len(single_qubit_gates),
+            self.snapshot.avg_single_qubit_gate_time)
+        self.assertEqual(max(self.value(gate.parameters, 'gate_length') for gate in gates), self.snapshot.max_gate_time)
+
+    def test_gate_errors(self):
+        cx_errors = self.snapshot.gate_errors('cx')
+        self.assertEqual(self.properties.gate_error('cx', [0, 1]), cx_errors[(0, 1)])
+        self.assertEqual(len([gate for gate in self.properties.gates if gate.gate == 'cx']), len(cx_errors))
+
+    def test_snapshot_is_cached_per_calibration(self):
+        self.assertIs(CalibrationSnapshot.from_backend(self.backend), CalibrationSnapshot.from_backend(self.backend))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import copy
+import datetime
+import os
+import unittest
+
+from qiskit.providers.fake_provider import FakeLima
+
+from app import app, db, calibration_history
+from app.calibration_model import Calibration
+from app.config import basedir
+
+
+class CalibrationHistoryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///" + os.path.join(basedir, 'test.db')
+
+        self.client = app.test_client()
+        db.create_all()
+        calibration_history.recorded.clear()
+
+        self.properties = FakeLima().properties()
+        self.date = calibration_history.to_utc(self.properties.last_update_date)
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    def calibrated_after(self, properties, hours, t1=None):
+        """Copy of the properties calibrated the given hours later, with the T1 time of qubit 0 changed if given"""
+        calibrated = copy.deepcopy(properties)
+        calibrated.last_update_date = properties.last_update_date + datetime.timedelta(hours=hours)
+        if t1 is not None:
+            next(nduv for nduv in calibrated.qubits[0] if nduv.name == 'T1').value = t1
+        return calibrated
+
+    def test_record_once_per_calibration(self):
+        calibration_history.record(self.properties)
+        calibration_history.recorded.clear()
+        calibration_history.record(self.properties)
+
+        self.assertEqual(1, Calibration.query.count())
+        properties = calibration_history.get_properties('ibmq_lima')
+        self.assertEqual(self.properties.t1(0), properties.t1(0))
+        self.assertEqual(self.properties.gate_error('cx', [0, 1]), properties.gate_error('cx', [0, 1]))
+
+    def test_unchanged_properties_are_not_recorded(self):
+        calibration_history.record(self.properties)
+        calibration_history.record(self.calibrated_after(self.properties, 1))
+
+        self.assertEqual(1, Calibration.query.count())
+
+    def test_properties_as_of_time(self):
+        calibrated = self.calibrated_after(self.properties, 2, t1=42.0)
+        calibration_history.record(calibrated)
+        calibration_history.record(self.properties)
+        self.assertEqual(2, Calibration.query.count())
+
+        self.assertIsNone(calibration_history.get_properties('ibmq_lima', self.date - datetime.timedelta(hours=1)))
+        earlier = calibration_history.get_properties('ibmq_lima', self.date + datetime.timedelta(hours=1))
+        self.assertEqual(self.properties.t1(0), earlier.t1(0))
+        latest = calibration_history.get_properties('ibmq_lima')
+        self.assertEqual(42.0, next(nduv.value for nduv in latest.qubits[0] if nduv.name == 'T1'))
+        self.assertIsNone(calibration_history.get_properties('ibmq_manila'))
+
+    def test_get_calibration(self):
+        calibration_history.record(self.properties)
+        calibration_history.record(self.calibrated_after(self.properties, 2, t1=42.0))
+
+        at = (self.date + datetime.timedelta(hours=1)).isoformat() + 'Z'
+        response = self.client.get('/qiskit-service/api/v1.0/calibrations/ibmq_lima', query_string={'at': at})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual('ibmq_lima', response.json['backend'])
+        self.assertEqual(self.date.isoformat(), response.json['last-update-date'])
+        self.assertEqual(5, len(response.json['properties']['qubits']))
+
+        response = self.client.get('/qiskit-service/api/v1.0/calibrations/ibmq_lima')
+        self.assertEqual((self.date + datetime.timedelta(hours=2)).isoformat(), response.json['last-update-date'])
+
+        response = self.client.get('/qiskit-service/api/v1.0/calibrations/ibmq_lima', query_string={'at': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get('/qiskit-service/api/v1.0/calibrations/ibmq_manila')
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
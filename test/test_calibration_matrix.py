@@ -0,0 +1,89 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import unittest
+from unittest import mock
+
+import numpy as np
+from qiskit.providers.fake_provider import FakeLima
+
+from app import ibmq_handler
+
+
+class CalibrationMatrixTestCase(unittest.TestCase):
+
+    def setUp(self):
+        ibmq_handler.meas_filters.clear()
+        self.backend = FakeLima()
+        self.backend.configuration().max_experiments = 3
+        self.run = mock.patch.object(self.backend, 'run', wraps=self.backend.run).start()
+        mock.patch.object(ibmq_handler, 'get_qpu', return_value=self.backend).start()
+        mock.patch.object(ibmq_handler.meas_filter_cache, 'get', return_value=None).start()
+        mock.patch.object(ibmq_handler.meas_filter_cache, 'set').start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_complete_matrix_in_batched_jobs(self):
+        meas_filter = ibmq_handler.get_meas_fitter('token', 'ibmq_lima', 1024, qubits=[0, 1, 3])
+
+        # 8 calibration circuits in jobs of at most 3 circuits
+        self.assertEqual([3, 3, 2], [len(call.args[0]) for call in self.run.call_args_list])
+        self.assertEqual((8, 8), meas_filter.cal_matrix.shape)
+        np.testing.assert_allclose(np.ones(8), meas_filter.cal_matrix.sum(axis=0))
+        self.assertTrue(np.all(np.diag(meas_filter.cal_matrix) > 0.8))
+
+    def test_tensored_matrices(self):
+        meas_filter = ibmq_handler.get_meas_fitter('token', 'ibmq_lima', 1024, tensored=True)
+
+        self.assertEqual(1, self.run.call_count)
+        self.assertEqual(2, len(self.run.call_args.args[0]))
+        self.assertEqual(5, len(meas_filter.cal_matrices))
+        for matrix in meas_filter.cal_matrices:
+            self.assertEqual((2, 2), matrix.shape)
+            np.testing.assert_allclose(np.ones(2), matrix.sum(axis=0))
+
+    def test_matrix_is_cached_per_qubits(self):
+        meas_filter = ibmq_handler.get_meas_fitter('token', 'ibmq_lima', 1024, qubits=[0, 1])
+        self.assertIs(meas_filter, ibmq_handler.get_meas_fitter('token', 'ibmq_lima', 1024, qubits=[0, 1]))
+        self.assertEqual(2, self.run.call_count)
+        ibmq_handler.get_meas_fitter('token', 'ibmq_lima', 1024, qubits=[1, 2])
+        self.assertEqual(4, self.run.call_count)
+
+    def test_cached_matrix_is_read_without_calibrating(self):
+        self.assertIsNone(ibmq_handler.get_cached_meas_filter(self.backend, [0, 1]))
+        meas_filter = ibmq_handler.get_meas_fitter('token', 'ibmq_lima', 1024, qubits=[1, 0])
+        # regardless of the shots and the order of the qubits
+        self.assertIs(meas_filter, ibmq_handler.get_cached_meas_filter(self.backend, [0, 1]))
+        self.assertIs(meas_filter, ibmq_handler.get_meas_fitter('token', 'ibmq_lima', 8192, qubits=[0, 1]))
+        self.assertIsNone(ibmq_handler.get_cached_meas_filter(self.backend, [0, 1], tensored=True))
+        self.assertEqual(2, self.run.call_count)
+
+    def test_invalid_qubits(self):
+        for qubits in [[], [0, 0], [5]]:
+            with self.assertRaises(ValueError):
+                ibmq_handler.get_meas_fitter('token', 'ibmq_lima', 1024, qubits=qubits)
+        with mock.patch.dict(ibmq_handler.app.config, {'CALIBRATION_MATRIX_MAX_QUBITS': 2}):
+            with self.assertRaises(ValueError):
+                ibmq_handler.get_meas_fitter('token', 'ibmq_lima', 1024, qubits=[0, 1, 2])
+        self.run.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
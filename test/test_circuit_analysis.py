@@ -0,0 +1,118 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import unittest
+
+from qiskit import QuantumCircuit
+from qiskit.circuit.random import random_circuit
+
+from app import circuit_analysis
+
+
+class CircuitAnalysisTestCase(unittest.TestCase):
+
+    def assert_metrics_equal_to_separate_functions(self, circuit):
+        metrics = circuit_analysis.CircuitMetrics.from_circuit(circuit)
+        self.assertEqual(circuit_analysis.get_width_of_circuit(circuit), metrics.width)
+        self.assertEqual(circuit.depth(), metrics.depth)
+        self.assertEqual(circuit.size(), metrics.total_number_of_operations)
+        self.assertEqual(circuit.num_nonlocal_gates(), metrics.number_of_multi_qubit_gates)
+        self.assertEqual(circuit_analysis.get_number_of_measurement_operations(circuit),
+                         metrics.number_of_measurement_operations)
+        self.assertEqual(circuit_analysis.get_multi_qubit_gate_depth(circuit),
+                         metrics.multi_qubit_gate_depth)
+
+    def test_metrics_random_circuits(self):
+        for seed in range(50):
+            circuit = random_circuit(5, 6, max_operands=3, measure=seed % 2 == 0, conditional=seed % 3 == 0,
+                                     seed=seed)
+            self.assert_metrics_equal_to_separate_functions(circuit)
+
+    def test_metrics_final_measurements_and_barriers(self):
+        circuit = QuantumCircuit(4, 4)
+        circuit.h(0)
+        circuit.cx(0, 1)
+        circuit.barrier()
+        circuit.measure([0, 1, 2], [0, 1, 2])
+        self.assert_metrics_equal_to_separate_functions(circuit)
+        self.assertEqual(2, circuit_analysis.CircuitMetrics.from_circuit(circuit).width)
+
+        # the barrier is not final anymore, thus, all qubits of the barrier are active
+        circuit.x(3)
+        self.assert_metrics_equal_to_separate_functions(circuit)
+        self.assertEqual(4, circuit_analysis.CircuitMetrics.from_circuit(circuit).width)
+
+    def test_multi_qubit_gate_depth_with_barriers(self):
+        # expected values of the implementation before the CircuitMetrics engine, which removed the barriers
+        circuit = QuantumCircuit(4, 1)
+        circuit.cx(0, 1)
+        circuit.barrier()
+        circuit.cx(2, 3)
+        circuit.barrier(1, 2, 3)
+        circuit.ccx(1, 2, 3)
+        circuit.barrier(0, 1)
+        circuit.cx(0, 1)
+        circuit.measure(0, 0)
+        self.assertEqual(3, circuit_analysis.get_multi_qubit_gate_depth(circuit))
+
+        circuit = QuantumCircuit(3)
+        circuit.h(0)
+        circuit.barrier(0, 1, 2)
+        circuit.cx(1, 2)
+        circuit.barrier(0, 1)
+        circuit.h(1)
+        self.assertEqual(1, circuit_analysis.get_multi_qubit_gate_depth(circuit))
+
+    def test_metrics_to_json(self):
+        circuit = QuantumCircuit(2, 2)
+        circuit.h(0)
+        circuit.cx(0, 1)
+        circuit.measure([0, 1], [0, 1])
+        metrics = circuit_analysis.CircuitMetrics.from_circuit(circuit).to_json(prefix='original-')
+        self.assertEqual({'original-depth': 3, 'original-multi-qubit-gate-depth': 1, 'original-width': 2,
+                          'original-total-number-of-operations': 4, 'original-number-of-single-qubit-gates': 1,
+                          'original-number-of-multi-qubit-gates': 1,
+                          'original-number-of-measurement-operations': 2}, metrics)
+
+    def test_unroll_circuit(self):
+        oracle = QuantumCircuit(3, name="oracle")
+        oracle.ccx(0, 1, 2)
+        oracle.swap(0, 2)
+        circuit = QuantumCircuit(3, 3)
+        circuit.h(range(3))
+        circuit.append(oracle.to_gate(), [2, 1, 0])
+        circuit.append(oracle.to_gate(), [0, 1, 2])
+        circuit.measure(range(3), range(3))
+
+        unrolled_circuit = circuit_analysis.unroll_circuit(circuit)
+        self.assertTrue(all(getattr(instruction.operation, 'definition', None) is None
+                            for instruction in unrolled_circuit.data))
+        self.assertEqual(circuit.decompose(reps=10), unrolled_circuit)
+
+    def test_unrolled_metrics(self):
+        for seed in range(20):
+            circuit = random_circuit(4, 4, max_operands=3, measure=True, conditional=seed % 2 == 0, seed=seed)
+            unrolled_circuit = circuit_analysis.unroll_circuit(circuit)
+            self.assertEqual(circuit_analysis.CircuitMetrics.from_circuit(unrolled_circuit).to_json(),
+                             circuit_analysis.CircuitMetrics.from_circuit(circuit, unroll=True).to_json())
+            self.assert_metrics_equal_to_separate_functions(unrolled_circuit)
+
+
+if __name__ == "__main__":
+    unittest.main()
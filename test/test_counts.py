@@ -0,0 +1,109 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import json
+import os
+import unittest
+import zlib
+
+from app import app, db, analysis
+from app.benchmark_model import Benchmark
+from app.config import basedir
+from app.counts import Counts, dumps, loads
+
+
+class CountsTestCase(unittest.TestCase):
+
+    def test_round_trip(self):
+        counts_dict = {'11': 500, '00': 480, '01': 20}
+        counts = Counts.from_dict(counts_dict)
+        self.assertEqual(3, len(counts))
+        self.assertEqual(1000, counts.shots)
+        self.assertEqual(480, counts.get('00'))
+        self.assertEqual(0, counts.get('10'))
+        # the order of the outcomes is kept
+        self.assertEqual(list(counts_dict.items()), list(counts.to_dict().items()))
+        self.assertEqual(counts_dict, Counts.from_bytes(counts.to_bytes()).to_dict())
+
+    def test_registers(self):
+        counts_dict = {'01 101': 3, '10 000': 7}
+        counts = Counts.from_bytes(Counts.from_dict(counts_dict).to_bytes())
+        self.assertEqual((2, 3), counts.register_sizes)
+        self.assertEqual(counts_dict, counts.to_dict())
+        with self.assertRaises(ValueError):
+            Counts.from_dict({'01': 1, '0 1': 1})
+
+    def test_wide_outcomes_and_probabilities(self):
+        counts_dict = {'1' * 100: 0.25, '0' * 99 + '1': 0.75}
+        counts = Counts.from_bytes(Counts.from_dict(counts_dict).to_bytes())
+        self.assertEqual(counts_dict, counts.to_dict())
+        self.assertEqual(0.25, counts.get('1' * 100))
+
+    def test_list_of_counts(self):
+        counts = [Counts.from_dict({'0': 1}), Counts.from_dict({'1': 2, '0': 3})]
+        self.assertEqual(counts, loads(dumps(counts)))
+
+    def test_compact(self):
+        counts_dict = {format(i, '020b'): i + 1 for i in range(20000)}
+        self.assertLess(len(Counts.from_dict(counts_dict).to_bytes()), len(json.dumps(counts_dict)) / 2)
+
+    def test_analysis_on_counts(self):
+        counts_sim = {'00': 400, '11': 600}
+        counts_real = {'00': 300, '01': 50, '11': 650}
+        for sim, real in [(counts_sim, counts_real), (Counts.from_dict(counts_sim), Counts.from_dict(counts_real))]:
+            self.assertAlmostEqual(0.9, analysis.calc_intersection(sim, real, 1000))
+            self.assertAlmostEqual(0.25, analysis.calc_percentage_error(sim, real)['00'])
+            self.assertNotIn('01', analysis.calc_percentage_error(sim, real))
+        # the inputs are not modified
+        self.assertEqual({'00': 400, '11': 600}, counts_sim)
+
+
+class CountsTypeTestCase(unittest.TestCase):
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///" + os.path.join(basedir, 'test.db')
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    def test_stored_compact(self):
+        db.session.add(Benchmark(id='0', counts={'01': 3, '10': 7}))
+        db.session.commit()
+        db.session.remove()
+
+        stored = db.session.execute(db.text("SELECT counts FROM benchmark WHERE id = '0'")).scalar()
+        self.assertEqual(b'QCNT', stored[:4])
+        self.assertEqual({'01': 3, '10': 7}, Benchmark.query.get('0').counts.to_dict())
+
+    def test_legacy_json(self):
+        db.session.add(Benchmark(id='0'))
+        db.session.commit()
+        db.session.execute(db.text("UPDATE benchmark SET counts = :counts WHERE id = '0'"),
+                           {'counts': zlib.compress(b'{"01": 3, "10": 7}')})
+        db.session.commit()
+        db.session.remove()
+
+        self.assertEqual({'01': 3, '10': 7}, Benchmark.query.get('0').counts.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import json
+import os
+import unittest
+
+from app import app, db, db_types
+from app.config import basedir
+from app.result_model import Result
+
+
+class CompressedTextTestCase(unittest.TestCase):
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///" + os.path.join(basedir, 'test.db')
+        db.create_all()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    def test_large_result(self):
+        counts = {format(i, '020b'): i for i in range(20000)}
+        db.session.add(Result(id='0', result=json.dumps({'counts': counts}), complete=True))
+        db.session.commit()
+        db.session.remove()
+
+        stored = db.session.execute(db.text("SELECT result FROM result WHERE id = '0'")).scalar()
+        self.assertIsInstance(stored, bytes)
+        self.assertLess(len(stored), len(json.dumps({'counts': counts})) / 2)
+        self.assertEqual(counts, json.loads(Result.query.get('0').result)['counts'])
+
+    def test_payload_is_loaded_on_access(self):
+        db.session.add(Result(id='0', result='{"counts": {"0": 1}}', complete=True))
+        db.session.commit()
+        db.session.remove()
+
+        result = Result.query.get('0')
+        self.assertTrue(result.complete)
+        self.assertNotIn('result', result.__dict__)
+        self.assertEqual('{"counts": {"0": 1}}', result.result)
+        # the other payload columns are loaded separately
+        self.assertNotIn('counts', result.__dict__)
+        self.assertNotIn('post_processing_result', result.__dict__)
+
+    def test_uncompressed_values(self):
+        self.assertEqual('{"counts": {}}', db_types.decompress('{"counts": {}}'))
+        self.assertEqual('{"counts": {}}', db_types.decompress(b'{"counts": {}}'))
+        self.assertEqual('', db_types.decompress(db_types.compress('')))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from hashlib import sha256
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from app import app, downloader
+
+
+class FileHandler(BaseHTTPRequestHandler):
+    """Serves the files of the server with an ETag and answers conditional requests with 304"""
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        content = self.server.files.get(self.path)
+        if content is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        etag = '"' + sha256(content).hexdigest() + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class DownloaderTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.config = app.config['DOWNLOAD_CACHE_DIR']
+        app.config['DOWNLOAD_CACHE_DIR'] = self.cache_dir
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), FileHandler)
+        self.server.files = {'/a.py': b'qc = 1', '/b.py': b'qc = 2', '/copy-of-a.py': b'qc = 1'}
+        self.server.requests = []
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        app.config['DOWNLOAD_CACHE_DIR'] = self.config
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def test_conditional_download(self):
+        self.assertEqual(b'qc = 1', downloader.download(self.url + '/a.py'))
+        self.assertEqual(b'qc = 1', downloader.download(self.url + '/a.py'))
+        self.assertEqual([('/a.py', None), ('/a.py', '"' + sha256(b'qc = 1').hexdigest() + '"')],
+                         self.server.requests)
+
+        # modified files are downloaded again
+        self.server.files['/a.py'] = b'qc = 3'
+        self.assertEqual(b'qc = 3', downloader.download(self.url + '/a.py'))
+
+    def test_content_addressed_cache(self):
+        downloader.download_all([self.url + '/a.py', self.url + '/copy-of-a.py'])
+        self.assertEqual([sha256(b'qc = 1').hexdigest()], os.listdir(os.path.join(self.cache_dir, 'objects')))
+        self.assertEqual(2, len(os.listdir(os.path.join(self.cache_dir, 'urls'))))
+
+    def test_download_all(self):
+        urls = [self.url + path for path in ['/a.py', '/b.py', '/a.py', '/copy-of-a.py']]
+        self.assertEqual([b'qc = 1', b'qc = 2', b'qc = 1', b'qc = 1'], downloader.download_all(urls))
+
+    def test_download_error(self):
+        with self.assertRaises(requests.HTTPError):
+            downloader.download(self.url + '/missing.py')
+
+
+if __name__ == "__main__":
+    unittest.main()
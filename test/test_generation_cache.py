@@ -0,0 +1,90 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import unittest
+import uuid
+from unittest import mock
+
+from app import implementation_handler
+from app.cache import TieredCache
+from app.parameters import ParameterDictionary
+
+CODE = """
+import qiskit
+
+def get_circuit(number_of_qubits, **kwargs):
+    circuit = qiskit.QuantumCircuit(number_of_qubits)
+    circuit.h(range(number_of_qubits))
+    circuit.measure_all()
+    return circuit
+"""
+
+RANDOM_CODE = """
+import random
+import qiskit
+
+DETERMINISTIC = False
+
+def get_circuit(**kwargs):
+    circuit = qiskit.QuantumCircuit(1)
+    circuit.rx(random.random(), 0)
+    return circuit
+"""
+
+
+class GenerationCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # a namespace of its own, so entries in the Redis tier from earlier runs are not hit
+        mock.patch.object(implementation_handler, 'generation_cache',
+                          TieredCache(f"generation-test-{uuid.uuid4()}", ttl=60)).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_generation_key(self):
+        params_1 = ParameterDictionary({'number_of_qubits': {'rawValue': '3', 'type': 'Integer'},
+                                        'name': {'rawValue': 'x', 'type': 'String'}})
+        params_2 = ParameterDictionary({'name': {'rawValue': 'x', 'type': 'String'},
+                                        'number_of_qubits': {'rawValue': '3', 'type': 'Integer'}})
+        params_3 = ParameterDictionary({'number_of_qubits': {'rawValue': '3', 'type': 'String'},
+                                        'name': {'rawValue': 'x', 'type': 'String'}})
+        key = implementation_handler.get_generation_key(CODE, params_1)
+        self.assertEqual(key, implementation_handler.get_generation_key(CODE, params_2))
+        self.assertNotEqual(key, implementation_handler.get_generation_key(CODE, params_3))
+        self.assertNotEqual(key, implementation_handler.get_generation_key(CODE + "\n", params_1))
+
+    def test_generated_circuit_is_cached(self):
+        input_params = ParameterDictionary({'number_of_qubits': {'rawValue': '3', 'type': 'Integer'}})
+        hits = implementation_handler.generation_cache.hits
+        circuit = implementation_handler.prepare_code_from_data(CODE, input_params)
+        cached_circuit = implementation_handler.prepare_code_from_data(CODE, input_params)
+        self.assertEqual(hits + 1, implementation_handler.generation_cache.hits)
+        self.assertEqual(circuit, cached_circuit)
+        self.assertIsNot(circuit, cached_circuit)
+
+    def test_non_deterministic_circuit_is_not_cached(self):
+        circuit = implementation_handler.prepare_code_from_data(RANDOM_CODE, {})
+        other_circuit = implementation_handler.prepare_code_from_data(RANDOM_CODE, {})
+        self.assertNotEqual(circuit, other_circuit)
+        self.assertEqual(0, len(implementation_handler.generation_cache.local))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import time
+import unittest
+
+from qiskit.providers.exceptions import JobTimeoutError
+from qiskit.providers.jobstatus import JobStatus
+
+from app import job_poller
+
+
+class FakeClock:
+    """Simulated time so that jobs waiting for hours in a queue can be tested instantly"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeJob:
+    """Stand-in for a provider job that is queued, runs and finishes at the given times and counts status calls"""
+
+    def __init__(self, time, queued_until, done_at):
+        self.time = time
+        self.queued_until = queued_until
+        self.done_at = done_at
+        self.status_calls = 0
+
+    def status(self):
+        self.status_calls += 1
+        now = self.time()
+        if now >= self.done_at:
+            return JobStatus.DONE
+        if now >= self.queued_until:
+            return JobStatus.RUNNING
+        return JobStatus.QUEUED
+
+
+class JobPollerTestCase(unittest.TestCase):
+
+    def test_poll_intervals_backoff(self):
+        intervals = job_poller.get_poll_intervals(initial_interval=1, max_interval=60, backoff_factor=2, jitter=0)
+        self.assertEqual([1, 2, 4, 8, 16, 32, 60, 60], [next(intervals) for _ in range(8)])
+
+    def test_poll_intervals_jitter(self):
+        intervals = job_poller.get_poll_intervals(initial_interval=10, max_interval=10, backoff_factor=2, jitter=0.2)
+        for _ in range(100):
+            self.assertTrue(8 <= next(intervals) <= 10)
+
+    def test_status_calls_for_long_queue(self):
+        clock = FakeClock()
+        # two hours in the queue of a QPU
+        job = FakeJob(clock.time, queued_until=7200, done_at=7260)
+        status = job_poller.wait_for_final_state(job, sleep=clock.sleep, initial_interval=1, max_interval=60,
+                                                 backoff_factor=1.5, jitter=0.1)
+        self.assertEqual(JobStatus.DONE, status)
+        self.assertGreaterEqual(clock.now, 7260)
+        # the job is noticed at most one maximum interval after it is done
+        self.assertLessEqual(clock.now, 7260 + 60)
+        # roughly one status request per minute instead of one per network round trip
+        self.assertLess(job.status_calls, 7260 / 60 + 20)
+
+    def test_finished_job_is_not_polled_again(self):
+        clock = FakeClock()
+        job = FakeJob(clock.time, queued_until=0, done_at=0)
+        job_poller.wait_for_final_state(job, sleep=clock.sleep)
+        self.assertEqual(1, job.status_calls)
+        self.assertEqual(0, clock.now)
+
+    def test_timeout(self):
+        clock = FakeClock()
+        job = FakeJob(clock.time, queued_until=1000, done_at=2000)
+        with self.assertRaises(JobTimeoutError):
+            job_poller.wait_for_final_state(job, timeout=0.05, initial_interval=0.01, max_interval=0.01)
+
+    def test_cpu_usage_while_waiting(self):
+        job = FakeJob(time.monotonic, queued_until=0, done_at=time.monotonic() + 0.5)
+        cpu_start = time.process_time()
+        job_poller.wait_for_final_state(job, initial_interval=0.01, max_interval=0.1, backoff_factor=2, jitter=0)
+        cpu_time = time.process_time() - cpu_start
+        # a busy loop would use the whole half second of CPU and call status() hundreds of thousands of times
+        self.assertLess(cpu_time, 0.1)
+        self.assertLess(job.status_calls, 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
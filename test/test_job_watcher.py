@@ -0,0 +1,135 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import asyncio
+import fnmatch
+import json
+import random
+import threading
+import time
+import unittest
+from unittest import mock
+
+from cryptography.fernet import Fernet
+from qiskit.providers.jobstatus import JobStatus
+
+from app import app, encryption, job_watcher, tasks
+
+
+class FakeRedis:
+    """In-memory stand-in for the records of watched jobs"""
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def set(self, name, value, ex=None):
+        with self.lock:
+            self.values[name.encode()] = value.encode()
+
+    def mget(self, names):
+        with self.lock:
+            return [self.values.get(name.encode()) for name in names]
+
+    def scan_iter(self, match):
+        with self.lock:
+            return [name for name in self.values if fnmatch.fnmatch(name.decode(), match)]
+
+    def delete(self, name):
+        with self.lock:
+            self.values.pop(name.encode(), None)
+
+
+class FakeJob:
+
+    def __init__(self, done_at, fail=False):
+        self.done_at = done_at
+        self.fail = fail
+
+    def status(self):
+        if self.fail:
+            raise ConnectionError("provider not reachable")
+        return JobStatus.DONE if time.monotonic() >= self.done_at else JobStatus.QUEUED
+
+
+class FakeJobWatcher(job_watcher.JobWatcher):
+    """Job watcher that retrieves fake jobs and records completions instead of enqueueing them"""
+
+    def __init__(self, jobs, **kwargs):
+        super().__init__(redis=FakeRedis(), threads=8, scan_interval=0.01, initial_interval=0.01, max_interval=0.05,
+                         **kwargs)
+        self.jobs = jobs
+        self.completed = []
+
+    def retrieve_job(self, record):
+        return self.jobs[record['provider_job_id']]
+
+    def complete(self, result_id, record):
+        self.completed.append(result_id)
+        self.redis.delete(tasks.WATCHED_JOB_KEY_PREFIX + result_id)
+
+    def submit(self, result_id, provider_job_id):
+        self.redis.set(tasks.WATCHED_JOB_KEY_PREFIX + result_id, json.dumps({'provider_job_id': provider_job_id}))
+
+    async def run_until_completed(self, number_of_jobs, timeout=10):
+        start = time.monotonic()
+        while len(self.completed) < number_of_jobs and time.monotonic() - start < timeout:
+            await self.scan()
+            await asyncio.sleep(self.scan_interval)
+
+
+class JobWatcherTestCase(unittest.TestCase):
+
+    def test_many_jobs_are_watched_concurrently(self):
+        number_of_jobs = 1000
+        now = time.monotonic()
+        jobs = {f"job-{i}": FakeJob(now + random.uniform(0, 0.5)) for i in range(number_of_jobs)}
+        watcher = FakeJobWatcher(jobs)
+        for i in range(number_of_jobs):
+            watcher.submit(str(i), f"job-{i}")
+
+        asyncio.run(watcher.run_until_completed(number_of_jobs))
+
+        self.assertEqual(number_of_jobs, len(watcher.completed))
+        self.assertEqual(number_of_jobs, len(set(watcher.completed)))
+        self.assertEqual({}, watcher.get_records())
+        # far less than the sum of the waiting times, which would be needed if the jobs were watched one by one
+        self.assertLess(time.monotonic() - now, 5)
+
+    def test_credentials_are_encrypted_in_record(self):
+        key = Fernet.generate_key().decode()
+        with mock.patch.dict(app.config, {'CREDENTIALS_ENCRYPTION_KEY': key}):
+            self.assertTrue(encryption.is_available())
+            record = {'provider': 'ibmq', 'qpu_name': 'ibmq_lima', 'provider_job_id': 'job',
+                      'encrypted_credentials': encryption.encrypt({'token': 'secret-token'})}
+            self.assertNotIn('secret-token', json.dumps(record))
+            with mock.patch.object(tasks, 'get_backend') as get_backend:
+                job_watcher.JobWatcher(redis=FakeRedis(), threads=1).retrieve_job(record)
+        get_backend.assert_called_once_with('ibmq', 'ibmq_lima', token='secret-token')
+        get_backend.return_value.retrieve_job.assert_called_once_with('job')
+
+    def test_unreachable_job_is_completed_after_errors(self):
+        watcher = FakeJobWatcher({'job': FakeJob(0, fail=True)})
+        watcher.submit('0', 'job')
+        asyncio.run(watcher.run_until_completed(1))
+        self.assertEqual(['0'], watcher.completed)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,157 @@
+# ******************************************************************************
+#  Copyright (c) 2021 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister
+
+from app import app, counts, tasks
+from app.counts import Counts
+from app.mitigation import mitigate_counts, nearest_probability_distribution
+
+
+class MitigationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # readout errors of three bits, the ideal distribution is 000 and 111 with equal probability
+        self.cal_matrices = [np.array([[0.95, 0.08], [0.05, 0.92]]), np.array([[0.97, 0.1], [0.03, 0.9]]),
+                             np.array([[0.9, 0.05], [0.1, 0.95]])]
+        self.cal_matrix = np.kron(np.kron(self.cal_matrices[2], self.cal_matrices[1]), self.cal_matrices[0])
+        ideal = np.zeros(8)
+        ideal[[0, 7]] = 0.5
+        self.noisy_counts = Counts(np.arange(8, dtype=np.uint64), (self.cal_matrix @ ideal * 10000).round(), (3,))
+
+    def test_tensored_and_complete_mitigation(self):
+        for mitigated in [mitigate_counts(self.noisy_counts, [0, 1, 2], cal_matrices=self.cal_matrices),
+                          mitigate_counts(self.noisy_counts, [0, 1, 2], cal_matrix=self.cal_matrix)]:
+            # only the rounding of the noisy counts remains
+            self.assertLess(mitigated.shots - mitigated.get('000') - mitigated.get('111'), 5)
+            self.assertAlmostEqual(5000, mitigated.get('000'), delta=2)
+            self.assertAlmostEqual(5000, mitigated.get('111'), delta=2)
+            self.assertAlmostEqual(self.noisy_counts.shots, mitigated.shots)
+
+    def test_only_observed_outcomes_within_distance(self):
+        noisy_counts = Counts.from_dict({'000': 4500, '001': 300, '110': 200, '111': 5000})
+        mitigated = mitigate_counts(noisy_counts, [0, 1, 2], cal_matrices=self.cal_matrices, distance=1)
+        self.assertTrue(set(mitigated.to_dict()) <= {'000', '001', '110', '111'})
+        self.assertTrue(np.all(mitigated.values >= 0))
+        self.assertAlmostEqual(10000, mitigated.shots)
+        self.assertGreater(mitigated.get('111'), 5000)
+
+    def test_bits_without_readout_errors(self):
+        noisy_counts = Counts.from_dict({'0 00': 900, '0 01': 100})
+        mitigated = mitigate_counts(noisy_counts, [0], cal_matrices=[np.array([[0.9, 0.1], [0.1, 0.9]])])
+        self.assertEqual({'0 00': 1000.0}, mitigated.to_dict())
+
+    def test_nearest_probability_distribution(self):
+        np.testing.assert_allclose([0.55, 0.45, 0], nearest_probability_distribution(np.array([0.6, 0.5, -0.1])))
+        np.testing.assert_allclose([0.2, 0.8], nearest_probability_distribution(np.array([0.2, 0.8])))
+
+    def test_wide_outcomes_are_not_mitigated(self):
+        with self.assertRaises(ValueError):
+            mitigate_counts(Counts.from_dict({'1' * 65: 10}), [0], cal_matrices=[np.eye(2)])
+
+    def test_measurement_qubits(self):
+        circuit = QuantumCircuit(QuantumRegister(5, 'q'), ClassicalRegister(3, 'c'))
+        circuit.measure(3, 0)
+        circuit.measure(1, 2)
+        self.assertEqual([3, None, 1], tasks.get_measurement_qubits_from_transpiled_circuit(circuit))
+
+    def test_mitigated_counts_of_execution(self):
+        job_result = {'counts': [self.noisy_counts.to_dict(), {'00': 1000}]}
+        backend = SimpleNamespace(name='ibmq_lima', configuration=lambda: SimpleNamespace(n_qubits=8))
+        meas_filter = SimpleNamespace(cal_matrices=[self.cal_matrices[0], np.eye(2), self.cal_matrices[1],
+                                                    self.cal_matrices[2]])
+        with mock.patch.object(tasks.ibmq_handler, 'get_cached_meas_filter',
+                               return_value=meas_filter) as get_cached_meas_filter:
+            mitigated_counts, error = tasks.get_mitigated_counts(job_result, 'tensored', [[2, 5, 7], [4, None]],
+                                                                 backend)
+        get_cached_meas_filter.assert_called_once_with(backend, [2, 4, 5, 7], tensored=True)
+        self.assertIsNone(error)
+        self.assertAlmostEqual(5000, mitigated_counts[0].get('111'), delta=2)
+        self.assertEqual({'00': 1000.0}, counts.to_json(mitigated_counts[1]))
+
+        self.assertEqual((None, None), tasks.get_mitigated_counts(job_result, None, None, backend))
+        mitigated_counts, error = tasks.get_mitigated_counts({'counts': {'0x1': 1}}, 'tensored', [[0]], backend)
+        self.assertIsNone(mitigated_counts)
+        self.assertIn('not mitigated', error)
+
+    def test_tensored_matrices_of_all_qubits(self):
+        backend = SimpleNamespace(name='ibmq_lima', configuration=lambda: SimpleNamespace(n_qubits=3))
+        meas_filter = SimpleNamespace(cal_matrices=self.cal_matrices)
+        with mock.patch.object(tasks.ibmq_handler, 'get_cached_meas_filter',
+                               side_effect=[None, meas_filter]) as get_cached_meas_filter:
+            mitigated_counts, error = tasks.get_mitigated_counts({'counts': self.noisy_counts.to_dict()}, 'tensored',
+                                                                 [[0, 1, 2]], backend)
+        self.assertEqual(2, get_cached_meas_filter.call_count)
+        self.assertIsNone(error)
+        self.assertAlmostEqual(5000, mitigated_counts.get('000'), delta=2)
+
+    def test_complete_matrices_are_only_read_once(self):
+        job_result = {'counts': [self.noisy_counts.to_dict(), self.noisy_counts.to_dict()]}
+        backend = SimpleNamespace(name='ibmq_lima', configuration=lambda: SimpleNamespace(n_qubits=3))
+        with mock.patch.object(tasks.ibmq_handler, 'get_cached_meas_filter',
+                               return_value=SimpleNamespace(cal_matrix=self.cal_matrix)) as get_cached_meas_filter:
+            mitigated_counts, error = tasks.get_mitigated_counts(job_result, 'complete', [[0, 1, 2], [0, 1, 2]],
+                                                                 backend)
+        get_cached_meas_filter.assert_called_once_with(backend, [0, 1, 2])
+        self.assertEqual(2, len(mitigated_counts))
+
+    def test_complete_matrix_of_permuted_qubits(self):
+        # the classical bits 0, 1 and 2 measure the qubits 2, 0 and 1, the matrix is in ascending order of the qubits
+        cal_matrix = np.kron(np.kron(self.cal_matrices[1], self.cal_matrices[0]), self.cal_matrices[2])
+        ideal = np.zeros(8)
+        ideal[0b101] = 1
+        noisy_counts = Counts(np.arange(8, dtype=np.uint64), (cal_matrix @ ideal * 10000).round(), (3,))
+        backend = SimpleNamespace(name='ibmq_lima', configuration=lambda: SimpleNamespace(n_qubits=3))
+        with mock.patch.object(tasks.ibmq_handler, 'get_cached_meas_filter',
+                               return_value=SimpleNamespace(cal_matrix=self.cal_matrix)) as get_cached_meas_filter:
+            mitigated_counts, error = tasks.get_mitigated_counts({'counts': noisy_counts.to_dict()}, 'complete',
+                                                                 [[2, 0, 1]], backend)
+        get_cached_meas_filter.assert_called_once_with(backend, [0, 1, 2])
+        self.assertIsNone(error)
+        self.assertAlmostEqual(10000, mitigated_counts.get('101'), delta=2)
+
+    def test_no_cached_calibration_matrix(self):
+        backend = SimpleNamespace(name='ibmq_lima', configuration=lambda: SimpleNamespace(n_qubits=3))
+        with mock.patch.object(tasks.ibmq_handler, 'get_cached_meas_filter', return_value=None), \
+                mock.patch.object(tasks.ibmq_handler, 'get_meas_fitter') as get_meas_fitter:
+            for readout_mitigation in ['tensored', 'complete']:
+                mitigated_counts, error = tasks.get_mitigated_counts({'counts': self.noisy_counts.to_dict()},
+                                                                     readout_mitigation, [[0, 1, 2]], backend)
+                self.assertIsNone(mitigated_counts)
+                self.assertIn('qubits [0, 1, 2]', error)
+                self.assertIn('any number of shots', error)
+        # no calibration circuits are executed
+        get_meas_fitter.assert_not_called()
+
+    def test_invalid_readout_mitigation(self):
+        client = app.test_client()
+        for request_json in [{'readout-mitigation': 'inverse'}, {'readout-mitigation': 'tensored', 'provider': 'aws'},
+                             {'readout-mitigation': 'tensored', 'noise-model': 'ibmq_lima'}]:
+            response = client.post('/qiskit-service/api/v1.0/execute', json={
+                'qpu-name': 'ibmq_lima', 'token': 'token', 'qasm-string': 'OPENQASM 2.0;', **request_json})
+            self.assertEqual(400, response.status_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
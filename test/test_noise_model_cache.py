@@ -0,0 +1,56 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import pickle
+import unittest
+import zlib
+
+from qiskit.providers.fake_provider import FakeVigo
+
+from app import ibmq_handler
+
+
+class NoiseModelCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        ibmq_handler.noise_models.clear()
+
+    def test_noise_model_is_cached(self):
+        backend = FakeVigo()
+        noise_model = ibmq_handler.get_noise_model(backend)
+        self.assertIs(noise_model, ibmq_handler.get_noise_model(backend))
+        self.assertTrue(noise_model.noise_qubits)
+        self.assertEqual(len(backend.properties().qubits), len(noise_model._local_readout_errors))
+
+    def test_only_measurement_errors(self):
+        backend = FakeVigo()
+        noise_model = ibmq_handler.get_noise_model(backend, only_measurement_errors=True)
+        self.assertIsNot(noise_model, ibmq_handler.get_noise_model(backend))
+        self.assertFalse(noise_model._local_quantum_errors)
+        self.assertEqual(len(backend.properties().qubits), len(noise_model._local_readout_errors))
+
+    def test_serialized_noise_model(self):
+        noise_model = ibmq_handler.get_noise_model(FakeVigo())
+        restored_noise_model = pickle.loads(zlib.decompress(zlib.compress(pickle.dumps(noise_model))))
+        self.assertEqual(noise_model.basis_gates, restored_noise_model.basis_gates)
+        self.assertEqual(noise_model._local_readout_errors.keys(), restored_noise_model._local_readout_errors.keys())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app import provider_sessions
+
+
+class FakeProvider:
+    """Stand-in for a provider whose account activation is a slow network round trip"""
+
+    activations = 0
+
+    def __init__(self):
+        FakeProvider.activations += 1
+        time.sleep(0.05)
+        self.backend_requests = 0
+
+    def get_backend(self, name, **kwargs):
+        self.backend_requests += 1
+        return (name, kwargs)
+
+
+def create_session(**backend_options):
+    return provider_sessions.ProviderSession(FakeProvider(), **backend_options)
+
+
+class ProviderSessionsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        provider_sessions.sessions.clear()
+        FakeProvider.activations = 0
+
+    def test_session_is_reused(self):
+        session = provider_sessions.get_session('fake', create_session, token='a', hub='ibm-q')
+        self.assertIs(session, provider_sessions.get_session('fake', create_session, hub='ibm-q', token='a'))
+        self.assertIsNot(session, provider_sessions.get_session('fake', create_session, token='a', hub='other'))
+        self.assertIsNot(session, provider_sessions.get_session('fake', create_session, token='b', hub='ibm-q'))
+        self.assertEqual(3, FakeProvider.activations)
+
+    def test_concurrent_requests_activate_account_once(self):
+        with ThreadPoolExecutor(16) as executor:
+            sessions = list(executor.map(lambda _: provider_sessions.get_session('fake', create_session, token='a'),
+                                         range(64)))
+        self.assertEqual(1, FakeProvider.activations)
+        self.assertTrue(all(session is sessions[0] for session in sessions))
+
+    def test_locks_do_not_grow_with_accounts(self):
+        number_of_locks = len(provider_sessions._locks)
+        for i in range(1000):
+            provider_sessions.get_session('fake', lambda: 'session', token=str(i))
+        self.assertEqual(number_of_locks, len(provider_sessions._locks))
+        key = provider_sessions.get_session_key('fake', token='a')
+        self.assertIs(provider_sessions._get_lock(key), provider_sessions._get_lock(key))
+
+    def test_backend_handles_are_reused(self):
+        session = provider_sessions.get_session('fake', lambda: create_session(region='eu-west-2'), token='a')
+        self.assertEqual(('qpu', {'region': 'eu-west-2'}), session.get_backend('qpu'))
+        session.get_backend('qpu')
+        self.assertEqual(1, session.provider.backend_requests)
+        session.get_backend('other-qpu')
+        self.assertEqual(2, session.provider.backend_requests)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import json
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from cryptography.fernet import Fernet
+
+from app import app, qpu_catalog
+
+
+class FakeRedis:
+    """In-memory stand-in for the hashes of the catalogs"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def hset(self, name, key=None, value=None, mapping=None):
+        values = self.hashes.setdefault(name, {})
+        for field, field_value in ({key: value} if mapping is None else mapping).items():
+            values[field.encode()] = str(field_value).encode()
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key.encode())
+
+    def hmget(self, name, *keys):
+        return [self.hget(name, key) for key in keys]
+
+    def hgetall(self, name):
+        return dict(self.hashes.get(name, {}))
+
+    def hdel(self, name, key):
+        self.hashes.get(name, {}).pop(key.encode(), None)
+
+    def delete(self, name):
+        self.hashes.pop(name, None)
+
+
+class FakeBackend:
+
+    def __init__(self, name, pending_jobs):
+        self.name = name
+        self.pending_jobs = pending_jobs
+
+    def status(self):
+        return SimpleNamespace(backend_name=self.name, pending_jobs=self.pending_jobs)
+
+
+class FakeQpuCatalog(qpu_catalog.QpuCatalog):
+    """Catalog of fake backends, counting the requests for their metrics"""
+
+    def __init__(self):
+        super().__init__(redis=FakeRedis(), threads=2)
+        self.backends = [FakeBackend('ibmq_lima', 3), FakeBackend('ibmq_quito', 0)]
+        self.metrics_requests = 0
+
+    def get_backends(self, token):
+        return self.backends
+
+    def get_metrics(self, backends):
+        self.metrics_requests += 1
+        return {'_embedded': {'qpuDtoes': [{'name': backend.name, 'queueSize': backend.pending_jobs,
+                                            'lastUpdated': ''} for backend in backends]}}
+
+
+def get_queue_sizes(catalog):
+    return {qpu['name']: qpu['queueSize'] for qpu in json.loads(catalog)['_embedded']['qpuDtoes']}
+
+
+class QpuCatalogTestCase(unittest.TestCase):
+
+    def setUp(self):
+        mock.patch.dict(app.config, {'CREDENTIALS_ENCRYPTION_KEY': Fernet.generate_key().decode()}).start()
+        self.catalog = FakeQpuCatalog()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def age(self, token, seconds, field):
+        key = qpu_catalog.KEY_PREFIX + qpu_catalog.get_account_key(token)
+        self.catalog.redis.hset(key, field, float(self.catalog.redis.hget(key, field)) - seconds)
+
+    def test_catalog_is_cached(self):
+        self.assertEqual({'ibmq_lima': 3, 'ibmq_quito': 0}, get_queue_sizes(self.catalog.get('token', 60)))
+        self.catalog.backends[0].pending_jobs = 5
+        self.assertEqual({'ibmq_lima': 3, 'ibmq_quito': 0}, get_queue_sizes(self.catalog.get('token', 60)))
+        self.assertEqual(1, self.catalog.metrics_requests)
+
+    def test_outdated_queue_sizes_are_refreshed(self):
+        self.catalog.get('token', 60)
+        self.catalog.backends[0].pending_jobs = 5
+        self.age('token', 30, 'queue-updated')
+        self.assertEqual({'ibmq_lima': 5, 'ibmq_quito': 0}, get_queue_sizes(self.catalog.get('token', 10)))
+        # only the queue sizes are refreshed, the calibrations are not older than the calibration interval
+        self.assertEqual(1, self.catalog.metrics_requests)
+
+        self.age('token', app.config['QPU_CATALOG_CALIBRATION_INTERVAL'], 'calibration-updated')
+        self.catalog.get('token', 10)
+        self.assertEqual(2, self.catalog.metrics_requests)
+
+    def test_refresh_all(self):
+        self.catalog.get('token', 60)
+        self.catalog.get('other-token', 60)
+        self.catalog.backends[1].pending_jobs = 7
+        self.age('token', app.config['QPU_CATALOG_QUEUE_INTERVAL'], 'queue-updated')
+        # the catalog of accounts that were not requested for a long time is removed
+        account_key = qpu_catalog.get_account_key('other-token')
+        record = json.loads(self.catalog.redis.hget(qpu_catalog.ACCOUNTS_KEY, account_key))
+        record['requested'] = time.time() - app.config['QPU_CATALOG_IDLE_TIMEOUT'] - 1
+        self.catalog.redis.hset(qpu_catalog.ACCOUNTS_KEY, account_key, json.dumps(record))
+
+        self.catalog.refresh_all()
+        self.assertEqual(2, self.catalog.metrics_requests)
+        self.assertEqual({'ibmq_lima': 3, 'ibmq_quito': 7}, get_queue_sizes(self.catalog.get('token', 60)))
+        self.assertIsNone(self.catalog.redis.hget(qpu_catalog.KEY_PREFIX + account_key, 'catalog'))
+        self.assertIsNone(self.catalog.redis.hget(qpu_catalog.ACCOUNTS_KEY, account_key))
+
+    def test_token_is_encrypted(self):
+        self.catalog.get('secret-token', 60)
+        record = self.catalog.redis.hget(qpu_catalog.ACCOUNTS_KEY, qpu_catalog.get_account_key('secret-token'))
+        self.assertNotIn(b'secret-token', record)
+
+        # without the encryption key, the token is not stored and the catalog is only refreshed on request
+        app.config['CREDENTIALS_ENCRYPTION_KEY'] = None
+        self.catalog.get('other-token', 60)
+        record = self.catalog.redis.hget(qpu_catalog.ACCOUNTS_KEY, qpu_catalog.get_account_key('other-token'))
+        self.assertNotIn(b'other-token', record)
+        self.age('other-token', app.config['QPU_CATALOG_CALIBRATION_INTERVAL'], 'calibration-updated')
+        self.catalog.refresh_all()
+        self.assertEqual(2, self.catalog.metrics_requests)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import os
+import threading
+import time
+import unittest
+from unittest import mock
+
+from app import app, db, result_events
+from app.config import basedir
+from app.result_model import Result
+
+
+class FakeRedis:
+    """Delivers published messages directly to the result listener of this process"""
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, message):
+        self.published.append(channel)
+        result_events.get_listener().notify(channel[len(result_events.CHANNEL_PREFIX):])
+
+
+class ResultEventsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///" + os.path.join(basedir, 'test.db')
+        self.client = app.test_client()
+        db.create_all()
+        db.session.add(Result(id='0'))
+        db.session.add(Result(id='1', complete=True, result='{"counts": {"0": 1024}}'))
+        db.session.commit()
+
+        self.redis = FakeRedis()
+        self.patch = mock.patch.object(app, 'redis', self.redis)
+        self.patch.start()
+        self.config = {key: app.config[key] for key in ['RESULT_EVENTS_TIMEOUT', 'RESULT_WAIT_POLL_INTERVAL']}
+
+    def tearDown(self):
+        app.config.update(self.config)
+        self.patch.stop()
+        db.session.remove()
+        db.drop_all()
+
+    def complete_result(self, delay):
+        def complete():
+            time.sleep(delay)
+            with app.app_context():
+                result = Result.query.get('0')
+                result.result = '{"counts": {"1": 1024}}'
+                result.complete = True
+                db.session.commit()
+                db.session.remove()
+
+        thread = threading.Thread(target=complete)
+        thread.start()
+        return thread
+
+    def test_completion_is_published_once(self):
+        result = Result.query.get('0')
+        result.backend = 'aer_qasm_simulator'
+        db.session.commit()
+        self.assertEqual([], self.redis.published)
+
+        result.complete = True
+        db.session.commit()
+        result.shots = 1024
+        db.session.commit()
+        db.session.add(Result(id='2', complete=True))
+        db.session.commit()
+        self.assertEqual([result_events.CHANNEL_PREFIX + '0', result_events.CHANNEL_PREFIX + '2'],
+                         self.redis.published)
+
+    def test_rolled_back_completion_is_not_published(self):
+        result = Result.query.get('0')
+        result.complete = True
+        db.session.flush()
+        db.session.rollback()
+        db.session.commit()
+        self.assertEqual([], self.redis.published)
+
+    def test_long_poll(self):
+        # the database is only checked again after the poll interval unless the completion is published
+        app.config['RESULT_WAIT_POLL_INTERVAL'] = 30
+        thread = self.complete_result(0.2)
+        start = time.monotonic()
+        response = self.client.get('/qiskit-service/api/v1.0/results/0?wait=10')
+        thread.join()
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertEqual({'id': '0', 'complete': True, 'result': {'counts': {'1': 1024}}, 'backend': '', 'shots': 0},
+                         response.get_json())
+
+    def test_no_connection_is_held_while_waiting(self):
+        checked_out = []
+        wait = result_events.threading.Event.wait
+
+        def record_connection(waiter, timeout=None):
+            checked_out.append(db.session().in_transaction())
+            return wait(waiter, timeout)
+
+        with mock.patch.object(result_events.threading.Event, 'wait', record_connection):
+            self.client.get('/qiskit-service/api/v1.0/results/0?wait=0.1')
+        self.assertTrue(checked_out)
+        self.assertFalse(any(checked_out))
+
+    def test_long_poll_timeout(self):
+        response = self.client.get('/qiskit-service/api/v1.0/results/0?wait=0.1')
+        self.assertEqual({'id': '0', 'complete': False}, response.get_json())
+
+    def test_event_stream(self):
+        response = self.client.get('/qiskit-service/api/v1.0/results/1/events')
+        self.assertEqual('text/event-stream', response.mimetype)
+        self.assertEqual('event: complete\ndata: {"id": "1", "complete": true, "result": {"counts": {"0": 1024}}, '
+                         '"backend": "", "shots": 0}\n\n', response.get_data(as_text=True))
+
+    def test_event_stream_of_pending_result(self):
+        thread = self.complete_result(0.2)
+        events = self.client.get('/qiskit-service/api/v1.0/results/0/events').get_data(as_text=True)
+        thread.join()
+        self.assertTrue(events.startswith(': keep-alive\n\n'))
+        self.assertTrue(events.endswith('"result": {"counts": {"1": 1024}}, "backend": "", "shots": 0}\n\n'))
+
+    def test_event_stream_timeout(self):
+        app.config['RESULT_EVENTS_TIMEOUT'] = 0
+        events = self.client.get('/qiskit-service/api/v1.0/results/0/events').get_data(as_text=True)
+        self.assertEqual('event: timeout\ndata: {}\n\n', events)
+
+    def test_unknown_result(self):
+        self.assertEqual(404, self.client.get('/qiskit-service/api/v1.0/results/unknown?wait=1').status_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -17,10 +17,14 @@
 #  limitations under the License.
 # ******************************************************************************
 
+import datetime
+import json
 import unittest
 import os
+from unittest import mock
 from app.config import basedir
-from app import app, db
+from app import app, db, tasks, implementation_handler
+from app.generated_circuit_model import Generated_Circuit
 from app.result_model import Result
 
 
@@ -90,6 +94,76 @@ class ResultsTestCase(unittest.TestCase):
         self.assertEqual(result['complete'], True)
         self.assertIn("complete", result["result"]['text'])
 
+    def test_post_processing_result(self):
+        db.session.add(Generated_Circuit(id="2", input_params='{}', complete=True))
+        db.session.commit()
+        for result_id, post_processing_result in [("0", '{"value": 1}'), ("1", '2')]:
+            with mock.patch.object(implementation_handler, 'prepare_post_processing_code_from_data',
+                                   return_value=post_processing_result):
+                tasks.save_execution_result(result_id, {'counts': {'0': 1}}, "2", None, ["code"], None)
+
+            response = self.client.get('/qiskit-service/api/v1.0/results/%s' % result_id)
+            self.assertEqual(json.loads(post_processing_result), response.get_json()['post-processing-result'])
+
+
+class ResultsQueryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///" + os.path.join(basedir, 'test.db')
+
+        self.client = app.test_client()
+        db.create_all()
+
+        for i in range(10):
+            db.session.add(Result(id=str(i), complete=i % 2 == 0, backend='ibmq_lima' if i < 5 else 'aer_simulator',
+                                  result='{"counts": {"0": %d}}' % i if i % 2 == 0 else '',
+                                  created_at=datetime.datetime(2024, 1, 1 + i)))
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.remove()
+        db.drop_all()
+
+    def query(self, **query):
+        response = self.client.post('/qiskit-service/api/v1.0/results/query', json=query)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_query_ids(self):
+        response = self.query(ids=['4', '1', 'unknown'])
+        self.assertEqual(['1', '4'], [result['id'] for result in response['results']])
+        self.assertEqual({'counts': {'0': 4}}, response['results'][1]['result'])
+        self.assertIsNone(response['results'][0]['result'])
+        self.assertEqual('2024-01-05T00:00:00', response['results'][1]['created-at'])
+        self.assertIsNone(response['next-cursor'])
+
+    def test_query_filters(self):
+        response = self.query(backend='ibmq_lima', complete=True)
+        self.assertEqual(['0', '2', '4'], [result['id'] for result in response['results']])
+        response = self.query(**{'created-after': '2024-01-03', 'created-before': '2024-01-05T00:00:00Z'})
+        self.assertEqual(['2', '3'], [result['id'] for result in response['results']])
+
+    def test_projection(self):
+        response = self.query(ids=['0', '1'], fields=['complete'])
+        self.assertEqual([{'id': '0', 'complete': True}, {'id': '1', 'complete': False}], response['results'])
+
+    def test_pagination(self):
+        ids = []
+        response = self.query(fields=[], limit=4)
+        while True:
+            ids += [result['id'] for result in response['results']]
+            if not response['next-cursor']:
+                break
+            response = self.query(fields=[], limit=4, cursor=response['next-cursor'])
+        self.assertEqual([str(i) for i in range(10)], ids)
+
+    def test_invalid_query(self):
+        for query in [{'fields': ['token']}, {'limit': 0}, {'created-after': 'yesterday'}, {'complete': 'false'},
+                      {'ids': '1'}, {'ids': [1]}, {'ids': ['1'] * (app.config['RESULT_QUERY_MAX_PAGE_SIZE'] + 1)}]:
+            response = self.client.post('/qiskit-service/api/v1.0/results/query', json=query)
+            self.assertEqual(response.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
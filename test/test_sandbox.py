@@ -0,0 +1,100 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import os
+import unittest
+
+from app import app, sandbox
+from app.config import basedir
+
+PARAMETRIZED_CODE = """
+import qiskit
+
+def get_circuit(number_of_qubits, **kwargs):
+    circuit = qiskit.QuantumCircuit(number_of_qubits)
+    circuit.h(range(number_of_qubits))
+    circuit.measure_all()
+    return circuit
+"""
+
+POST_PROCESSING_CODE = """
+import json
+
+def post_processing(counts, **kwargs):
+    return json.dumps({'most-frequent': max(counts, key=counts.get)})
+"""
+
+
+class SandboxTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.config = {key: app.config[key] for key in ['SANDBOX_POOL_SIZE', 'SANDBOX_CPU_TIME_LIMIT']}
+        sandbox.shutdown()
+
+    def tearDown(self):
+        app.config.update(self.config)
+        sandbox.shutdown()
+
+    def test_get_circuit(self):
+        with open(os.path.join(basedir, '..', '..', 'test', 'data', 'hadamard.py')) as f:
+            circuit = sandbox.get_circuit(f.read(), {})
+        self.assertEqual(1, circuit.num_qubits)
+        self.assertEqual(['h', 'barrier', 'measure'], [instruction.operation.name for instruction in circuit.data])
+
+    def test_get_circuits_in_parallel(self):
+        circuits = sandbox.get_circuits([PARAMETRIZED_CODE] * 4, {'number_of_qubits': 3})
+        self.assertEqual([3] * 4, [circuit.num_qubits for circuit in circuits])
+
+    def test_qc_variable(self):
+        circuit = sandbox.get_circuit("import qiskit\nqc = qiskit.QuantumCircuit(2)\nqc.cx(0, 1)\n", None)
+        self.assertEqual(2, circuit.num_qubits)
+
+    def test_post_processing(self):
+        result = sandbox.post_processing(POST_PROCESSING_CODE, {'counts': {'00': 10, '11': 90}})
+        self.assertEqual('{"most-frequent": "11"}', result)
+
+    def test_errors(self):
+        with self.assertRaises(sandbox.ImplementationError):
+            sandbox.get_circuit("import qiskit\n", {})
+        with self.assertRaises(ValueError):
+            sandbox.get_circuit("def get_circuit():\n    raise RuntimeError('invalid')\n", {})
+        with self.assertRaises(sandbox.ImplementationError):
+            sandbox.get_circuit("syntax error", {})
+
+    def test_cpu_time_limit(self):
+        app.config['SANDBOX_CPU_TIME_LIMIT'] = 1
+        with self.assertRaisesRegex(sandbox.ImplementationError, "CPU time limit"):
+            sandbox.get_circuit("while True:\n    pass\n", {})
+        # the pool is still usable afterwards
+        self.assertEqual(2, sandbox.get_circuit(PARAMETRIZED_CODE, {'number_of_qubits': 2}).num_qubits)
+
+    def test_no_state_leaks_between_implementations(self):
+        sandbox.get_circuit("import qiskit\nqiskit.leaked = True\nqc = qiskit.QuantumCircuit(1)\nqc.h(0)\n", {})
+        for _ in range(app.config['SANDBOX_POOL_SIZE'] + 1):
+            circuit = sandbox.get_circuit("import qiskit\nqc = qiskit.QuantumCircuit(2 if hasattr(qiskit, 'leaked') "
+                                          "else 1)\nqc.h(0)\n", {})
+            self.assertEqual(1, circuit.num_qubits)
+
+    def test_in_process(self):
+        app.config['SANDBOX_POOL_SIZE'] = 0
+        self.assertEqual(3, sandbox.get_circuit(PARAMETRIZED_CODE, {'number_of_qubits': 3}).num_qubits)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import json
+import os
+import unittest
+from unittest import mock
+
+from qiskit import QuantumCircuit
+from qiskit.providers.fake_provider import FakeLagos, FakeQuito, FakeVigo
+
+from app import app, db, tasks, transpilation, transpile_cache
+from app.config import basedir
+from app.transpilation_model import Transpilation
+
+BACKENDS = {'ibm_lagos': FakeLagos(), 'ibmq_quito': FakeQuito(), 'ibmq_vigo': FakeVigo()}
+
+
+def get_backend(provider, qpu_name, **credentials):
+    return BACKENDS.get(qpu_name)
+
+
+def transpile_for_fake_target(circuit_qpy, provider, qpu_name, credentials):
+    # the workers start from the forkserver, so the backends are patched in the worker
+    with mock.patch.object(tasks, 'get_backend', get_backend):
+        return transpilation.transpile_for_target(transpilation.sandbox.circuit_from_qpy(circuit_qpy), provider,
+                                                  qpu_name, credentials)
+
+
+class TranspilationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.pool_size = app.config['TRANSPILE_POOL_SIZE']
+        transpilation.shutdown()
+        self.get_backend = mock.patch.object(tasks, 'get_backend', get_backend)
+        self.get_backend.start()
+        self.transpile_for_target = mock.patch.object(transpilation, '_transpile_for_target',
+                                                      transpile_for_fake_target)
+        self.transpile_for_target.start()
+        transpile_cache.cache.local.clear()
+
+        self.circuit = QuantumCircuit(5)
+        self.circuit.h(0)
+        for qubit in range(1, 5):
+            self.circuit.cx(0, qubit)
+        self.circuit.measure_all()
+        self.targets = [('ibmq', name, {'token': 'YOUR-IBMQ-TOKEN'})
+                        for name in ['ibm_lagos', 'ibmq_quito', 'ibmq_vigo', 'ibmq_missing']]
+
+    def tearDown(self):
+        transpilation.shutdown()
+        self.get_backend.stop()
+        self.transpile_for_target.stop()
+        app.config['TRANSPILE_POOL_SIZE'] = self.pool_size
+
+    def test_parallel_results_match_sequential_results(self):
+        app.config['TRANSPILE_POOL_SIZE'] = 2
+        results = transpilation.transpile_for_targets(self.circuit, self.targets)
+        self.assertIsNotNone(transpilation.get_executor())
+        app.config['TRANSPILE_POOL_SIZE'] = 0
+        sequential_results = transpilation.transpile_for_targets(self.circuit, self.targets)
+
+        self.assertEqual(4, len(results))
+        for result, sequential_result in zip(results[:3], sequential_results):
+            # the layout passes of optimization level 3 are randomized, so only compare the analyzed properties
+            self.assertEqual(sequential_result.keys(), result.keys())
+            self.assertEqual(5, result['width'])
+            self.assertIn('transpiled-qasm', result)
+        self.assertEqual({'error': 'ibmq_missing not found'}, results[3])
+        self.assertEqual(results[3], sequential_results[3])
+
+    def test_too_many_qubits(self):
+        circuit = QuantumCircuit(7)
+        circuit.h(range(7))
+        results = transpilation.transpile_for_targets(circuit, self.targets[:2])
+        self.assertEqual(7, results[0]['width'])
+        self.assertEqual({'error': 'too many qubits required'}, results[1])
+
+
+class TranspileTaskTestCase(unittest.TestCase):
+
+    def setUp(self):
+        app.config['TESTING'] = True
+        app.config['SQLALCHEMY_DATABASE_URI'] = "sqlite:///" + os.path.join(basedir, 'test.db')
+        self.client = app.test_client()
+        db.create_all()
+        self.get_backend = mock.patch.object(tasks, 'get_backend', get_backend)
+        self.get_backend.start()
+
+    def tearDown(self):
+        self.get_backend.stop()
+        db.session.remove()
+        db.drop_all()
+
+    def run_transpile_task(self, transpilation_id, qpu_name, qasm_string):
+        db.session.add(Transpilation(id=transpilation_id, provider='ibmq', backend=qpu_name))
+        db.session.commit()
+        with mock.patch.object(tasks, 'get_current_job', return_value=mock.Mock(get_id=lambda: transpilation_id)):
+            tasks.transpile(provider='ibmq', qpu_name=qpu_name, impl_url='', impl_data='', impl_language='',
+                            qasm_string=qasm_string, input_params={}, bearer_token='',
+                            credentials={'token': 'YOUR-IBMQ-TOKEN'})
+        return self.client.get('/qiskit-service/api/v1.0/transpilations/' + transpilation_id)
+
+    def test_incomplete_transpilation(self):
+        db.session.add(Transpilation(id='0', provider='ibmq', backend='ibmq_vigo'))
+        db.session.commit()
+        response = self.client.get('/qiskit-service/api/v1.0/transpilations/0')
+        self.assertEqual(200, response.status_code)
+        self.assertEqual({'id': '0', 'complete': False}, response.get_json())
+
+    def test_transpile_task(self):
+        qasm = 'OPENQASM 2.0;include "qelib1.inc";qreg q[2];creg c[2];h q[0];cx q[0],q[1];measure q -> c;'
+        response = self.run_transpile_task('1', 'ibmq_vigo', qasm)
+        self.assertEqual(200, response.status_code)
+        result = response.get_json()
+        self.assertTrue(result['complete'])
+        self.assertEqual('ibmq_vigo', result['qpu-name'])
+        self.assertEqual(2, result['original-width'])
+        self.assertEqual(3, result['original-depth'])
+        self.assertEqual(2, result['width'])
+        self.assertIn('transpiled-qasm', result)
+        self.assertEqual(json.loads(Transpilation.query.get('1').result)['depth'], result['depth'])
+
+    def test_transpile_task_error(self):
+        response = self.run_transpile_task('2', 'ibmq_missing', 'OPENQASM 2.0;include "qelib1.inc";qreg q[1];h q[0];')
+        result = response.get_json()
+        self.assertTrue(result['complete'])
+        self.assertEqual('ibmq_missing not found', result['error'])
+
+    def test_unknown_transpilation(self):
+        self.assertEqual(404, self.client.get('/qiskit-service/api/v1.0/transpilations/unknown').status_code)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import datetime
+import unittest
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+from qiskit import QuantumCircuit, Aer
+
+from app import transpile_cache
+from app.cache import LRUCache, TieredCache
+
+
+class TranspileCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # a namespace of its own, so entries in the Redis tier from earlier runs are not hit
+        mock.patch.object(transpile_cache, 'cache', TieredCache(f"transpile-test-{uuid.uuid4()}", ttl=60)).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_lru_eviction(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(1, cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(3, cache.get("c"))
+
+    def test_circuit_hash_ignores_names(self):
+        circuit_1 = QuantumCircuit(2, 2, name="first")
+        circuit_1.h(0)
+        circuit_1.cx(0, 1)
+        circuit_1.measure([0, 1], [0, 1])
+        circuit_2 = circuit_1.copy(name="second")
+        self.assertEqual(transpile_cache.circuit_hash(circuit_1), transpile_cache.circuit_hash(circuit_2))
+
+        circuit_2.x(1)
+        self.assertNotEqual(transpile_cache.circuit_hash(circuit_1), transpile_cache.circuit_hash(circuit_2))
+
+    def test_circuit_hash_custom_gates(self):
+        oracle_1 = QuantumCircuit(2, name="oracle")
+        oracle_1.cz(0, 1)
+        oracle_2 = QuantumCircuit(2, name="oracle")
+        oracle_2.cx(0, 1)
+        circuit_1 = QuantumCircuit(2)
+        circuit_1.append(oracle_1.to_gate(), [0, 1])
+        circuit_2 = QuantumCircuit(2)
+        circuit_2.append(oracle_2.to_gate(), [0, 1])
+        self.assertNotEqual(transpile_cache.circuit_hash(circuit_1), transpile_cache.circuit_hash(circuit_2))
+
+    def test_transpile_with_metrics_cached(self):
+        backend = Aer.get_backend('aer_simulator')
+        circuit = QuantumCircuit(3, 3)
+        circuit.h(0)
+        circuit.cx(0, 1)
+        circuit.cx(1, 2)
+        circuit.measure([0, 1, 2], [0, 1, 2])
+
+        hits = transpile_cache.cache.hits
+        transpiled_circuit, metrics = transpile_cache.transpile_with_metrics(circuit, backend, optimization_level=3)
+        cached_circuit, cached_metrics = transpile_cache.transpile_with_metrics(circuit.copy(), backend,
+                                                                                optimization_level=3)
+        self.assertEqual(hits + 1, transpile_cache.cache.hits)
+        self.assertEqual(metrics, cached_metrics)
+        self.assertEqual(transpiled_circuit, cached_circuit)
+        self.assertEqual(2, metrics['number-of-multi-qubit-gates'])
+        self.assertEqual(3, metrics['number-of-measurement-operations'])
+
+    def test_calibration_version_of_backend_v2(self):
+        updated_at = datetime.datetime(2024, 6, 1, 8, 30)
+        backend = SimpleNamespace(name='device', version=2, _device=SimpleNamespace(
+            properties=SimpleNamespace(service=SimpleNamespace(updatedAt=updated_at))))
+        self.assertEqual(updated_at.isoformat(), transpile_cache.get_calibration_version(backend))
+
+        # the interface version does not identify the calibration, thus, the transpilation is not cached
+        backend = SimpleNamespace(name='device', version=2)
+        self.assertIsNone(transpile_cache.get_calibration_version(backend))
+        self.assertIsNone(transpile_cache.get_transpilation_key(QuantumCircuit(1), backend))
+
+    def test_transpile_list(self):
+        backend = Aer.get_backend('aer_simulator')
+        circuit = QuantumCircuit(2, 2)
+        circuit.h(0)
+        circuit.cx(0, 1)
+        circuit.measure([0, 1], [0, 1])
+
+        transpiled_circuits = transpile_cache.transpile([circuit, circuit.copy()], backend, optimization_level=1)
+        self.assertEqual(2, len(transpiled_circuits))
+        self.assertEqual(transpiled_circuits[0], transpile_cache.transpile(circuit, backend, optimization_level=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+# ******************************************************************************
+#  Copyright (c) 2024 University of Stuttgart
+#
+#  See the NOTICE file(s) distributed with this work for additional
+#  information regarding copyright ownership.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+# ******************************************************************************
+
+import unittest
+from unittest import mock
+
+from rq.worker import SimpleWorker
+
+from app import db, worker
+
+
+class WorkerTestCase(unittest.TestCase):
+
+    def test_session_is_removed_after_each_job(self):
+        rq_worker = worker.Worker.__new__(worker.Worker)
+        with mock.patch.object(SimpleWorker, 'perform_job', side_effect=[True, RuntimeError('failed')]), \
+                mock.patch.object(db.session, 'remove') as remove:
+            self.assertTrue(rq_worker.perform_job(mock.Mock(), mock.Mock()))
+            with self.assertRaises(RuntimeError):
+                rq_worker.perform_job(mock.Mock(), mock.Mock())
+        self.assertEqual(2, remove.call_count)
+
+
+if __name__ == "__main__":
+    unittest.main()